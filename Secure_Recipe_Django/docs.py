@@ -0,0 +1,139 @@
+import functools
+import gzip
+import hashlib
+import re
+import threading
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import URLResolver, get_resolver, include, path
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.schemas.views import SchemaView
+from rest_framework.serializers import BaseSerializer
+
+API_TITLE = 'Secure Recipe'
+API_DESCRIPTION = 'A Web API for our Secure project'
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+SERIALIZER_META = ('fields', 'exclude', 'read_only_fields', 'depth')
+
+
+def lazy_view(factory):
+    view = None
+    lock = threading.Lock()
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            with lock:
+                if view is None:
+                    view = factory()
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
+
+def url_signatures(patterns, prefix=''):
+    for pattern in patterns:
+        route = f'{prefix}{pattern.pattern}'
+        if isinstance(pattern, URLResolver):
+            yield from url_signatures(pattern.url_patterns, route)
+            continue
+        view = getattr(pattern.callback, 'cls', pattern.callback)
+        actions = getattr(pattern.callback, 'actions', None)
+        yield f'{route} {view.__module__}.{view.__qualname__} {actions} {view.__doc__}'
+
+
+def subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from subclasses(subclass)
+
+
+def serializer_signatures():
+    for serializer in set(subclasses(BaseSerializer)):
+        meta = getattr(serializer, 'Meta', None)
+        model = getattr(meta, 'model', None)
+        yield repr((
+            serializer.__module__, serializer.__qualname__,
+            [(name, type(field).__name__, field.source, field.read_only, field.required)
+             for name, field in getattr(serializer, '_declared_fields', {}).items()],
+            [getattr(meta, option, None) for option in SERIALIZER_META],
+            getattr(meta, 'extra_kwargs', None),
+            model and [(field.name, field.get_internal_type()) for field in model._meta.concrete_fields],
+        ))
+
+
+@functools.cache
+def schema_version() -> str:
+    digest = hashlib.sha256(f'{API_TITLE}\n{API_DESCRIPTION}'.encode())
+    for signature in sorted(url_signatures(get_resolver().url_patterns)) + sorted(serializer_signatures()):
+        digest.update(signature.encode())
+    return digest.hexdigest()[:16]
+
+
+class CachedSchemaView(SchemaView):
+    def get(self, request, *args, **kwargs):
+        key = f'api-schema:{schema_version()}:{request.path}:{request.accepted_media_type}:{self.variant(request)}'
+        entry = cache.get(key)
+        if entry is None:
+            entry = self.render(super().get(request, *args, **kwargs))
+            cache.set(key, entry, None)
+        return self.cached_response(request, entry)
+
+    def variant(self, request) -> str:
+        user = request.user
+        if self.public:
+            return 'public'
+        if not user.is_authenticated:
+            return 'anonymous'
+        groups = ','.join(sorted(user.groups.values_list('name', flat=True)))
+        return f'staff={user.is_staff:d}:superuser={user.is_superuser:d}:groups={groups}'
+
+    def render(self, response) -> dict:
+        response.accepted_renderer = self.request.accepted_renderer
+        response.accepted_media_type = self.request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        content = response.render().content
+        return {'content': content, 'gzip': gzip.compress(content, mtime=0), 'content_type': response['Content-Type'],
+                'etag': f'"{hashlib.sha256(content).hexdigest()[:32]}"'}
+
+    def cached_response(self, request, entry):
+        if entry['etag'] in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        elif ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response = HttpResponse(entry['gzip'], content_type=entry['content_type'])
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding', 'Authorization', 'Cookie'))
+        return response
+
+
+def cached_schema_view(view):
+    return CachedSchemaView.as_view(**view.view_initkwargs)
+
+
+def docs_view():
+    from rest_framework.documentation import get_docs_view
+    return cached_schema_view(get_docs_view(title=API_TITLE, description=API_DESCRIPTION))
+
+
+def schema_js_view():
+    from rest_framework.documentation import get_schemajs_view
+    return cached_schema_view(get_schemajs_view(title=API_TITLE, description=API_DESCRIPTION))
+
+
+def schema_view():
+    from rest_framework.schemas import get_schema_view
+    return cached_schema_view(get_schema_view(title=API_TITLE))
+
+
+def include_lazy_docs_urls():
+    urls = [
+        path('', lazy_view(docs_view), name='docs-index'),
+        path('schema.js', lazy_view(schema_js_view), name='schema-js'),
+    ]
+    return include((urls, 'api-docs'), namespace='api-docs')
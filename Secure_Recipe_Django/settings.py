@@ -68,6 +68,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'recipes.profiling.ProfilingMiddleware',
 ]
 
 CORS_ALLOW_CREDENTIALS = True
@@ -110,6 +111,10 @@ DATABASES = {
     }
 }
 
+DATABASE_ROUTERS = ['recipes.sharding.RecipeShardRouter']
+
+RECIPES_SHARDS = []
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -153,3 +158,64 @@ ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_EMAIL_VERIFICATION = "none"
 
 SITE_ID = 1
+
+RECIPES_INDEX_MEMORY_BUDGET = {
+    'autocomplete': 64 * 1024 * 1024,
+    'pantry': 64 * 1024 * 1024,
+    'search': 256 * 1024 * 1024,
+    # Roughly 330 MiB per 100k recipes in every process that builds it.
+    'duplicates': 512 * 1024 * 1024,
+}
+
+RECIPES_SEARCH_SNAPSHOT = BASE_DIR / 'var' / 'search-index.json'
+
+RECIPES_BACKGROUND_JOBS = {
+    'ENABLED': True,
+    'WORKERS': 2,
+    'MAX_QUEUE': 1000,
+    'DURABLE_PATH': None,
+}
+
+RECIPES_GROUP_COMMIT = {
+    'ENABLED': False,
+    'MAX_BATCH': 64,
+    'MAX_DELAY_MS': 2,
+}
+
+RECIPES_DUPLICATES = {
+    'THRESHOLD': 0.6,
+    'HEADER_LIMIT': 5,
+}
+
+RECIPES_TOMBSTONES = {
+    'RETENTION_DAYS': 30,
+}
+
+RECIPES_WARM_UP = False
+
+RECIPES_DOMAIN_CACHE_SIZE = 10000
+
+RECIPES_SERVER = {
+    'BIND': '127.0.0.1:8000',
+    'WORKERS': None,
+    'MAX_REQUESTS': 1000,
+    'MAX_REQUESTS_JITTER': 100,
+    'INDEX_REFRESH_SECONDS': 5,
+}
+
+RECIPES_PROFILING = {
+    'DIRECTORY': BASE_DIR / 'var' / 'profiles',
+    'SAMPLING': True,
+    'INTERVAL': 0.001,
+    'ROWS': 40,
+}
+
+RECIPES_SLOW_QUERIES = {
+    'ENABLED': False,
+    'THRESHOLD_MS': 100,
+    'BUFFER_SIZE': 500,
+    'STACK_DEPTH': 8,
+    'LOG_PATH': BASE_DIR / 'var' / 'slow-queries.log',
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'BACKUP_COUNT': 5,
+}
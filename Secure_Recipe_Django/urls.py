@@ -15,18 +15,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework.documentation import include_docs_urls
-from rest_framework.schemas import get_schema_view
 
-
-API_TITLE = 'Secure Recipe'
-API_DESCRIPTION = 'A Web API for our Secure project'
+from .docs import include_lazy_docs_urls, lazy_view, schema_view
 
 urlpatterns = [
     path('admin-4FeNT*2eT6Dy/', admin.site.urls),
-    path('docs/', include_docs_urls(title=API_TITLE, description=API_DESCRIPTION)),
+    path('docs/', include_lazy_docs_urls()),
     path('api-auth/', include('rest_framework.urls')),
-    path('schema/', get_schema_view(title=API_TITLE)),
+    path('schema/', lazy_view(schema_view)),
     path('api/v1/', include('recipes.urls')),
     path('api/v1/auth/', include('dj_rest_auth.urls')),
     path('api/v1/auth/registration/', include('dj_rest_auth.registration.urls'))
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKDIR = tempfile.mkdtemp()
+Path(WORKDIR, 'bench_settings.py').write_text(f'''
+from Secure_Recipe_Django.settings import *
+
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': {os.path.join(WORKDIR, 'db.sqlite3')!r}}}}}
+RECIPES_SEARCH_SNAPSHOT = None
+''')
+sys.path[:0] = [WORKDIR, str(ROOT)]
+os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from recipes.models import Recipe  # noqa: E402
+
+INGREDIENTS = json.dumps([{'name': 'Flour', 'quantity': 100, 'unit': 'g'}])
+
+
+def seed(recipes: int, authors: int) -> None:
+    users = get_user_model()._meta.db_table
+    table = Recipe._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {users} (password, is_superuser, username, first_name, last_name, email, is_staff, '
+            f'is_active, date_joined) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+            (('!', False, f'cook{number:06d}', '', '', '', False, True, '2022-01-01') for number in range(authors)))
+        cursor.executemany(
+            f'INSERT INTO {table} (author_id, title, description, created_at, updated_at, modified_at, ingredients) '
+            f'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+            ((1 + number % authors, f'Recipe number {number}', 'Mix.', f'2022-{1 + number % 12:02d}-01',
+              '2022-01-01', '2022-01-01 00:00:00', INGREDIENTS) for number in range(recipes)))
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of the recipe admin changelist on a large table')
+    parser.add_argument('--recipes', type=int, default=1_000_000)
+    parser.add_argument('--authors', type=int, default=10_000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    call_command('migrate', verbosity=0)
+    seed(args.recipes, args.authors)
+    client = Client()
+    client.force_login(get_user_model().objects.create_superuser('root', 'root@example.com', 'root'))
+    path = reverse('admin:recipes_recipe_changelist')
+
+    print(f'{args.recipes} recipes, {args.authors} authors')
+    for name, params in [('first page', {}), ('page 500', {'p': '500'}),
+                         ('search title prefix', {'q': 'recipe number 12345'}),
+                         ('search author prefix', {'q': 'cook000042'}),
+                         ('filter author', {'author': 'cook000042'}),
+                         ('filter created_at this year',
+                          {'created_at__gte': '2022-01-01', 'created_at__lt': '2023-01-01'})]:
+        client.get(path, params)
+        start = time.perf_counter()
+        response = client.get(path, params)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<30} {elapsed * 1e3:8.1f} ms  HTTP {response.status_code}  "
+              f"{response.context['cl'].result_count} results")
+
+
+if __name__ == '__main__':
+    main()
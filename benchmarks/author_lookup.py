@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKDIR = tempfile.mkdtemp()
+Path(WORKDIR, 'bench_settings.py').write_text(f'''
+from Secure_Recipe_Django.settings import *
+
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': {os.path.join(WORKDIR, 'db.sqlite3')!r}}}}}
+''')
+sys.path[:0] = [WORKDIR, str(ROOT)]
+os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from recipes.models import Recipe  # noqa: E402
+from recipes.queries import filter_by_author  # noqa: E402
+
+INGREDIENTS = [{'name': 'Flour', 'quantity': 100, 'unit': 'g'}]
+
+
+def seed(users: int, recipes: int) -> None:
+    table = get_user_model()._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (password, is_superuser, username, first_name, last_name, email, is_staff, '
+            f'is_active, date_joined) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+            (('!', False, f'User{number:07d}', '', '', '', False, True, '2022-01-01') for number in range(users)))
+        Recipe.objects.bulk_create(
+            Recipe(author_id=1 + number * (users // recipes), title=f'Recipe {number}', description='Mix.',
+                   ingredients=INGREDIENTS) for number in range(recipes))
+        cursor.execute('ANALYZE')
+
+
+def icontains_first_match(name):
+    user = get_user_model().objects.filter(username__icontains=name)
+    if user:
+        return list(Recipe.objects.select_related('author').filter(author=user[0].pk))
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='by-author lookup latency on a large user table')
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--recipes', type=int, default=10_000)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    seed(args.users, args.recipes)
+    target = f'user{args.users - args.users // args.recipes:07d}'
+
+    queries = {
+        'icontains + first match (before)': lambda: icontains_first_match(target),
+        'lower(username) exact': lambda: list(filter_by_author(Recipe.objects.select_related('author'), target)),
+        'lower(username) prefix': lambda: list(filter_by_author(Recipe.objects.select_related('author'),
+                                                                 target[:-1], prefix=True)),
+    }
+    print(f'{args.users} users, {args.recipes} recipes')
+    for name, query in queries.items():
+        best = min(timeit.repeat(query, number=args.number, repeat=3)) / args.number
+        print(f'{name:<34} {best * 1e3:9.3f} ms  ({len(query())} recipes)')
+
+    for prefix, name in [(False, target), (True, target[:-1])]:
+        sql, params = filter_by_author(Recipe.objects.select_related('author'), name, prefix).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            print(f"plan ({'prefix' if prefix else 'exact'}):", '; '.join(row[-1] for row in cursor.fetchall()))
+
+
+if __name__ == '__main__':
+    main()
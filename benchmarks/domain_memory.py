@@ -0,0 +1,57 @@
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Secure_Recipe_Django.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from recipes.domain import JsonHandler  # noqa: E402
+
+NAMES = ['Eggs', 'Flour', 'Sugar', 'Butter', 'Milk', 'Salt', 'Tomato', 'Basil', 'Olive oil', 'Garlic', 'Onion',
+         'Pasta', 'Rice', 'Water', 'Lemon', 'Parmigiano', 'Pepper', 'Chicken', 'Potato', 'Carrot']
+UNITS = ['kg', 'g', 'l', 'cl', 'ml', 'cup', 'n/a']
+
+
+def make_json(rng):
+    return {
+        'title': 'Recipe of the day',
+        'description': 'Mix everything and cook it.',
+        'created_at': '2022-12-01',
+        'ingredients': [{'name': name, 'quantity': rng.randint(1, 1000), 'unit': rng.choice(UNITS)}
+                        for name in rng.sample(NAMES, 5)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory footprint of a catalog of domain recipes')
+    parser.add_argument('--recipes', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = [make_json(rng) for _ in range(args.recipes)]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    catalog = [JsonHandler.create_recipe_from_json(payload) for payload in payloads]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ingredients = sum(recipe.ingredients() for recipe in catalog)
+    print(f'recipes: {len(catalog)}  ingredients: {ingredients}')
+    print(f'total: {current / 2 ** 20:.1f} MiB  per recipe: {current / len(catalog):.0f} B  '
+          f'per ingredient: {current / ingredients:.0f} B  build: {elapsed:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Secure_Recipe_Django.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from recipes.indexes import DuplicateIndex  # noqa: E402
+from recipes.similarity import recipe_signature  # noqa: E402
+
+WORDS = ['boil', 'fry', 'bake', 'stir', 'chop', 'slice', 'mix', 'whisk', 'season', 'serve', 'the', 'with', 'and',
+         'pasta', 'sauce', 'onion', 'garlic', 'butter', 'oven', 'pan', 'minutes', 'until', 'golden', 'hot', 'fresh']
+NAMES = ['Pasta', 'Tomato', 'Basil', 'Olive oil', 'Garlic', 'Salt', 'Eggs', 'Milk', 'Flour', 'Butter', 'Onion',
+         'Rice', 'Chicken', 'Pepper', 'Cheese', 'Lemon', 'Sugar', 'Potato', 'Carrot', 'Beef']
+
+
+def recipe(pk, generator):
+    return SimpleNamespace(pk=pk, title='Recipe', signature=None,
+                           description=' '.join(generator.choices(WORDS, k=generator.randint(20, 80))),
+                           ingredients=[{'name': name} for name in generator.sample(NAMES, generator.randint(3, 10))])
+
+
+def edited(original, generator):
+    words = original.description.split()
+    words[generator.randrange(len(words))] = generator.choice(WORDS)
+    return SimpleNamespace(**dict(vars(original), pk=None, description=' '.join(words)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of the MinHash/LSH duplicate check')
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--duplicates', type=float, default=0.05, help='Share of near-duplicate recipes')
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    generator = random.Random(0)
+    recipes = []
+    for pk in range(1, args.recipes + 1):
+        if recipes and generator.random() < args.duplicates:
+            recipes.append(SimpleNamespace(**dict(vars(edited(generator.choice(recipes), generator)), pk=pk)))
+        else:
+            recipes.append(recipe(pk, generator))
+
+    index = DuplicateIndex()
+    start = time.perf_counter()
+    index.rebuild(recipes)
+    print(f'build            {time.perf_counter() - start:8.2f} s for {args.recipes} recipes, '
+          f'{index.memory_usage() / 2 ** 20:.0f} MiB')
+
+    probes = [edited(generator.choice(recipes), generator) for _ in range(args.number)]
+    flagged = sum(bool(index.similar(recipe_signature(probe), 0.6)) for probe in probes)
+    best = min(timeit.repeat(lambda: [index.similar(recipe_signature(probe), 0.6) for probe in probes],
+                             number=1, repeat=3)) / args.number
+    print(f'create-time check {best * 1e6:8.1f} us/recipe, {flagged / args.number:.0%} of edited copies flagged')
+
+    start = time.perf_counter()
+    clusters = index.clusters(0.6)
+    print(f'clusters         {time.perf_counter() - start:8.2f} s, {len(clusters)} clusters')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKDIR = tempfile.mkdtemp()
+Path(WORKDIR, 'bench_settings.py').write_text(f'''
+from Secure_Recipe_Django.settings import *
+
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': {os.path.join(WORKDIR, 'db.sqlite3')!r},
+                           'OPTIONS': {{'timeout': 1}}}}}}
+RECIPES_BACKGROUND_JOBS = {{'ENABLED': False}}
+''')
+sys.path[:0] = [WORKDIR, str(ROOT)]
+os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import OperationalError, connection  # noqa: E402
+
+from recipes.models import Recipe  # noqa: E402
+from recipes.writer import WriteCoordinator  # noqa: E402
+
+INGREDIENTS = [{'name': 'Flour', 'quantity': 100, 'unit': 'g'}]
+
+
+def create(author) -> Recipe:
+    return Recipe.objects.create(author=author, title='Bread', description='Bake it', ingredients=INGREDIENTS)
+
+
+def run(clients: int, writes: int, author, coordinator=None) -> tuple:
+    locked = []
+
+    def client():
+        try:
+            for _ in range(writes):
+                try:
+                    coordinator.submit(create, author) if coordinator else create(author)
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    locked.append(error)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return (clients * writes - len(locked)) / elapsed, len(locked)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recipe writes per second with and without group commit')
+    parser.add_argument('--writes', type=int, default=200, help='writes per client')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = WAL')
+    author = get_user_model().objects.create_user('baker', 'baker@example.com', 'baker')
+    connection.close()
+
+    print(f'{"clients":>7} {"mode":<12} {"writes/s":>10} {"locked":>7} {"avg batch":>10}')
+    for clients in args.clients:
+        rate, locked = run(clients, args.writes, author)
+        print(f'{clients:>7} {"direct":<12} {rate:>10.0f} {locked:>7} {"-":>10}')
+        coordinator = WriteCoordinator('default', args.max_batch, args.max_delay_ms / 1e3).start()
+        rate, locked = run(clients, args.writes, author, coordinator)
+        coordinator.shutdown()
+        average = coordinator.report()['average_batch']
+        print(f'{clients:>7} {"group commit":<12} {rate:>10.0f} {locked:>7} {average:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SETTINGS = '''
+from Secure_Recipe_Django.settings import *
+
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': {database!r}}}}}
+ALLOWED_HOSTS = ['127.0.0.1']
+DEBUG = False
+RECIPES_SEARCH_SNAPSHOT = None
+'''
+
+SEED = '''
+from django.contrib.auth import get_user_model
+from recipes.models import Recipe
+author = get_user_model().objects.create_user('chef', password='chef')
+Recipe.objects.bulk_create(Recipe(author=author, title=f'Recipe number {{number}}', description='Mix and serve.',
+                                  ingredients=[{{'name': 'Flour', 'quantity': 100, 'unit': 'g'}}])
+                           for number in range({recipes}))
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def wait_until_listening(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def load(url: str, clients: int, seconds: float) -> tuple:
+    latencies, errors = [], []
+    deadline = time.monotonic() + seconds
+
+    def client():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(url, timeout=10).read()
+                latencies.append(time.perf_counter() - start)
+            except OSError as error:
+                errors.append(error)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of manage.py serve as the worker count grows')
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--path', default='/api/v1/recipes/?fields=id,title')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    Path(workdir, 'bench_settings.py').write_text(SETTINGS.format(database=os.path.join(workdir, 'db.sqlite3')))
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='bench_settings',
+               PYTHONPATH=os.pathsep.join([workdir, str(ROOT), os.environ.get('PYTHONPATH', '')]))
+    manage = [sys.executable, str(ROOT / 'manage.py')]
+    subprocess.run([*manage, 'migrate', '-v', '0'], env=env, check=True)
+    subprocess.run([*manage, 'shell', '-c', SEED.format(recipes=args.recipes)], env=env, check=True)
+
+    print(f'{os.cpu_count()} CPU(s), {args.clients} clients, {args.seconds:.0f}s per run, GET {args.path}')
+    for workers in map(int, args.workers.split(',')):
+        port = free_port()
+        server = subprocess.Popen([*manage, 'serve', '--bind', f'127.0.0.1:{port}', '--workers', str(workers)],
+                                  env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_until_listening(port)
+            latencies, errors = load(f'http://127.0.0.1:{port}{args.path}', args.clients, args.seconds)
+        finally:
+            server.terminate()
+            server.wait()
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f'{workers:>2} workers  {len(latencies) / args.seconds:8.1f} req/s  '
+              f'p50 {quantiles[49] * 1e3:6.1f} ms  p99 {quantiles[98] * 1e3:6.1f} ms  errors {len(errors)}')
+
+
+if __name__ == '__main__':
+    main()
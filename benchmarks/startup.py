@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = '''
+import json, os, sys, tempfile, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Secure_Recipe_Django.settings')
+started = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+from django.urls import get_resolver
+get_resolver().url_patterns
+imported = time.perf_counter()
+
+settings.DATABASES['default']['NAME'] = os.path.join(tempfile.mkdtemp(), 'startup.sqlite3')
+settings.ALLOWED_HOSTS = ['testserver']
+settings.RECIPES_SEARCH_SNAPSHOT = None
+settings.RECIPES_BACKGROUND_JOBS = {{'ENABLED': False}}
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+call_command('migrate', verbosity=0)
+client = Client()
+client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin'))
+
+latencies = {{}}
+for path in {paths!r}:
+    for attempt in ('first', 'second'):
+        begin = time.perf_counter()
+        status = client.get(path).status_code
+        latencies[f'{{path}} ({{attempt}})'] = (time.perf_counter() - begin, status)
+print(json.dumps({{'import': imported - started, 'requests': latencies}}))
+'''
+
+PATHS = ['/api/v1/recipes/', '/schema/', '/docs/']
+
+
+def run_child() -> dict:
+    output = subprocess.run([sys.executable, '-c', CHILD.format(root=str(ROOT), paths=PATHS)], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start cost: URLconf import and first-request latency')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_child() for _ in range(args.runs)]
+    print(f"{'django.setup() + URLconf import':<36} {statistics.median(run['import'] for run in runs) * 1e3:8.1f} ms")
+    for name in runs[0]['requests']:
+        latency = statistics.median(run['requests'][name][0] for run in runs)
+        print(f"{name:<36} {latency * 1e3:8.1f} ms  (HTTP {runs[0]['requests'][name][1]})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Secure_Recipe_Django.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from recipes.domain import JsonHandler  # noqa: E402
+from recipes.serializers import UserRecipeSerializer  # noqa: E402
+
+PAYLOAD = {
+    'title': 'Pasta al pomodoro',
+    'description': 'Boil the pasta, then mix it with the tomato sauce.\nServe with basil!',
+    'ingredients': [{'name': name, 'quantity': 100, 'unit': 'g'}
+                    for name in ['Pasta', 'Tomato', 'Basil', 'Olive oil', 'Garlic', 'Salt', 'Parmigiano', 'Pepper']],
+}
+INVALID_PAYLOAD = dict(PAYLOAD, title='Pasta 4l pomodoro', ingredients=[{'name': 'P4sta', 'quantity': 0, 'unit': 'lt'}])
+
+
+def validate(payload):
+    serializer = UserRecipeSerializer(data=payload)
+    serializer.is_valid()
+    return serializer
+
+
+def build_domain():
+    return JsonHandler.create_recipe_from_json(dict(PAYLOAD, created_at='2022-12-01'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of the recipe write-path validation')
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, function in [('serializer (valid)', lambda: validate(PAYLOAD)),
+                           ('serializer (invalid)', lambda: validate(INVALID_PAYLOAD)),
+                           ('domain build', build_domain)]:
+        best = min(timeit.repeat(function, number=args.number, repeat=5)) / args.number
+        print(f'{name:<22} {best * 1e6:8.1f} us/op')
+    print('errors reported for the invalid payload:', dict(validate(INVALID_PAYLOAD).errors))
+
+
+if __name__ == '__main__':
+    main()
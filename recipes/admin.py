@@ -1,4 +1,142 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
+
 from recipes.models import Recipe
+from recipes.moderation import DELETED, FORBIDDEN, bulk_delete
+from recipes.queries import authors_with_prefix, filter_by_author, is_valid_username, prefix_range
+from recipes.sharding import each_shard, fan_out, find, sharding_enabled, with_authors
+
+EXACT_COUNT_THRESHOLD = 10000
+MAX_EXACT_COUNT = 10000
+
+
+def estimated_rows(model, using: str):
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+def estimated_count(queryset) -> int:
+    if not queryset.query.where:
+        estimate = estimated_rows(queryset.model, queryset.db)
+        if estimate is not None and estimate > EXACT_COUNT_THRESHOLD:
+            return estimate
+    return queryset.order_by()[:MAX_EXACT_COUNT].count()
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if not sharding_enabled():
+            return estimated_count(self.object_list)
+        return sum(estimated_count(shard) for shard in each_shard(self.object_list))
+
+    def page(self, number):
+        if not sharding_enabled():
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(fan_out(self.object_list, limit=bottom + self.per_page)[bottom:], number, self)
+
+
+class ShardedChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        if sharding_enabled() and ((self.show_all and self.can_show_all) or not self.multi_page):
+            self.result_list = fan_out(self.queryset)
+
+
+class AuthorFilter(admin.SimpleListFilter):
+    title = 'author'
+    parameter_name = 'author'
+    template = 'admin/recipes/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {'query_parts': [(name, value) for name, value in changelist.params.items()
+                               if name not in (self.parameter_name, 'p')]}
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        if not is_valid_username(self.value()):
+            return queryset.none()
+        return filter_by_author(queryset, self.value())
+
+
+@admin.register(Recipe)
+class RecipeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'author', 'created_at', 'updated_at')
+    list_select_related = ('author',)
+    list_filter = (AuthorFilter, 'created_at')
+    search_fields = ('title', 'author__username')
+    search_help_text = 'Recipes whose title or author starts with the given text, or a recipe id'
+    ordering = ('-created_at', '-pk')
+    sortable_by = ('id', 'created_at')
+    raw_id_fields = ('author',)
+    readonly_fields = ('modified_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('delete_recipes',)
+
+    def get_queryset(self, request):
+        return with_authors(super().get_queryset(request))
+
+    def get_list_select_related(self, request):
+        return () if sharding_enabled() else self.list_select_related
+
+    def get_changelist(self, request, **kwargs):
+        return ShardedChangeList
+
+    def get_object(self, request, object_id, from_field=None):
+        if not sharding_enabled() or from_field is not None:
+            return super().get_object(request, object_id, from_field)
+        if not str(object_id).isdigit():
+            return None
+        return find(self.get_queryset(request).filter(pk=int(object_id)))
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_search_results(self, request, queryset, search_term):
+        key = search_term.strip().lower()
+        if not key:
+            return queryset, False
+        bounds = {f'title_key__{lookup}': value for lookup, value in prefix_range(key).items()}
+        authors = authors_with_prefix(key)
+        if sharding_enabled():
+            authors = [author['pk'] for author in authors]
+        condition = Q(**bounds) | Q(author__in=authors)
+        if key.isdigit():
+            condition |= Q(pk=int(key))
+        return queryset.alias(title_key=Lower('title')).filter(condition), False
 
-admin.site.register(Recipe)
+    @admin.action(description='Delete selected recipes', permissions=['delete'])
+    def delete_recipes(self, request, queryset):
+        results = bulk_delete(request.user, None, queryset)
+        deleted = sum(result['outcome'] == DELETED for result in results)
+        forbidden = sum(result['outcome'] == FORBIDDEN for result in results)
+        self.message_user(request, f'Deleted {deleted} recipes.', messages.SUCCESS)
+        if forbidden:
+            self.message_user(request, f'{forbidden} recipes written by an administrator were kept.',
+                              messages.WARNING)
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .sharding import configure_shard_connection
+
+        connection_created.connect(configure_shard_connection, dispatch_uid='recipes.shard_connection')
+
+        if getattr(settings, 'RECIPES_SLOW_QUERIES', {}).get('ENABLED', False):
+            from .slowlog import install_slow_query_log
+            install_slow_query_log()
+
+        if getattr(settings, 'RECIPES_WARM_UP', False):
+            from .warmup import warm_up
+            warm_up()
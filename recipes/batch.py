@@ -0,0 +1,80 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.exceptions import ValidationError
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+BATCH_MAX_WORKERS = 4
+
+
+def parse_batch(data, max_requests: int) -> list:
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not 0 < len(items) <= max_requests:
+        raise ValidationError(f"Please, send between 1-{max_requests} requests")
+    for item in items:
+        if not isinstance(item, dict) or item.get('method') not in BATCH_METHODS or \
+                not isinstance(item.get('path'), str) or not item['path'].startswith('/'):
+            raise ValidationError(f"Please, give every request a method among {list(BATCH_METHODS)} "
+                                  "and an absolute path")
+    return items
+
+
+class Batch:
+    def __init__(self, request, viewsets):
+        self.request = request
+        self.user = request.user
+        self.viewsets = viewsets
+        self.cache = {}
+
+    def sub_request(self, item) -> WSGIRequest:
+        url = urlsplit(item['path'])
+        body = b'' if item.get('body') is None else json.dumps(item['body']).encode()
+        environ = dict(self.request.META, REQUEST_METHOD=item['method'], PATH_INFO=url.path, QUERY_STRING=url.query,
+                       CONTENT_TYPE='application/json', CONTENT_LENGTH=str(len(body)))
+        environ['wsgi.input'] = BytesIO(body)
+        sub_request = WSGIRequest(environ)
+        sub_request.user = self.user
+        sub_request._force_auth_user = self.user
+        return sub_request
+
+    def dispatch(self, item) -> dict:
+        try:
+            match = resolve(urlsplit(item['path']).path)
+        except Resolver404:
+            return {'status': 404, 'body': {'detail': "Not found."}}
+        if getattr(match.func, 'cls', None) not in self.viewsets:
+            return {'status': 400, 'body': {'detail': "Only recipe endpoints can be batched"}}
+        try:
+            response = match.func(self.sub_request(item), *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Batched %s %s failed', item['method'], item['path'])
+            return {'status': 500, 'body': {'detail': "Internal server error"}}
+        return {'status': response.status_code, 'body': getattr(response, 'data', None)}
+
+    def execute(self, item) -> dict:
+        if item['method'] != 'GET':
+            self.cache.clear()
+            return self.dispatch(item)
+        if item['path'] not in self.cache:
+            self.cache[item['path']] = self.dispatch(item)
+        return self.cache[item['path']]
+
+    def execute_in_thread(self, item) -> dict:
+        try:
+            return self.execute(item)
+        finally:
+            connections.close_all()
+
+    def run(self, items, concurrent: bool = False) -> list:
+        if concurrent and len(items) > 1 and all(item['method'] == 'GET' for item in items):
+            with ThreadPoolExecutor(max_workers=min(len(items), BATCH_MAX_WORKERS)) as pool:
+                return list(pool.map(self.execute_in_thread, items))
+        return [self.execute(item) for item in items]
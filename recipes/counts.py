@@ -0,0 +1,38 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = 'recipes:count-generation'
+COUNT_TIMEOUT = 24 * 60 * 60
+
+
+def generation() -> int:
+    return cache.get_or_set(GENERATION_KEY, 0, None)
+
+
+def bump_generation() -> None:
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def invalidate_counts() -> None:
+    bump_generation()
+    transaction.on_commit(bump_generation)
+
+
+def count_key(queryset) -> str:
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    digest = hashlib.sha256(repr((queryset.db, sql, params)).encode()).hexdigest()
+    return f'recipes:count:{generation()}:{digest}'
+
+
+def cached_count(queryset) -> int:
+    key = count_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
@@ -1,87 +1,122 @@
 from dataclasses import dataclass, field, InitVar
-import re
 from datetime import date, datetime
 from typing import List, Dict, Any, Optional
 from django.core.exceptions import ValidationError
-from typeguard import typechecked
+from .typechecks import typechecked
+
+from .validation import DESCRIPTION, NAME, TITLE, quantity_errors, raise_first, unit_errors
+
+MAX_INTERNED_NAMES = 65536
+_interned_names = {}
+_interned_quantities = {}
+_interned_units = {}
+
+UNIT_CONVERSIONS = {
+    'kg': ('g', 1000),
+    'g': ('g', 1),
+    'l': ('ml', 1000),
+    'cl': ('ml', 10),
+    'ml': ('ml', 1),
+    'cup': ('ml', 250),
+    'n/a': ('n/a', 1),
+}
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Title:
     value: str
 
     def __post_init__(self):
-        if not (0 < len(self.value) < 30):
-            raise ValidationError("Title must be between 1-30 character")
-        if not re.match(r'^[a-zA-Z ]+$', self.value):
-            raise ValidationError("Title is not syntactically correct")
+        raise_first(TITLE.errors(self.value))
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Description:
     value: str
 
     def __post_init__(self):
-        if not (0 < len(self.value) < 500):
-            raise ValidationError("Description must be between 1-500 character")
-        if not re.match(r'^[a-zA-Z0-9À-ú \'!;.,\n]+$', self.value):
-            raise ValidationError("Description is not syntactically correct")
+        raise_first(DESCRIPTION.errors(self.value))
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Name:
     value: str
 
     def __post_init__(self):
-        if not (0 < len(self.value) < 30):
-            raise ValidationError("Name of the ingredient must be between 1-30 character")
-        if not re.match(r'^[a-zA-ZÀ-ú ]+$', self.value):
-            raise ValidationError("Name of the ingredient is not syntactically correct")
+        raise_first(NAME.errors(self.value))
+
+    @classmethod
+    def of(cls, value: str) -> 'Name':
+        name = _interned_names.get(value)
+        if name is None:
+            name = cls(value)
+            if len(_interned_names) < MAX_INTERNED_NAMES:
+                _interned_names[value] = name
+        return name
 
     def __eq__(self, other):
         return self.value.lower() == other.value.lower()
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Quantity:
     value: int
 
     def __post_init__(self):
-        if not (0 < self.value <= 1000):
-            raise ValidationError("Quantity of the ingredient must be between 1-1000")
+        raise_first(quantity_errors(self.value))
+
+    @classmethod
+    def of(cls, value: int) -> 'Quantity':
+        quantity = _interned_quantities.get(value)
+        if quantity is None:
+            quantity = _interned_quantities.setdefault(value, cls(value))
+        return quantity
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Unit:
     value: str
 
-    __myUnit = ['kg', 'g', 'l', 'cl', 'ml', 'cup', 'n/a']
-
     def __post_init__(self):
-        if not (0 < len(self.value) <= 3):
-            raise ValidationError("Unit of the ingredient must be between 1-3 character")
-        if self.value not in self.__myUnit:
-            raise ValidationError(f"Unit of the ingredient must be one of this: {self.__myUnit}")
+        raise_first(unit_errors(self.value))
+
+    @classmethod
+    def of(cls, value: str) -> 'Unit':
+        unit = _interned_units.get(value)
+        if unit is None:
+            unit = _interned_units.setdefault(value, cls(value))
+        return unit
+
+    def base(self) -> 'Unit':
+        return Unit.of(UNIT_CONVERSIONS[self.value][0])
+
+    def to_base(self, amount: float) -> float:
+        return amount * UNIT_CONVERSIONS[self.value][1]
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Ingredient:
     name: Name
     quantity: Quantity
     unit: Unit
 
     def __eq__(self, other):
+        if not isinstance(other, Ingredient):
+            return NotImplemented
         return self.name == other.name
 
+    def __hash__(self):
+        return hash(self.name)
+
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Recipe:
     title: Title
     description: Description
@@ -176,7 +211,7 @@ class Recipe:
 class JsonHandler:
     @staticmethod
     def create_ingredients_from_json(ingredient) -> Ingredient:
-        return Ingredient(Name(ingredient['name']), Quantity(ingredient['quantity']), Unit(ingredient['unit']))
+        return Ingredient(Name.of(ingredient['name']), Quantity.of(ingredient['quantity']), Unit.of(ingredient['unit']))
 
     @staticmethod
     def create_recipe_from_json(json):
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .domain import JsonHandler
+
+
+def domain_json(recipe) -> dict:
+    return {'title': recipe.title, 'description': recipe.description,
+            'created_at': recipe.created_at.isoformat(), 'ingredients': recipe.ingredients}
+
+
+class DomainRecipeCache:
+    def __init__(self, max_size: int = None):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is None:
+            return getattr(settings, 'RECIPES_DOMAIN_CACHE_SIZE', 10000)
+        return self._max_size
+
+    def get(self, recipe):
+        version = recipe.modified_at
+        with self._lock:
+            entry = self._entries.get(recipe.pk)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(recipe.pk)
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+        domain_recipe = JsonHandler.create_recipe_from_json(domain_json(recipe))
+        self.put(recipe.pk, version, domain_recipe)
+        return domain_recipe
+
+    def put(self, pk, version, domain_recipe) -> None:
+        with self._lock:
+            self._entries[pk] = (version, domain_recipe)
+            self._entries.move_to_end(pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def warm(self, recipes) -> int:
+        warmed = 0
+        for recipe in recipes.only('pk', 'title', 'description', 'created_at', 'ingredients', 'modified_at').iterator():
+            try:
+                self.get(recipe)
+            except ValidationError:
+                continue
+            warmed += 1
+        return warmed
+
+    def invalidate(self, pk) -> None:
+        with self._lock:
+            if self._entries.pop(pk, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def report(self) -> dict:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {'size': len(self._entries), 'max_size': self.max_size, **self.stats,
+                    'hit_rate': self.stats['hits'] / lookups if lookups else None}
+
+
+domain_recipes = DomainRecipeCache()
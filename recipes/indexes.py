@@ -0,0 +1,512 @@
+import abc
+import bisect
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+
+from .models import Recipe, RecipeTombstone
+from .sharding import each_shard
+from .similarity import band_keys, recipe_signature, similarity
+
+logger = logging.getLogger(__name__)
+
+INDEXED_FIELDS = ('pk', 'title', 'description', 'ingredients', 'signature')
+CATCH_UP_OVERLAP = timedelta(seconds=30)
+
+
+def deep_sizeof(*containers) -> int:
+    size = 0
+    for container in containers:
+        size += sys.getsizeof(container)
+        items = container.items() if isinstance(container, dict) else container
+        for item in items:
+            for element in (item if isinstance(item, tuple) else (item,)):
+                size += sys.getsizeof(element)
+    return size
+
+
+def ingredient_names(recipe) -> list:
+    ingredients = recipe.ingredients if isinstance(recipe.ingredients, list) else []
+    names = {}
+    for ingredient in ingredients:
+        if isinstance(ingredient, dict) and isinstance(ingredient.get('name'), str):
+            names.setdefault(ingredient['name'].casefold(), ingredient['name'])
+    return list(names.values())
+
+
+class RecipeIndex(abc.ABC):
+    name = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self.clear()
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def add(self, recipe) -> None:
+        ...
+
+    @abc.abstractmethod
+    def discard(self, pk) -> None:
+        ...
+
+    @abc.abstractmethod
+    def memory_usage(self) -> int:
+        ...
+
+    def ensure_built(self) -> None:
+        if not self._built:
+            self.rebuild()
+
+    def rebuild(self, recipes=None) -> None:
+        if recipes is None:
+            recipes = chain.from_iterable(shard.iterator() for shard in each_shard(
+                Recipe.objects.only(*INDEXED_FIELDS)))
+        with self._lock:
+            self.clear()
+            for recipe in recipes:
+                self.add(recipe)
+            self._built = True
+
+    def update(self, recipe) -> None:
+        with self._lock:
+            if self._built:
+                self.discard(recipe.pk)
+                self.add(recipe)
+
+    def remove(self, pk) -> None:
+        with self._lock:
+            if self._built:
+                self.discard(pk)
+
+    def catch_up(self, since) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            since = rewind(since)
+            for shard in each_shard(Recipe.objects.filter(modified_at__gt=since).only(*INDEXED_FIELDS)):
+                for recipe in shard.iterator():
+                    self.discard(recipe.pk)
+                    self.add(recipe)
+            for pk in RecipeTombstone.objects.filter(deleted_at__gt=since).values_list('recipe_id', flat=True):
+                self.discard(pk)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.clear()
+            self._built = False
+
+    def memory_report(self) -> dict:
+        with self._lock:
+            used = self.memory_usage()
+        budget = getattr(settings, 'RECIPES_INDEX_MEMORY_BUDGET', {}).get(self.name)
+        return {'built': self._built, 'bytes': used, 'budget': budget,
+                'within_budget': budget is None or used <= budget}
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.keys = []
+        self.counts = {}
+        self.display = {}
+
+    def add(self, value: str) -> str:
+        key = value.casefold()
+        if key in self.counts:
+            self.counts[key] += 1
+        else:
+            bisect.insort(self.keys, key)
+            self.counts[key] = 1
+            self.display[key] = value
+        return key
+
+    def discard(self, key: str) -> None:
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+            del self.counts[key]
+            del self.display[key]
+
+    def complete(self, prefix: str, limit: int) -> list:
+        prefix = prefix.casefold()
+        low = bisect.bisect_left(self.keys, prefix)
+        high = bisect.bisect_left(self.keys, prefix + '\U0010ffff', low)
+        best = heapq.nsmallest(limit, self.keys[low:high], key=lambda key: (-self.counts[key], key))
+        return [{'value': self.display[key], 'recipes': self.counts[key]} for key in best]
+
+    def memory_usage(self) -> int:
+        return deep_sizeof(self.keys, self.counts, self.display)
+
+
+class AutocompleteIndex(RecipeIndex):
+    name = 'autocomplete'
+    TITLE = 'title'
+    INGREDIENT = 'ingredient'
+
+    def clear(self) -> None:
+        self._prefixes = {self.TITLE: PrefixIndex(), self.INGREDIENT: PrefixIndex()}
+        self._terms = {}
+
+    def add(self, recipe) -> None:
+        title = self._prefixes[self.TITLE].add(recipe.title)
+        ingredients = [self._prefixes[self.INGREDIENT].add(name) for name in ingredient_names(recipe)]
+        self._terms[recipe.pk] = (title, ingredients)
+
+    def discard(self, pk) -> None:
+        if pk in self._terms:
+            title, ingredients = self._terms.pop(pk)
+            self._prefixes[self.TITLE].discard(title)
+            for ingredient in ingredients:
+                self._prefixes[self.INGREDIENT].discard(ingredient)
+
+    def complete(self, kind: str, prefix: str, limit: int = 10) -> list:
+        self.ensure_built()
+        with self._lock:
+            return self._prefixes[kind].complete(prefix, limit)
+
+    def memory_usage(self) -> int:
+        return sum(prefix.memory_usage() for prefix in self._prefixes.values()) + deep_sizeof(self._terms)
+
+
+def set_bits(mask: int):
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+class PantryIndex(RecipeIndex):
+    name = 'pantry'
+
+    def clear(self) -> None:
+        self._bits = {}
+        self._names = []
+        self._counts = []
+        self._free = []
+        self._masks = {}
+
+    def add(self, recipe) -> None:
+        mask = 0
+        for name in ingredient_names(recipe):
+            key = name.casefold()
+            if key not in self._bits:
+                self._bits[key] = self.allocate(name)
+            mask |= 1 << self._bits[key]
+        for bit in set_bits(mask):
+            self._counts[bit] += 1
+        self._masks[recipe.pk] = mask
+
+    def allocate(self, name: str) -> int:
+        if self._free:
+            bit = heapq.heappop(self._free)
+            self._names[bit] = name
+            return bit
+        self._names.append(name)
+        self._counts.append(0)
+        return len(self._names) - 1
+
+    def discard(self, pk) -> None:
+        for bit in set_bits(self._masks.pop(pk, 0)):
+            self._counts[bit] -= 1
+            if not self._counts[bit]:
+                del self._bits[self._names[bit].casefold()]
+                self._names[bit] = None
+                heapq.heappush(self._free, bit)
+
+    def missing_names(self, mask: int) -> list:
+        return [self._names[bit] for bit in set_bits(mask)]
+
+    def cookable(self, names, missing: int = 0) -> dict:
+        self.ensure_built()
+        with self._lock:
+            pantry = 0
+            for name in names:
+                bit = self._bits.get(name.casefold())
+                if bit is not None:
+                    pantry |= 1 << bit
+            lacking = ~pantry
+            return {pk: self.missing_names(mask & lacking) for pk, mask in self._masks.items()
+                    if (mask & lacking).bit_count() <= missing}
+
+    def memory_usage(self) -> int:
+        return deep_sizeof(self._bits, self._names, self._counts, self._free, self._masks)
+
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def rewind(cursor: datetime) -> datetime:
+    floor = datetime.min.replace(tzinfo=timezone.utc)
+    return cursor - CATCH_UP_OVERLAP if cursor - floor > CATCH_UP_OVERLAP else floor
+
+
+def settling(cursor: datetime) -> bool:
+    return datetime.now(timezone.utc) - cursor < CATCH_UP_OVERLAP
+
+
+def tombstone_horizon() -> datetime:
+    days = getattr(settings, 'RECIPES_TOMBSTONES', {}).get('RETENTION_DAYS', 30)
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def catalog_cursor():
+    changes = [shard.aggregate(last=Max('modified_at'))['last'] for shard in each_shard(Recipe.objects.all())]
+    changes.append(RecipeTombstone.objects.aggregate(last=Max('deleted_at'))['last'])
+    return max(filter(None, changes), default=datetime.min.replace(tzinfo=timezone.utc))
+
+
+class SearchIndex(RecipeIndex):
+    name = 'search'
+    SNAPSHOT_VERSION = 2
+    FIELD_BOOSTS = {'title': 3.0, 'ingredients': 2.0, 'description': 1.0}
+    K1 = 1.2
+    B = 0.75
+
+    def clear(self) -> None:
+        self._documents = {}
+        self._postings = {field: {} for field in self.FIELD_BOOSTS}
+        self._total_length = dict.fromkeys(self.FIELD_BOOSTS, 0)
+
+    def analyze(self, recipe) -> dict:
+        return {
+            'title': Counter(tokenize(recipe.title)),
+            'ingredients': Counter(token for name in ingredient_names(recipe) for token in tokenize(name)),
+            'description': Counter(tokenize(recipe.description)),
+        }
+
+    def add(self, recipe) -> None:
+        self.index_document(recipe.pk, self.analyze(recipe))
+
+    def index_document(self, pk, fields: dict) -> None:
+        lengths = {}
+        for field, frequencies in fields.items():
+            postings = self._postings[field]
+            for term, frequency in frequencies.items():
+                postings.setdefault(term, {})[pk] = frequency
+            lengths[field] = sum(frequencies.values())
+            self._total_length[field] += lengths[field]
+        self._documents[pk] = (fields, lengths)
+
+    def discard(self, pk) -> None:
+        if pk not in self._documents:
+            return
+        fields, lengths = self._documents.pop(pk)
+        for field, frequencies in fields.items():
+            postings = self._postings[field]
+            for term in frequencies:
+                del postings[term][pk]
+                if not postings[term]:
+                    del postings[term]
+            self._total_length[field] -= lengths[field]
+
+    def search(self, query: str, limit: int = 20) -> list:
+        return self.scores(query).most_common(limit)
+
+    def scores(self, query: str) -> Counter:
+        self.ensure_built()
+        with self._lock:
+            documents = len(self._documents)
+            scores = Counter()
+            for term in set(tokenize(query)):
+                for field, boost in self.FIELD_BOOSTS.items():
+                    postings = self._postings[field].get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+                    average = self._total_length[field] / documents
+                    for pk, frequency in postings.items():
+                        norm = 1 - self.B + self.B * self._documents[pk][1][field] / average
+                        scores[pk] += boost * idf * frequency * (self.K1 + 1) / (frequency + self.K1 * norm)
+            return scores
+
+    def ensure_built(self) -> None:
+        if self._built:
+            return
+        path = getattr(settings, 'RECIPES_SEARCH_SNAPSHOT', None)
+        with self._lock:
+            if self._built:
+                return
+            cursor = catalog_cursor()
+            snapshot_cursor = self.load_snapshot(path) if path else None
+            if snapshot_cursor is None or snapshot_cursor < tombstone_horizon():
+                self.rebuild()
+            else:
+                self.catch_up(snapshot_cursor)
+            if path and snapshot_cursor != cursor:
+                self.save_snapshot(path, cursor)
+
+    def load_snapshot(self, path):
+        try:
+            with open(path, encoding='utf-8') as snapshot:
+                data = json.load(snapshot)
+            cursor = datetime.fromisoformat(data['cursor'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if data.get('version') != self.SNAPSHOT_VERSION:
+            return None
+
+        with self._lock:
+            self.clear()
+            for pk, fields in data['documents']:
+                self.index_document(pk, {field: Counter(frequencies) for field, frequencies in fields.items()})
+            self._built = True
+        return cursor
+
+    def save_snapshot(self, path, cursor=None) -> None:
+        cursor = cursor or catalog_cursor()
+        with self._lock:
+            data = {
+                'version': self.SNAPSHOT_VERSION,
+                'cursor': cursor.isoformat(),
+                'documents': [[pk, fields] for pk, (fields, _) in self._documents.items()],
+            }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as snapshot:
+            json.dump(data, snapshot, separators=(',', ':'))
+        os.replace(temporary, path)
+
+    def memory_usage(self) -> int:
+        return deep_sizeof(self._documents) + sum(deep_sizeof(postings) + sum(
+            deep_sizeof(documents) for documents in postings.values()) for postings in self._postings.values())
+
+
+class DuplicateIndex(RecipeIndex):
+    name = 'duplicates'
+
+    def __init__(self):
+        self._builder = None
+        super().__init__()
+
+    def clear(self) -> None:
+        self._signatures = {}
+        self._buckets = [{} for _ in band_keys(bytes(0))]
+
+    def add(self, recipe) -> None:
+        signature = bytes(recipe.signature) if recipe.signature is not None else recipe_signature(recipe)
+        if signature is None:
+            return
+        self._signatures[recipe.pk] = signature
+        for buckets, key in zip(self._buckets, band_keys(signature)):
+            members = buckets.get(key)
+            if members is None:
+                buckets[key] = recipe.pk
+            else:
+                buckets[key] = (*members, recipe.pk) if isinstance(members, tuple) else (members, recipe.pk)
+
+    def discard(self, pk) -> None:
+        signature = self._signatures.pop(pk, None)
+        if signature is None:
+            return
+        for buckets, key in zip(self._buckets, band_keys(signature)):
+            members = buckets[key]
+            if not isinstance(members, tuple):
+                del buckets[key]
+                continue
+            members = tuple(member for member in members if member != pk)
+            buckets[key] = members if len(members) > 1 else members[0]
+
+    def candidates(self, signature: bytes) -> set:
+        pks = set()
+        for buckets, key in zip(self._buckets, band_keys(signature)):
+            members = buckets.get(key)
+            if members is not None:
+                pks.update(members if isinstance(members, tuple) else (members,))
+        return pks
+
+    def similar(self, signature: bytes, threshold: float, exclude=None, limit: int = None) -> list:
+        with self._lock:
+            if signature is None or not self._built:
+                return []
+            scores = [(pk, similarity(signature, self._signatures[pk])) for pk in self.candidates(signature)
+                      if pk != exclude]
+        return sorted([(pk, score) for pk, score in scores if score >= threshold],
+                      key=lambda match: (-match[1], match[0]))[:limit]
+
+    def clusters(self, threshold: float) -> list:
+        self.ensure_built()
+        with self._lock:
+            signatures = dict(self._signatures)
+            buckets = [members for band in self._buckets for members in band.values() if isinstance(members, tuple)]
+
+        parents, best, representatives, compared = {}, {}, {}, set()
+
+        def root(pk):
+            while parents.setdefault(pk, pk) != pk:
+                parents[pk] = parents[parents[pk]]
+                pk = parents[pk]
+            return pk
+
+        def join(first, second, score):
+            parents[root(second)] = root(first)
+            best[first] = max(best.get(first, 0), score)
+            best[second] = max(best.get(second, 0), score)
+
+        for pk, signature in signatures.items():
+            representative = representatives.setdefault(signature, pk)
+            if representative != pk:
+                join(representative, pk, 1.0)
+        for members in buckets:
+            members = list(dict.fromkeys(representatives[signatures[pk]] for pk in members))
+            for position, first in enumerate(members):
+                for second in members[position + 1:]:
+                    pair = (first, second) if first < second else (second, first)
+                    if pair in compared:
+                        continue
+                    compared.add(pair)
+                    score = similarity(signatures[first], signatures[second])
+                    if score >= threshold:
+                        join(first, second, score)
+
+        groups = {}
+        for pk in parents:
+            groups.setdefault(root(pk), []).append(pk)
+        return sorted(((sorted(pks), max(best[pk] for pk in pks)) for pks in groups.values() if len(pks) > 1),
+                      key=lambda cluster: (-len(cluster[0]), cluster[0][0]))
+
+    def build_in_background(self) -> None:
+        with self._lock:
+            if self._built or (self._builder is not None and self._builder.is_alive()):
+                return
+            self._builder = threading.Thread(target=self.background_build, name='recipes-duplicate-index',
+                                             daemon=True)
+            self._builder.start()
+
+    def background_build(self) -> None:
+        try:
+            self.ensure_built()
+        except Exception:
+            logger.exception('Building the duplicate index failed')
+        finally:
+            close_old_connections()
+
+    def memory_usage(self) -> int:
+        return deep_sizeof(self._signatures) + sum(deep_sizeof(buckets) for buckets in self._buckets)
+
+
+autocomplete_index = AutocompleteIndex()
+pantry_index = PantryIndex()
+search_index = SearchIndex()
+duplicate_index = DuplicateIndex()
+
+registry = [autocomplete_index, pantry_index, search_index, duplicate_index]
@@ -0,0 +1,160 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class DurableJobStore:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, enqueued_at REAL NOT NULL)')
+
+    def add(self, key) -> None:
+        with self._lock:
+            self._connection.execute('INSERT OR IGNORE INTO jobs (key, enqueued_at) VALUES (?, ?)',
+                                     (str(key), time.time()))
+
+    def done(self, key) -> None:
+        with self._lock:
+            self._connection.execute('DELETE FROM jobs WHERE key = ?', (str(key),))
+
+    def pending(self) -> list:
+        with self._lock:
+            return [key for key, in self._connection.execute('SELECT key FROM jobs ORDER BY enqueued_at')]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class JobQueue:
+    def __init__(self, handler, workers: int = 2, max_size: int = 1000, store: DurableJobStore = None,
+                 key_type=str):
+        self._handler = handler
+        self._workers = workers
+        self._queue = queue.Queue(max_size)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._store = store
+        self._key_type = key_type
+        self.stats = {'submitted': 0, 'coalesced': 0, 'completed': 0, 'failed': 0, 'inline': 0}
+
+    def start(self) -> 'JobQueue':
+        for number in range(self._workers):
+            thread = threading.Thread(target=self._work, name=f'recipes-jobs-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self._store is not None:
+            for key in self._store.pending():
+                self.submit(self._key_type(key))
+        return self
+
+    def submit(self, key) -> None:
+        with self._lock:
+            self.stats['submitted'] += 1
+            if key in self._pending:
+                self.stats['coalesced'] += 1
+                return
+            self._pending.add(key)
+        if self._store is not None:
+            self._store.add(key)
+        try:
+            self._queue.put_nowait(key)
+        except queue.Full:
+            with self._lock:
+                self._pending.discard(key)
+                self.stats['inline'] += 1
+            self._run(key)
+
+    def _work(self) -> None:
+        while True:
+            key = self._queue.get()
+            try:
+                if key is _STOP:
+                    return
+                with self._lock:
+                    self._pending.discard(key)
+                self._run(key)
+            finally:
+                self._queue.task_done()
+                close_old_connections()
+
+    def _run(self, key) -> None:
+        try:
+            self._handler(key)
+        except Exception:
+            logger.exception('Background job for %s failed', key)
+            with self._lock:
+                self.stats['failed'] += 1
+            return
+        with self._lock:
+            self.stats['completed'] += 1
+            if self._store is not None and key not in self._pending:
+                self._store.done(key)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def drain(self) -> None:
+        self._queue.join()
+
+    def shutdown(self) -> None:
+        self.drain()
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._store is not None:
+            self._store.close()
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def forget_job_queue() -> None:
+    global _job_queue, _job_queue_lock
+    _job_queue = None
+    _job_queue_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=forget_job_queue)
+
+
+def background_settings() -> dict:
+    return getattr(settings, 'RECIPES_BACKGROUND_JOBS', {})
+
+
+def get_job_queue(handler) -> JobQueue:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            options = background_settings()
+            store = DurableJobStore(options['DURABLE_PATH']) if options.get('DURABLE_PATH') else None
+            _job_queue = JobQueue(handler, workers=options.get('WORKERS', 2), max_size=options.get('MAX_QUEUE', 1000),
+                                  store=store, key_type=int).start()
+            atexit.register(shutdown_job_queue)
+        return _job_queue
+
+
+def shutdown_job_queue() -> None:
+    global _job_queue
+    with _job_queue_lock:
+        job_queue, _job_queue = _job_queue, None
+    if job_queue is not None:
+        job_queue.shutdown()
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import math
+import random
+import ssl
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+API_PREFIX = '/api/v1/'
+LOGIN_PATH = '/api/v1/auth/login/'
+TITLES = ['Pasta al pomodoro', 'Omelette', 'Pancakes', 'Risotto', 'Apple pie', 'Carbonara', 'Bread']
+INGREDIENTS = ['Pasta', 'Tomato', 'Basil', 'Eggs', 'Milk', 'Flour', 'Butter', 'Rice', 'Apple', 'Sugar']
+SEARCH_TERMS = ['pasta', 'eggs', 'tomato sauce', 'bake', 'fresh basil']
+DEFAULT_MIX = {
+    'recipes-list': 5,
+    'recipes-detail': 25,
+    'recipes-search': 15,
+    'recipes-sort-title': 5,
+    'recipes-autocomplete': 10,
+    'personal-area-list': 10,
+    'personal-area-create': 15,
+    'personal-area-update': 10,
+    'auth-login': 5,
+}
+EXPECTED_STATUSES = {
+    'recipes-search': (200, 404),
+    'personal-area-create': (201,),
+}
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Please, choose the endpoints among: {', '.join(DEFAULT_MIX)}")
+        if not weight.strip().isdigit():
+            raise ValueError(f'Please, give {name} an integer weight')
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise ValueError('Please, give at least one endpoint a positive weight')
+    return mix
+
+
+def percentile(ordered: list, rank: float):
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+class Response:
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body or b'null')
+
+
+class HttpClient:
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.timeout = timeout
+
+    async def request(self, method: str, path: str, payload=None, token: str = None) -> Response:
+        body = json.dumps(payload).encode() if payload is not None else b''
+        headers = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Connection: close',
+                   'Accept: application/json', f'Content-Length: {len(body)}']
+        if payload is not None:
+            headers.append('Content-Type: application/json')
+        if token is not None:
+            headers.append(f'Authorization: Token {token}')
+        return await asyncio.wait_for(self.exchange('\r\n'.join(headers).encode() + b'\r\n\r\n' + body), self.timeout)
+
+    async def exchange(self, request: bytes) -> Response:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        try:
+            writer.write(request)
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = raw.partition(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        headers = {name.strip().lower(): value.strip() for name, _, value in
+                   (line.partition(':') for line in header_lines)}
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            body = dechunk(body)
+        return Response(int(status_line.split()[1]), body)
+
+
+def dechunk(body: bytes) -> bytes:
+    chunks = []
+    while body:
+        size, _, body = body.partition(b'\r\n')
+        size = int(size.split(b';')[0], 16)
+        if not size:
+            break
+        chunks.append(body[:size])
+        body = body[size + 2:]
+    return b''.join(chunks)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+
+    def record(self, endpoint: str, latency: float, status) -> None:
+        self.samples.setdefault(endpoint, []).append((latency, endpoint, status))
+        self.statuses.setdefault(endpoint, Counter())[str(status)] += 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {name: summarize(samples, self.statuses[name], elapsed) for name, samples in self.samples.items()}
+        every = [sample for samples in self.samples.values() for sample in samples]
+        return {'total': summarize(every, sum(self.statuses.values(), Counter()), elapsed),
+                'endpoints': dict(sorted(endpoints.items()))}
+
+
+def is_error(endpoint: str, status) -> bool:
+    return status not in EXPECTED_STATUSES.get(endpoint, (200,))
+
+
+def summarize(samples: list, statuses: Counter, elapsed: float) -> dict:
+    latencies = sorted(latency * 1e3 for latency, _, _ in samples)
+    errors = sum(is_error(endpoint, status) for _, endpoint, status in samples)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2) if latencies else None,
+            'p95': round(percentile(latencies, 95), 2) if latencies else None,
+            'p99': round(percentile(latencies, 99), 2) if latencies else None,
+            'max': round(latencies[-1], 2) if latencies else None,
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        },
+        'statuses': dict(sorted(statuses.items())),
+    }
+
+
+class SimulatedUser:
+    def __init__(self, client: HttpClient, recorder: Recorder, shared: dict, username: str, password: str,
+                 seed: int):
+        self.client = client
+        self.recorder = recorder
+        self.shared = shared
+        self.username = username
+        self.password = password
+        self.random = random.Random(seed)
+        self.token = None
+        self.own = []
+
+    async def call(self, endpoint: str, method: str, path: str, payload=None, token: str = None):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, payload, token)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as error:
+            self.recorder.record(endpoint, time.perf_counter() - start, type(error).__name__)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - start, response.status)
+        return response
+
+    def recipe(self) -> dict:
+        names = self.random.sample(INGREDIENTS, self.random.randint(1, 4))
+        return {'title': self.random.choice(TITLES),
+                'description': f"Mix the {', '.join(name.lower() for name in names)} and cook for "
+                               f"{self.random.randint(5, 60)} minutes.",
+                'ingredients': [{'name': name, 'quantity': self.random.randint(1, 500), 'unit': 'g'}
+                                for name in names]}
+
+    async def login(self) -> None:
+        response = await self.call('auth-login', 'POST', LOGIN_PATH,
+                                   {'username': self.username, 'password': self.password})
+        if response is not None and response.status == 200:
+            self.token = response.json().get('key')
+
+    async def create(self) -> None:
+        response = await self.call('personal-area-create', 'POST', f'{API_PREFIX}personal-area/', self.recipe(),
+                                   self.token)
+        if response is not None and response.status == 201:
+            pk = response.json()['id']
+            self.own.append(pk)
+            self.shared['recipes'].append(pk)
+
+    async def update(self) -> None:
+        if not self.own:
+            return await self.create()
+        await self.call('personal-area-update', 'PATCH', f'{API_PREFIX}personal-area/{self.random.choice(self.own)}/',
+                        {'description': self.recipe()['description']}, self.token)
+
+    async def step(self, endpoint: str) -> None:
+        if endpoint == 'auth-login':
+            await self.login()
+        elif endpoint == 'personal-area-create':
+            await self.create()
+        elif endpoint == 'personal-area-update':
+            await self.update()
+        elif endpoint == 'personal-area-list':
+            await self.call(endpoint, 'GET', f'{API_PREFIX}personal-area/', token=self.token)
+        elif endpoint == 'recipes-detail':
+            await self.call(endpoint, 'GET', f"{API_PREFIX}recipes/{self.random.choice(self.shared['recipes'])}/")
+        elif endpoint == 'recipes-search':
+            await self.call(endpoint, 'GET', f"{API_PREFIX}recipes/search/?"
+                                             f"{urlencode({'q': self.random.choice(SEARCH_TERMS)})}")
+        elif endpoint == 'recipes-autocomplete':
+            await self.call(endpoint, 'GET', f"{API_PREFIX}recipes/autocomplete/?"
+                                             f"{urlencode({'q': self.random.choice(INGREDIENTS)[:2]})}")
+        elif endpoint == 'recipes-sort-title':
+            await self.call(endpoint, 'GET', f'{API_PREFIX}recipes/sort-by-title/')
+        else:
+            await self.call(endpoint, 'GET', f'{API_PREFIX}recipes/')
+
+    async def run(self, mix: dict, deadline: float, requests: int, think_time: float) -> None:
+        await self.login()
+        await self.create()
+        names, weights = list(mix), list(mix.values())
+        done = 0
+        while time.monotonic() < deadline and (requests is None or done < requests):
+            endpoint = self.random.choices(names, weights)[0]
+            await self.step('personal-area-create' if endpoint == 'recipes-detail' and not self.shared['recipes']
+                            else endpoint)
+            done += 1
+            if think_time:
+                await asyncio.sleep(self.random.expovariate(1 / think_time))
+
+
+async def run_load_test(base_url: str, credentials: list, mix: dict, duration: float, requests: int = None,
+                        think_time: float = 0, timeout: float = 30, seed: int = 0) -> dict:
+    client = HttpClient(base_url, timeout)
+    recorder = Recorder()
+    shared = {'recipes': []}
+    users = [SimulatedUser(client, recorder, shared, username, password, seed + position)
+             for position, (username, password) in enumerate(credentials)]
+    start = time.monotonic()
+    await asyncio.gather(*(user.run(mix, start + duration, requests, think_time) for user in users))
+    elapsed = time.monotonic() - start
+    return {'target': base_url, 'users': len(users), 'duration_s': round(elapsed, 3), 'seed': seed,
+            'mix': dict(sorted(mix.items())), **recorder.report(elapsed)}
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.sharding import each_shard
+from recipes.similarity import recipe_signature
+
+
+class Command(BaseCommand):
+    help = 'Compute the MinHash duplicate-detection signatures of the stored recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Recipes updated per query')
+        parser.add_argument('--all', action='store_true', help='Recompute signatures that are already stored')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Please, sign at least one recipe per batch')
+
+        for shard in each_shard(Recipe.objects.only('pk', 'description', 'ingredients').order_by('pk')):
+            if not options['all']:
+                shard = shard.filter(signature__isnull=True)
+            start, signed, last = time.perf_counter(), 0, 0
+            while True:
+                batch = list(shard.filter(pk__gt=last)[:options['batch_size']])
+                if not batch:
+                    break
+                for recipe in batch:
+                    recipe.signature = recipe_signature(recipe)
+                Recipe.objects.using(shard.db).bulk_update(batch, ['signature'])
+                signed, last = signed + len(batch), batch[-1].pk
+            self.stdout.write(f'{shard.db}: {signed} recipes in {time.perf_counter() - start:.2f}s')
+        self.stdout.write(self.style.SUCCESS('Signatures computed; run rebuild_indexes to reload the duplicate index'))
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from recipes.jobs import background_settings
+from recipes.loadtest import DEFAULT_MIX, parse_mix, run_load_test
+
+STARTUP_TIMEOUT = 60
+COPY_ALIAS = 'loadtest'
+SETTINGS_MODULE = 'loadtest_settings'
+SETTINGS_TEMPLATE = '''from {module} import *  # noqa: F401,F403
+
+for _alias, _name in {names!r}.items():
+    DATABASES[_alias] = dict(DATABASES[_alias], NAME=_name)
+
+RECIPES_SEARCH_SNAPSHOT = {snapshot!r}
+RECIPES_BACKGROUND_JOBS = {jobs!r}
+'''
+
+
+def free_port() -> int:
+    with socket.create_server(('127.0.0.1', 0)) as listener:
+        return listener.getsockname()[1]
+
+
+def wait_for(port: int, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise CommandError(f'The local server exited with status {server.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f'The local server did not start within {STARTUP_TIMEOUT}s')
+
+
+def ensure_users(prefix: str, count: int, password: str, using: str = DEFAULT_DB_ALIAS) -> list:
+    model = get_user_model()
+    usernames = [f'{prefix}-{position}' for position in range(count)]
+    hashed = make_password(password)
+    model.objects.using(using).bulk_create([model(username=username, email=f'{username}@example.com', password=hashed)
+                                            for username in usernames], ignore_conflicts=True)
+    model.objects.using(using).filter(username__in=usernames).update(password=hashed, is_active=True)
+    return [(username, password) for username in usernames]
+
+
+def copy_databases(directory: str) -> dict:
+    names = {}
+    for alias in settings.DATABASES:
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Please, pass --url: only SQLite databases can be copied for a local server')
+        names[alias] = os.path.join(directory, f'{alias}.sqlite3')
+        connection.ensure_connection()
+        with closing(sqlite3.connect(names[alias])) as copy:
+            connection.connection.backup(copy)
+    return names
+
+
+def write_settings(directory: str, names: dict) -> None:
+    jobs = dict(background_settings())
+    if jobs.get('DURABLE_PATH'):
+        jobs['DURABLE_PATH'] = os.path.join(directory, 'jobs.sqlite3')
+    with open(os.path.join(directory, f'{SETTINGS_MODULE}.py'), 'w', encoding='utf-8') as file:
+        file.write(SETTINGS_TEMPLATE.format(module=settings.SETTINGS_MODULE, names=names, jobs=jobs,
+                                            snapshot=os.path.join(directory, 'search-index.json')))
+
+
+def ensure_users_in_copy(path: str, prefix: str, count: int, password: str) -> list:
+    connections.settings[COPY_ALIAS] = dict(connections[DEFAULT_DB_ALIAS].settings_dict, NAME=path)
+    try:
+        return ensure_users(prefix, count, password, using=COPY_ALIAS)
+    finally:
+        connections[COPY_ALIAS].close()
+        del connections[COPY_ALIAS]
+        del connections.settings[COPY_ALIAS]
+
+
+class Command(BaseCommand):
+    help = 'Drive a concurrent mix of recipe API calls and report throughput, latency and errors per endpoint as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server whose simulated users already exist, '
+                                          'by default a local one is started on a temporary copy of the databases')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Workers of the local server')
+        parser.add_argument('--users', type=int, default=50, help='Concurrent simulated users')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run for')
+        parser.add_argument('--requests', type=int, help='Stop each user after this many requests')
+        parser.add_argument('--think-time', type=float, default=0, help='Mean pause between requests in seconds')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed')
+        parser.add_argument('--mix', type=str, default=None,
+                            help=f"Weighted endpoints, default {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--user-prefix', default='loadtest', help='Usernames are <prefix>-<n>')
+        parser.add_argument('--password', default='load-test-Passw0rd')
+        parser.add_argument('--skip-user-setup', action='store_true',
+                            help='Do not create the simulated users in the copy of the local database, they must '
+                                 'already exist; implied by --url')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Please, simulate at least one user')
+        if options['duration'] <= 0:
+            raise CommandError('Please, run for a positive duration')
+        try:
+            mix = parse_mix(options['mix']) if options['mix'] else dict(DEFAULT_MIX)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        credentials = [(f"{options['user_prefix']}-{position}", options['password'])
+                       for position in range(options['users'])]
+        if options['url'] is not None:
+            report = asyncio.run(self.load_test(options['url'], credentials, mix, options))
+        else:
+            directory = tempfile.mkdtemp(prefix='recipes-loadtest-')
+            try:
+                report = self.run_local(directory, credentials, mix, options)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+            total = report['total']
+            self.stdout.write(self.style.SUCCESS(
+                f"{total['requests']} requests, {total['throughput_rps']} req/s, p99 {total['latency_ms']['p99']} ms, "
+                f"{total['error_rate']:.2%} errors; report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def run_local(self, directory: str, credentials: list, mix: dict, options: dict) -> dict:
+        names = copy_databases(directory)
+        write_settings(directory, names)
+        if not options['skip_user_setup']:
+            credentials = ensure_users_in_copy(names[DEFAULT_DB_ALIAS], options['user_prefix'], options['users'],
+                                               options['password'])
+
+        port = free_port()
+        environment = dict(os.environ, DJANGO_SETTINGS_MODULE=SETTINGS_MODULE,
+                           PYTHONPATH=os.pathsep.join(filter(None, [directory, os.environ.get('PYTHONPATH')])))
+        server = subprocess.Popen([sys.executable, str(settings.BASE_DIR / 'manage.py'), 'serve',
+                                   '--bind', f'127.0.0.1:{port}', '--workers', str(options['workers'])],
+                                  stdout=subprocess.DEVNULL, env=environment)
+        try:
+            wait_for(port, server)
+            return asyncio.run(self.load_test(f'http://127.0.0.1:{port}', credentials, mix, options))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+    def load_test(self, url: str, credentials: list, mix: dict, options: dict):
+        return run_load_test(url, credentials, mix, options['duration'], options['requests'], options['think_time'],
+                             options['timeout'], options['seed'])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.indexes import tombstone_horizon
+from recipes.models import RecipeTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete the recipe tombstones older than RECIPES_TOMBSTONES RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        horizon = tombstone_horizon()
+        pruned, _ = RecipeTombstone.objects.filter(deleted_at__lt=horizon).delete()
+        self.stdout.write(self.style.SUCCESS(f'{pruned} tombstones deleted before {horizon.isoformat()}'))
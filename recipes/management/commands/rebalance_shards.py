@@ -0,0 +1,41 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.counts import invalidate_counts
+from recipes.models import Recipe
+from recipes.sharding import mark_layout_balanced, misplaced_authors, move_author, shard_aliases, shard_for, \
+    sharding_enabled
+
+
+class Command(BaseCommand):
+    help = 'Move every recipe to the shard its author maps to in RECIPES_SHARDS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Recipes copied per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many recipes would move')
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError('Please, configure RECIPES_SHARDS before rebalancing')
+        if options['batch_size'] < 1:
+            raise CommandError('Please, move at least one recipe per batch')
+
+        moves = Counter()
+        for source in dict.fromkeys([DEFAULT_DB_ALIAS, *shard_aliases()]):
+            for author_id in misplaced_authors(source):
+                target = shard_for(author_id)
+                if options['dry_run']:
+                    moves[source, target] += Recipe.objects.using(source).filter(author_id=author_id).count()
+                else:
+                    moves[source, target] += move_author(author_id, source, target, options['batch_size'])
+        if not options['dry_run']:
+            mark_layout_balanced()
+            if moves:
+                invalidate_counts()
+
+        for (source, target), count in sorted(moves.items()):
+            self.stdout.write(f'{source} -> {target}: {count} recipes')
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {sum(moves.values())} recipes'))
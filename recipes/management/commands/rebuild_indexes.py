@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.indexes import registry, search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the in-memory recipe indexes from the database and refresh the search snapshot'
+
+    def handle(self, *args, **options):
+        for index in registry:
+            start = time.perf_counter()
+            index.rebuild()
+            report = index.memory_report()
+            self.stdout.write(f"{index.name}: {report['bytes']} bytes in {time.perf_counter() - start:.2f}s")
+
+        path = getattr(settings, 'RECIPES_SEARCH_SNAPSHOT', None)
+        if path:
+            search_index.save_snapshot(path)
+            self.stdout.write(self.style.SUCCESS(f'Search snapshot written to {path}'))
@@ -0,0 +1,43 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import get_internal_wsgi_application
+
+from recipes.server import PreforkServer
+from recipes.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Serve the API with a pre-forked pool of workers sharing a preloaded and warmed-up application'
+
+    def add_arguments(self, parser):
+        options = getattr(settings, 'RECIPES_SERVER', {})
+        parser.add_argument('--bind', default=options.get('BIND', '127.0.0.1:8000'), help='host:port to listen on')
+        parser.add_argument('--workers', type=int, default=options.get('WORKERS') or os.cpu_count())
+        parser.add_argument('--max-requests', type=int, default=options.get('MAX_REQUESTS', 1000),
+                            help='Recycle a worker after this many requests, 0 disables recycling')
+        parser.add_argument('--max-requests-jitter', type=int, default=options.get('MAX_REQUESTS_JITTER', 0))
+        parser.add_argument('--index-refresh', type=float, default=options.get('INDEX_REFRESH_SECONDS', 5),
+                            help='Seconds between catch-ups of the in-memory indexes with the other workers')
+
+    def handle(self, *args, **options):
+        host, _, port = options['bind'].rpartition(':')
+        if not host or not port.isdigit():
+            raise CommandError('Please, enter --bind as host:port')
+        if options['workers'] < 1:
+            raise CommandError('Please, run at least one worker')
+
+        application = get_internal_wsgi_application()
+        timings = warm_up()
+        self.stdout.write('Warmed up ' + ', '.join(f'{name} in {seconds:.2f}s' for name, seconds in timings.items()))
+
+        server = PreforkServer(application, host, int(port), options['workers'], options['max_requests'],
+                               options['max_requests_jitter'], options['index_refresh'])
+        server.bind()
+        self.stdout.write(self.style.SUCCESS(
+            f"Listening on http://{options['bind']} with {options['workers']} workers (master pid {os.getpid()})"))
+        self.stdout.flush()
+        server.run()
+        if server.failed:
+            raise CommandError('The workers kept crashing on startup, see the log for the cause')
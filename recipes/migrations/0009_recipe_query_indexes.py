@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:53
+
+from django.db import migrations, models
+import django.db.models.functions.text
+import recipes.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_alter_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='ingredients',
+            field=models.JSONField(default=list, validators=[recipes.validators.JSONSchemaValidator(limit_value={'description': 'The ingredients list', 'items': {'maxProperties': 3, 'properties': {'name': {'description': 'The name of the ingredient', 'error_msg': 'Please enter a valid ingredient name', 'maxLength': 30, 'minLength': 1, 'pattern': '^[a-zA-ZÀ-ú ]+$', 'type': 'string'}, 'quantity': {'description': 'The quantity of the ingredient', 'error_msg': 'Please provide a correct quantity value', 'maximum': 1000, 'minimum': 1, 'type': 'integer'}, 'unit': {'description': 'The unit of the ingredient', 'enum': ['kg', 'g', 'l', 'cl', 'ml', 'cup', 'n/a'], 'error_msg': 'Please enter a valid ingredient unit', 'type': 'string'}}, 'required': ['name', 'quantity', 'unit'], 'type': 'object'}, 'minItems': 1, 'schema': 'http://json-schema.org/draft-07/schema#', 'type': 'array'}), recipes.validators.check_not_none_and_unique_ingredients]),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', 'created_at'], name='recipe_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['created_at'], name='recipe_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='recipe_title_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:09
+
+from django.db import migrations, models
+import recipes.validation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_tombstone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='description',
+            field=models.TextField(max_length=500, validators=[recipes.validation.validate_description]),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='ingredients',
+            field=models.JSONField(default=list, validators=[recipes.validation.validate_ingredients]),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='title',
+            field=models.CharField(max_length=30, validators=[recipes.validation.validate_title]),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0013_recipe_validation_pipeline'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS "recipes_username_lower_idx" ON "auth_user" (lower("username"))',
+            reverse_sql='DROP INDEX IF EXISTS "recipes_username_lower_idx"',
+        ),
+    ]
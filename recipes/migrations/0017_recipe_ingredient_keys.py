@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:54
+
+from django.db import migrations, models
+
+
+def fill_ingredient_keys(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipes = Recipe.objects.using(schema_editor.connection.alias).only('pk', 'ingredients')
+    batch = []
+    for recipe in recipes.iterator():
+        ingredients = recipe.ingredients if isinstance(recipe.ingredients, list) else []
+        names = [ingredient.get('name') for ingredient in ingredients if isinstance(ingredient, dict)]
+        recipe.ingredient_keys = list(dict.fromkeys(name.casefold() for name in names if isinstance(name, str)))
+        batch.append(recipe)
+        if len(batch) == 1000:
+            Recipe.objects.using(schema_editor.connection.alias).bulk_update(batch, ['ingredient_keys'])
+            batch = []
+    Recipe.objects.using(schema_editor.connection.alias).bulk_update(batch, ['ingredient_keys'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_shard_move_layout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_keys',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(fill_ingredient_keys, migrations.RunPython.noop),
+    ]
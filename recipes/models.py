@@ -1,42 +1,54 @@
 from django.contrib.auth import get_user_model
-from django.core.validators import RegexValidator, MaxLengthValidator
 from django.db import models
 from django.db.models import JSONField
+from django.db.models.functions import Lower
 
-from .validators import check_not_none_and_unique_ingredients, JSONSchemaValidator
-
-INGREDIENTS_SCHEMA = {
-    "schema": "http://json-schema.org/draft-07/schema#",
-    "description": "The ingredients list",
-    "type": "array",
-    "items": {
-        "type": "object",
-        "properties": {
-            "name": {"description": "The name of the ingredient", "type": 'string', 'minLength': 1, 'maxLength': 30,
-                     'pattern': "^[a-zA-ZÀ-ú ]+$", "error_msg": "Please enter a valid ingredient name"},
-            "quantity": {"description": "The quantity of the ingredient", "type": 'integer', "minimum": 1,
-                         "maximum": 1000, "error_msg": "Please provide a correct quantity value"},
-            "unit": {"description": "The unit of the ingredient", "type": 'string',
-                     'enum': ['kg', 'g', 'l', 'cl', 'ml', 'cup', 'n/a'],
-                     "error_msg": "Please enter a valid ingredient unit"}
-        },
-        "required": ["name", "quantity", "unit"],
-        "maxProperties": 3
-    },
-    "minItems": 1
-}
+from .validation import validate_description, validate_ingredients, validate_title
 
 
 class Recipe(models.Model):
     author = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
-    title = models.CharField(max_length=30, validators=[RegexValidator(regex=r'^[a-zA-ZÀ-ú ]+$')])
-    description = models.TextField(max_length=500, validators=[MaxLengthValidator(limit_value=500),
-                                                               RegexValidator(regex=r'^[a-zA-Z0-9À-ú \'!;\.,\n]+$')])
+    title = models.CharField(max_length=30, validators=[validate_title])
+    description = models.TextField(max_length=500, validators=[validate_description])
     created_at = models.DateField(auto_now_add=True)
     updated_at = models.DateField(auto_now=True)
-    ingredients = JSONField(default=list,
-                            validators=[JSONSchemaValidator(limit_value=INGREDIENTS_SCHEMA),
-                                        check_not_none_and_unique_ingredients])
+    modified_at = models.DateTimeField(auto_now=True, db_index=True)
+    ingredients = JSONField(default=list, validators=[validate_ingredients])
+    signature = models.BinaryField(null=True)
+    ingredient_keys = models.JSONField(default=list, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'created_at'], name='recipe_author_created_idx'),
+            models.Index(fields=['created_at'], name='recipe_created_idx'),
+            models.Index(Lower('title'), name='recipe_title_lower_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeTombstone(models.Model):
+    recipe_id = models.BigIntegerField(unique=True)
+    deleted_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'{self.recipe_id} deleted at {self.deleted_at}'
+
+
+class ShardMove(models.Model):
+    author_id = models.BigIntegerField(unique=True)
+    source = models.CharField(max_length=100)
+    target = models.CharField(max_length=100)
+    started_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'author {self.author_id}: {self.source} -> {self.target}'
+
+
+class ShardLayout(models.Model):
+    aliases = JSONField(default=list)
+    balanced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.aliases} balanced at {self.balanced_at}'
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import QueryDict
+
+from .models import Recipe
+from .queries import filter_recipes
+from .sharding import AUTHOR_MOVING_MESSAGE, AuthorMoving, any_moving, each_shard, sharding_enabled
+from .signals import recipes_deleted, row_signals_suspended
+
+MAX_BULK_IDS = 1000
+DELETED = 'deleted'
+FORBIDDEN = 'forbidden'
+NOT_FOUND = 'not_found'
+
+
+def select_recipes(data) -> tuple:
+    if not isinstance(data, dict) or ('ids' in data) == ('filter' in data):
+        raise ValidationError("Please, send either a list of ids or a filter")
+
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not 0 < len(ids) <= MAX_BULK_IDS or \
+                not all(type(pk) is int and pk > 0 for pk in ids):
+            raise ValidationError(f"Please, send between 1-{MAX_BULK_IDS} recipe ids")
+        return list(dict.fromkeys(ids)), Recipe.objects.filter(pk__in=ids)
+
+    if not isinstance(data['filter'], dict) or not data['filter']:
+        raise ValidationError("Please, send a valid filter")
+    params = QueryDict(mutable=True)
+    for key, value in data['filter'].items():
+        params.setlist(key, [str(item) for item in (value if isinstance(value, list) else [value])])
+    matches = filter_recipes(Recipe.objects.all(), params).order_by('pk').values_list('pk', flat=True)
+    ids = sorted(pk for shard in each_shard(matches[:MAX_BULK_IDS + 1]) for pk in shard)
+    if len(ids) > MAX_BULK_IDS:
+        raise ValidationError(f"Sorry, the filter matches more than {MAX_BULK_IDS} recipes, please narrow it")
+    if data.get('confirm') != len(ids):
+        raise ValidationError(f"Please, confirm the deletion of the {len(ids)} matching recipes")
+    return None, Recipe.objects.filter(pk__in=ids)
+
+
+def recipe_authors(shard) -> dict:
+    if shard.db == DEFAULT_DB_ALIAS:
+        return {pk: (author, by_superuser) for pk, author, by_superuser in
+                shard.order_by('pk').values_list('pk', 'author_id', 'author__is_superuser')}
+    authors = dict(shard.order_by('pk').values_list('pk', 'author_id'))
+    superusers = set(get_user_model().objects.filter(pk__in=set(authors.values()), is_superuser=True)
+                     .values_list('pk', flat=True))
+    return {pk: (author, author in superusers) for pk, author in authors.items()}
+
+
+def bulk_delete(user, ids, queryset) -> list:
+    rows, allowed = {}, []
+    try:
+        with row_signals_suspended():
+            for shard in each_shard(queryset):
+                with transaction.atomic(using=shard.db):
+                    authors = recipe_authors(shard)
+                    deletable = [pk for pk, (_, by_superuser) in authors.items()
+                                 if user.is_superuser or not by_superuser]
+                    if deletable and sharding_enabled() and any_moving({authors[pk][0] for pk in deletable}):
+                        raise AuthorMoving(AUTHOR_MOVING_MESSAGE)
+                    if deletable:
+                        Recipe.objects.using(shard.db).filter(pk__in=deletable).only('pk', 'author_id').delete()
+                rows.update(authors)
+                allowed.extend(deletable)
+    finally:
+        if allowed:
+            recipes_deleted(allowed)
+
+    deleted = set(allowed)
+    return [{'id': pk, 'outcome': NOT_FOUND if pk not in rows else DELETED if pk in deleted else FORBIDDEN}
+            for pk in (ids if ids is not None else sorted(rows))]
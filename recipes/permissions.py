@@ -11,11 +11,16 @@ method2permit = {
 methodForbiddenModerator = ['POST', 'PUT', 'PATCH']
 
 
+def is_moderator(user) -> bool:
+    if not hasattr(user, '_is_recipe_moderator'):
+        user._is_recipe_moderator = user.groups.filter(name='recipe_moderators').exists()
+    return user._is_recipe_moderator
+
+
 class IsModeratorOrAdmin(permissions.BasePermission):
 
     def has_permission(self, request, view):
-        if request.method in methodForbiddenModerator and request.user.groups.filter(name='recipe_moderators').exists()\
-                and not request.user.is_superuser:
+        if request.method in methodForbiddenModerator and is_moderator(request.user) and not request.user.is_superuser:
             return False
         return True
 
@@ -23,6 +28,6 @@ class IsModeratorOrAdmin(permissions.BasePermission):
         if request.method == 'DELETE':
             if request.user.is_superuser:
                 return True
-            elif request.user.groups.filter(name='recipe_moderators').exists():
+            elif is_moderator(request.user):
                 return not obj.author.is_superuser
         return request.method in method2permit
@@ -0,0 +1,151 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAMETER = 'profile'
+SLOWEST_QUERIES = 10
+
+
+def profiling_settings() -> dict:
+    return getattr(settings, 'RECIPES_PROFILING', {})
+
+
+def requesting_user(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        authenticated = TokenAuthentication().authenticate(Request(request))
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+class QueryTimer:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - start, context['connection'].alias, sql))
+
+    def total(self) -> float:
+        return sum(duration for duration, _, _ in self.queries)
+
+    def report(self) -> str:
+        lines = [f'{len(self.queries)} queries, {self.total() * 1e3:.1f} ms']
+        for duration, alias, sql in sorted(self.queries, key=lambda query: query[0], reverse=True)[:SLOWEST_QUERIES]:
+            lines.append(f'{duration * 1e3:9.2f} ms  [{alias}]  {sql}')
+        return '\n'.join(lines)
+
+
+class CallProfiler:
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+
+    def report(self) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=output).sort_stats('cumulative')
+        stats.print_stats(self.rows)
+        stats.print_callees(self.rows)
+        return output.getvalue()
+
+    def save(self, path: str) -> None:
+        self.profiler.dump_stats(f'{path}.prof')
+
+
+class SampleProfiler:
+    def __init__(self, interval: float):
+        self.profiler = SamplingProfiler(interval=interval)
+
+    def __enter__(self):
+        self.profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.stop()
+
+    def report(self) -> str:
+        return self.profiler.output_text(unicode=True, show_all=False)
+
+    def save(self, path: str) -> None:
+        with open(f'{path}.html', 'w', encoding='utf-8') as report:
+            report.write(self.profiler.output_html())
+
+
+def make_profiler(options: dict):
+    if options.get('SAMPLING', True) and SamplingProfiler is not None:
+        return SampleProfiler(options.get('INTERVAL', 0.001))
+    return CallProfiler(options.get('ROWS', 40))
+
+
+def report_name(request) -> str:
+    slug = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-') or 'root'
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}-{request.method.lower()}-{slug[:80]}"
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if PROFILE_HEADER not in request.META and PROFILE_PARAMETER not in request.GET:
+            return self.get_response(request)
+        user = requesting_user(request)
+        if user is None or not user.is_superuser:
+            return self.get_response(request)
+        return self.profile(request)
+
+    def profile(self, request):
+        options = profiling_settings()
+        timer = QueryTimer()
+        profiler = make_profiler(options)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            with profiler:
+                response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        directory = options.get('DIRECTORY', 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        name = report_name(request)
+        path = os.path.join(directory, name)
+        with open(f'{path}.txt', 'w', encoding='utf-8') as report:
+            report.write(f'{request.method} {request.get_full_path()} -> {response.status_code} '
+                         f'in {elapsed * 1e3:.1f} ms\n\nSQL\n{timer.report()}\n\nCalls\n{profiler.report()}')
+        profiler.save(path)
+
+        response['Server-Timing'] = f'total;dur={elapsed * 1e3:.1f}, ' \
+                                    f'sql;dur={timer.total() * 1e3:.1f};desc="{len(timer.queries)} queries"'
+        response['X-Profile-Report'] = name
+        return response
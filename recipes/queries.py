@@ -0,0 +1,134 @@
+import re
+from datetime import date, datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, F
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.utils import timezone as django_timezone
+from django.utils.dateparse import parse_datetime
+
+from .domain import Name, Title
+from .indexes import CATCH_UP_OVERLAP
+from .models import Recipe, RecipeTombstone
+from .sharding import fan_out, for_authors, sharding_enabled
+
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9@.+\-_]+$')
+
+SORT_KEYS = {
+    'title': (Lower('title').asc(), 'pk'),
+    '-title': (Lower('title').desc(), '-pk'),
+    'created_at': ('created_at', 'pk'),
+    '-created_at': ('-created_at', '-pk'),
+}
+
+
+def is_valid_username(name: str) -> bool:
+    return len(name) <= 150 and USERNAME_PATTERN.match(name) is not None
+
+
+def prefix_range(key: str) -> dict:
+    return {'gte': key, 'lt': key[:-1] + chr(ord(key[-1]) + 1)}
+
+
+def authors_with_prefix(key: str):
+    bounds = {f'username_key__{lookup}': value for lookup, value in prefix_range(key).items()}
+    return get_user_model().objects.alias(username_key=Lower('username')).filter(**bounds).values('pk')
+
+
+def authors_named(key: str):
+    return get_user_model().objects.alias(username_key=Lower('username')).filter(username_key=key).values('pk')
+
+
+def on_author_shards(queryset, authors):
+    return for_authors(queryset, [author['pk'] for author in authors])
+
+
+def filter_by_author(queryset, name: str, prefix: bool = False):
+    key = name.lower()
+    if sharding_enabled():
+        return on_author_shards(queryset, authors_with_prefix(key) if prefix else authors_named(key))
+    if prefix:
+        return queryset.filter(author__in=authors_with_prefix(key))
+    return queryset.alias(author_key=Lower('author__username')).filter(author_key=key)
+
+
+def ingredient_keys(ingredients) -> list:
+    names = [ingredient.get('name') for ingredient in ingredients if isinstance(ingredient, dict)] \
+        if isinstance(ingredients, list) else []
+    return list(dict.fromkeys(name.casefold() for name in names if isinstance(name, str)))
+
+
+def has_ingredient(name: Name):
+    return RawSQL(f'EXISTS (SELECT 1 FROM json_each("{Recipe._meta.db_table}"."ingredient_keys") '
+                  f'WHERE json_each.value = %s)', (name.value.casefold(),), output_field=BooleanField())
+
+
+def parse_date(value: str, parameter: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError(f"Please, enter {parameter} as YYYY-MM-DD")
+
+
+def filter_recipes(queryset, params):
+    author = params.get('author')
+    if author is not None:
+        if not is_valid_username(author):
+            raise ValidationError("Please, enter a valid user")
+        queryset = filter_by_author(queryset, author)
+
+    title = params.get('title')
+    if title is not None:
+        queryset = queryset.filter(title__icontains=Title(title).value)
+
+    for ingredient in params.getlist('ingredient'):
+        queryset = queryset.filter(has_ingredient(Name(ingredient.lower())))
+
+    if 'created_from' in params:
+        queryset = queryset.filter(created_at__gte=parse_date(params['created_from'], 'created_from'))
+    if 'created_to' in params:
+        queryset = queryset.filter(created_at__lte=parse_date(params['created_to'], 'created_to'))
+
+    sort = params.get('sort', 'created_at')
+    if sort not in SORT_KEYS:
+        raise ValidationError(f"Please, sort by one of this: {list(SORT_KEYS)}")
+    return queryset.order_by(*SORT_KEYS[sort])
+
+
+def parse_cursor(value):
+    if value is None:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    try:
+        cursor = parse_datetime(value)
+    except ValueError:
+        cursor = None
+    if cursor is None:
+        raise ValidationError("Please, enter since as an ISO 8601 timestamp")
+    return cursor if django_timezone.is_aware(cursor) else django_timezone.make_aware(cursor, timezone.utc)
+
+
+def merge_events(*sources) -> list:
+    events = sorted([event for source in sources for event in source], key=lambda event: event.cursor)
+    return list({(type(event), event.pk, event.cursor): event for event in events}.values())
+
+
+def changes_since(queryset, since: datetime, limit: int) -> tuple:
+    changed = queryset.filter(modified_at__gt=since).annotate(cursor=F('modified_at')).order_by('modified_at', 'pk')
+    deleted = RecipeTombstone.objects.filter(deleted_at__gt=since).annotate(cursor=F('deleted_at')).order_by(
+        'deleted_at', 'recipe_id')
+    events = merge_events(fan_out(changed, limit + 1), deleted[:limit + 1])
+
+    has_more = len(events) > limit
+    if has_more:
+        boundary = events[limit].cursor
+        events = [event for event in events[:limit] if event.cursor < boundary]
+        if not events:
+            events = merge_events(fan_out(changed.filter(modified_at=boundary)), deleted.filter(deleted_at=boundary))
+
+    cursor = events[-1].cursor if events else since
+    if not has_more:
+        cursor = min(cursor, django_timezone.now() - CATCH_UP_OVERLAP)
+    return ([event for event in events if isinstance(event, Recipe)],
+            [event.recipe_id for event in events if isinstance(event, RecipeTombstone)], cursor, has_more)
@@ -1,21 +1,53 @@
 from rest_framework import serializers
 
 from recipes.models import Recipe
+from recipes.validation import recipe_errors
 
+PIPELINE_VALIDATED_FIELDS = {
+    'title': {'validators': [], 'max_length': None},
+    'description': {'validators': [], 'max_length': None},
+    'ingredients': {'validators': []},
+}
 
-class UserRecipeSerializer(serializers.ModelSerializer):
+
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_columns(self):
+        return [field.source.replace('.', '__') for field in self.fields.values()]
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.CharField(source='author.username', read_only=True)
 
+    def validate(self, attrs):
+        errors = recipe_errors(attrs, partial=self.partial)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        recipe = Recipe(**validated_data)
+        recipe.save()
+        return recipe
+
+
+class UserRecipeSerializer(RecipeSerializer):
     class Meta:
         fields = ('id', 'author', 'title', 'description', 'created_at', 'ingredients')
         model = Recipe
         read_only_fields = ['author']
+        extra_kwargs = PIPELINE_VALIDATED_FIELDS
 
 
-class AdminModeratorRecipeSerializer(serializers.ModelSerializer):
-    author = serializers.CharField(source='author.username', read_only=True)
-
+class AdminModeratorRecipeSerializer(RecipeSerializer):
     class Meta:
         fields = ('id', 'author', 'title', 'description', 'created_at', 'updated_at', 'ingredients')
         model = Recipe
         read_only_fields = ['author']
+        extra_kwargs = PIPELINE_VALIDATED_FIELDS
@@ -0,0 +1,137 @@
+import itertools
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.db import connections
+
+from .warmup import IndexSync, warm_connections
+
+logger = logging.getLogger(__name__)
+
+QUICK_EXIT = 1.0
+MAX_QUICK_FAILURES = 5
+RESPAWN_BACKOFF = 0.1
+MAX_RESPAWN_BACKOFF = 5.0
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+
+class WorkerServer(WSGIServer):
+    def __init__(self, listener: socket.socket, application):
+        host, port = listener.getsockname()[:2]
+        super().__init__((host, port), QuietRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        self.server_name = socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+        self.set_app(application)
+        self.handled = False
+
+    def process_request(self, request, client_address):
+        self.handled = True
+        super().process_request(request, client_address)
+
+
+class PreforkServer:
+    def __init__(self, application, host: str, port: int, workers: int, max_requests: int = 1000,
+                 max_requests_jitter: int = 0, index_refresh: float = 5):
+        self.application = application
+        self.address = (host, port)
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.index_refresh = index_refresh
+        self.children = {}
+        self.stopping = False
+        self.quick_failures = 0
+        self.failed = False
+        self.listener = None
+
+    def bind(self) -> socket.socket:
+        self.listener = socket.create_server(self.address, backlog=1024)
+        return self.listener
+
+    def run(self) -> None:
+        if self.listener is None:
+            self.bind()
+        connections.close_all()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if self.stopping:
+                continue
+            exit_code = os.waitstatus_to_exitcode(status)
+            if exit_code:
+                logger.warning('Worker %s exited with status %s', pid, exit_code)
+            if exit_code and started is not None and time.monotonic() - started < QUICK_EXIT:
+                self.quick_failures += 1
+            else:
+                self.quick_failures = 0
+            if self.quick_failures >= MAX_QUICK_FAILURES:
+                logger.error('Workers crashed on startup %s times in a row, shutting down', self.quick_failures)
+                self.failed = True
+                self.stop(None, None)
+                continue
+            if self.quick_failures:
+                time.sleep(min(RESPAWN_BACKOFF * 2 ** (self.quick_failures - 1), MAX_RESPAWN_BACKOFF))
+                if self.stopping:
+                    continue
+            self.spawn()
+        self.listener.close()
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            self.work()
+        except BaseException:
+            logger.exception('Worker %s crashed', os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def requests_budget(self):
+        if not self.max_requests:
+            return itertools.count()
+        return range(self.max_requests + random.randint(0, self.max_requests_jitter))
+
+    def work(self) -> None:
+        warm_connections()
+        self.listener.setblocking(False)
+        server = WorkerServer(self.listener, self.application)
+        server.timeout = self.index_refresh or None
+        index_sync = IndexSync(self.index_refresh)
+        for _ in self.requests_budget():
+            server.handled = False
+            while not server.handled:
+                index_sync.poll()
+                server.handle_request()
+        connections.close_all()
@@ -0,0 +1,274 @@
+import heapq
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, DateTimeField, F, Value, When, prefetch_related_objects
+from django.db.models.expressions import OrderBy
+
+SHARD_KEY = 'shard_key_{}'
+ID_BLOCK_SIZE = 1000
+LAYOUT_ID = 1
+
+_balanced_layouts = set()
+
+
+AUTHOR_MOVING_MESSAGE = "Sorry, the recipes of this author are being moved, please retry in a moment"
+
+
+class AuthorMoving(Exception):
+    pass
+
+
+def sharding_enabled() -> bool:
+    return bool(getattr(settings, 'RECIPES_SHARDS', None))
+
+
+def shard_aliases() -> list:
+    return list(getattr(settings, 'RECIPES_SHARDS', None) or [DEFAULT_DB_ALIAS])
+
+
+def shard_for(author_id) -> str:
+    aliases = shard_aliases()
+    return aliases[author_id % len(aliases)]
+
+
+def layout_balanced() -> bool:
+    from .models import ShardLayout
+
+    aliases = tuple(shard_aliases())
+    if aliases not in _balanced_layouts:
+        layout = ShardLayout.objects.filter(pk=LAYOUT_ID).values_list('aliases', flat=True).first()
+        if layout is None or tuple(layout) != aliases:
+            return False
+        _balanced_layouts.add(aliases)
+    return True
+
+
+def mark_layout_balanced() -> None:
+    from .models import ShardLayout
+
+    ShardLayout.objects.update_or_create(pk=LAYOUT_ID, defaults={'aliases': shard_aliases()})
+    _balanced_layouts.add(tuple(shard_aliases()))
+
+
+def forget_shard_layouts() -> None:
+    _balanced_layouts.clear()
+
+
+def recipe_aliases() -> list:
+    if not sharding_enabled() or layout_balanced():
+        return shard_aliases()
+    return list(dict.fromkeys([DEFAULT_DB_ALIAS, *shard_aliases()]))
+
+
+def is_moving(author_id) -> bool:
+    return any_moving([author_id])
+
+
+def any_moving(author_ids) -> bool:
+    from .models import ShardMove
+
+    return ShardMove.objects.filter(author_id__in=author_ids).exists()
+
+
+def is_recipe(model) -> bool:
+    return model._meta.label == 'recipes.Recipe'
+
+
+class RecipeShardRouter:
+    def db_for_read(self, model, **hints):
+        return self.route(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self.route(model, hints.get('instance'))
+
+    def route(self, model, instance):
+        if not sharding_enabled():
+            return None
+        if not is_recipe(model):
+            return DEFAULT_DB_ALIAS
+        if instance is None or not is_recipe(instance.__class__):
+            return None
+        if instance._state.db in shard_aliases():
+            return instance._state.db
+        return shard_for(instance.author_id) if instance.author_id is not None else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True if sharding_enabled() else None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS or db not in shard_aliases():
+            return None
+        return app_label == 'recipes' and model_name == 'recipe'
+
+
+class RecipeIdAllocator:
+    def __init__(self, block_size: int = ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self._next, self._end = 0, 0
+
+    def reserve(self) -> int:
+        from .models import Recipe
+
+        table = Recipe._meta.db_table
+        with transaction.atomic(using=DEFAULT_DB_ALIAS), connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute('UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s', [self.block_size, table])
+            if not cursor.rowcount:
+                cursor.execute(f'INSERT INTO sqlite_sequence (name, seq) SELECT %s, COALESCE(MAX(id), 0) + %s '
+                               f'FROM {connections[DEFAULT_DB_ALIAS].ops.quote_name(table)}',
+                               [table, self.block_size])
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+            return cursor.fetchone()[0]
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next >= self._end:
+                self._end = self.reserve() + 1
+                self._next = self._end - self.block_size
+            self._next += 1
+            return self._next - 1
+
+
+recipe_ids = RecipeIdAllocator()
+os.register_at_fork(after_in_child=recipe_ids.reset)
+
+
+def configure_shard_connection(sender, connection, **kwargs) -> None:
+    if connection.alias == DEFAULT_DB_ALIAS or connection.alias not in shard_aliases() or connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA foreign_keys = OFF')
+        cursor.execute('PRAGMA journal_mode = WAL')
+
+
+def pinned_aliases(queryset) -> list:
+    return [queryset._db] if queryset._db is not None else recipe_aliases()
+
+
+def each_shard(queryset):
+    for alias in pinned_aliases(queryset):
+        yield queryset.using(alias)
+
+
+def sort_keys(queryset) -> tuple:
+    expressions, directions = {}, []
+    for position, item in enumerate(queryset.query.order_by):
+        if isinstance(item, str):
+            expression, descending = F(item.lstrip('-')), item.startswith('-')
+        elif isinstance(item, OrderBy):
+            expression, descending = item.expression, item.descending
+        else:
+            expression, descending = item, False
+        expressions[SHARD_KEY.format(position)] = expression
+        directions.append(descending)
+    return expressions, directions
+
+
+def merge_sorted(results: list, names: list, directions: list) -> list:
+    if len(set(directions)) == 1:
+        return list(heapq.merge(*results, key=attrgetter(*names), reverse=directions[0]))
+    rows = list(chain.from_iterable(results))
+    for name, descending in reversed(list(zip(names, directions))):
+        rows.sort(key=attrgetter(name), reverse=descending)
+    return rows
+
+
+def fetch(queryset, limit, threaded: bool) -> list:
+    try:
+        return list(queryset if limit is None else queryset[:limit])
+    finally:
+        if threaded:
+            connections[queryset.db].close()
+
+
+def fan_out(queryset, limit: int = None) -> list:
+    aliases = pinned_aliases(queryset)
+    if len(aliases) == 1:
+        return fetch(queryset.using(aliases[0]), limit, False)
+
+    lookups = queryset._prefetch_related_lookups
+    if not queryset.ordered:
+        queryset = queryset.order_by('pk')
+    expressions, directions = sort_keys(queryset)
+    queryset = queryset.prefetch_related(None).annotate(**expressions)
+    with ThreadPoolExecutor(max_workers=len(aliases)) as pool:
+        futures = {alias: pool.submit(fetch, queryset.using(alias), limit, True)
+                   for alias in aliases if alias != DEFAULT_DB_ALIAS}
+        results = [futures[alias].result() if alias in futures else fetch(queryset.using(alias), limit, False)
+                   for alias in aliases]
+
+    seen = set()
+    rows = [row for row in merge_sorted(results, list(expressions), directions)
+            if row.pk not in seen and not seen.add(row.pk)]
+    rows = rows if limit is None else rows[:limit]
+    if lookups:
+        prefetch_related_objects(rows, *lookups)
+    return rows
+
+
+def find(queryset):
+    for shard in each_shard(queryset):
+        instance = shard.first()
+        if instance is not None:
+            return instance
+    return None
+
+
+def for_author(queryset, author_id):
+    return queryset.using(shard_for(author_id)) if sharding_enabled() and layout_balanced() else queryset
+
+
+def for_authors(queryset, author_ids: list):
+    queryset = queryset.filter(author_id__in=author_ids)
+    aliases = {shard_for(author_id) for author_id in author_ids}
+    return queryset.using(aliases.pop()) if len(aliases) == 1 and layout_balanced() else queryset
+
+
+def with_authors(queryset):
+    return queryset.prefetch_related('author') if sharding_enabled() else queryset.select_related('author')
+
+
+def misplaced_authors(alias: str) -> list:
+    from .models import Recipe
+
+    authors = Recipe.objects.using(alias).order_by('author_id').values_list('author_id', flat=True).distinct()
+    return [author_id for author_id in authors if shard_for(author_id) != alias]
+
+
+def move_author(author_id, source: str, target: str, batch_size: int) -> int:
+    from .models import Recipe, ShardMove
+
+    fields = Recipe._meta.concrete_fields
+    position = fields.index(Recipe._meta.pk)
+    version = fields.index(Recipe._meta.get_field('modified_at'))
+    connection = connections[target]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    sql = f'INSERT OR REPLACE INTO {connection.ops.quote_name(Recipe._meta.db_table)} ({columns}) ' \
+          f'VALUES ({", ".join(["%s"] * len(fields))})'
+    rows = Recipe.objects.using(source).filter(author_id=author_id).order_by('pk').values_list(
+        *(field.attname for field in fields))
+
+    ShardMove.objects.update_or_create(author_id=author_id, defaults={'source': source, 'target': target})
+    moved = 0
+    while True:
+        batch = list(rows[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic(using=target), connection.cursor() as cursor:
+            cursor.executemany(sql, [[field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+                                     for row in batch])
+        copied = Case(*[When(pk=row[position], then=Value(row[version], output_field=DateTimeField()))
+                        for row in batch])
+        moved += Recipe.objects.using(source).filter(pk__in=[row[position] for row in batch],
+                                                     modified_at=copied)._raw_delete(source)
+    ShardMove.objects.filter(author_id=author_id).delete()
+    return moved
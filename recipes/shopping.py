@@ -0,0 +1,81 @@
+from django.core.exceptions import ValidationError
+
+from .domain import Unit
+from .models import Recipe
+from .sharding import each_shard
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAX_RECIPES = 500
+MAX_SERVINGS = 100
+LARGER_UNITS = {'g': 'kg', 'ml': 'l'}
+
+
+def parse_items(values: list) -> dict:
+    items = {}
+    for value in (item for raw in values for item in raw.split(',')):
+        pk, _, servings = value.strip().partition(':')
+        try:
+            pk, servings = int(pk), float(servings or 1)
+        except ValueError:
+            raise ValidationError("Please, enter the recipes as <id> or <id>:<servings>")
+        if pk <= 0 or not 1 <= servings <= MAX_SERVINGS:
+            raise ValidationError(f"Please, enter a recipe id and servings between 1-{MAX_SERVINGS}")
+        items[pk] = items.get(pk, 0) + servings
+    if not 0 < len(items) <= MAX_RECIPES:
+        raise ValidationError(f"Please, choose between 1-{MAX_RECIPES} recipes")
+    return items
+
+
+def flatten(rows, servings: dict):
+    groups, names, group_ids, amounts, factors = {}, [], [], [], []
+    for pk, ingredients in rows:
+        for ingredient in ingredients:
+            unit = Unit.of(ingredient['unit'])
+            key = (ingredient['name'].casefold(), unit.base().value)
+            if key not in groups:
+                groups[key] = len(groups)
+                names.append(ingredient['name'])
+            group_ids.append(groups[key])
+            amounts.append(ingredient['quantity'] * servings[pk])
+            factors.append(unit.to_base(1))
+    return list(groups), names, group_ids, amounts, factors
+
+
+def sum_by_group(size: int, group_ids: list, amounts: list, factors: list) -> list:
+    if numpy is not None:
+        weights = numpy.asarray(amounts, dtype=float) * numpy.asarray(factors, dtype=float)
+        return numpy.bincount(numpy.asarray(group_ids, dtype=numpy.intp), weights=weights, minlength=size).tolist()
+
+    totals = [0.0] * size
+    for group, amount, factor in zip(group_ids, amounts, factors):
+        totals[group] += amount * factor
+    return totals
+
+
+def normalize(total: float, unit: str) -> tuple:
+    if unit in LARGER_UNITS:
+        larger = Unit.of(LARGER_UNITS[unit])
+        factor = larger.to_base(1)
+        if total >= factor:
+            unit, total = larger.value, total / factor
+    return round(total, 3), unit
+
+
+def shopping_list(servings: dict) -> dict:
+    rows = [row for shard in each_shard(Recipe.objects.filter(pk__in=servings).values_list('pk', 'ingredients'))
+            for row in shard]
+    missing = sorted(set(servings) - {pk for pk, _ in rows})
+    if missing:
+        raise Recipe.DoesNotExist(f"Sorry, cannot find the recipes {missing}")
+
+    keys, names, group_ids, amounts, factors = flatten(rows, servings)
+    totals = sum_by_group(len(keys), group_ids, amounts, factors)
+    items = []
+    for (_, base), name, total in sorted(zip(keys, names, totals)):
+        quantity, unit = normalize(total, base)
+        items.append({'name': name, 'quantity': quantity, 'unit': unit})
+    return {'recipes': sorted(servings), 'ingredients': items}
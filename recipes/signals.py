@@ -0,0 +1,124 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counts import invalidate_counts
+from .domain_cache import domain_recipes
+from .indexes import INDEXED_FIELDS, registry
+from .jobs import background_settings, get_job_queue
+from .models import Recipe, RecipeTombstone
+from .queries import ingredient_keys
+from .sharding import AUTHOR_MOVING_MESSAGE, AuthorMoving, find, is_moving, recipe_ids, shard_aliases, \
+    sharding_enabled
+from .similarity import recipe_signature
+
+
+def refresh_indexes(pk) -> None:
+    recipe = find(Recipe.objects.filter(pk=pk).only(*INDEXED_FIELDS))
+    for index in registry:
+        if recipe is None:
+            index.remove(pk)
+        else:
+            index.update(recipe)
+
+
+_row_signals = threading.local()
+
+
+@contextmanager
+def row_signals_suspended():
+    _row_signals.suspended = True
+    try:
+        yield
+    finally:
+        _row_signals.suspended = False
+
+
+def row_signals_active() -> bool:
+    return not getattr(_row_signals, 'suspended', False)
+
+
+def schedule_index_refresh(pks: list) -> None:
+    def submit():
+        job_queue = get_job_queue(refresh_indexes)
+        for pk in pks:
+            job_queue.submit(pk)
+
+    transaction.on_commit(submit)
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_delete, sender=Recipe)
+def check_author_not_moving(sender, instance, **kwargs):
+    if row_signals_active() and sharding_enabled() and is_moving(instance.author_id):
+        raise AuthorMoving(AUTHOR_MOVING_MESSAGE)
+
+
+@receiver(pre_save, sender=Recipe)
+def assign_recipe_id(sender, instance, **kwargs):
+    if instance.pk is None and sharding_enabled():
+        instance.pk = recipe_ids.allocate()
+
+
+@receiver(pre_save, sender=Recipe)
+def assign_signature(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None:
+        instance.signature = recipe_signature(instance)
+
+
+@receiver(pre_save, sender=Recipe)
+def assign_ingredient_keys(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None:
+        instance.ingredient_keys = ingredient_keys(instance.ingredients)
+
+
+@receiver(post_save, sender=Recipe)
+def update_indexes(sender, instance, **kwargs):
+    if background_settings().get('ENABLED'):
+        schedule_index_refresh([instance.pk])
+        return
+    for index in registry:
+        index.update(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe_counts(sender, instance, **kwargs):
+    invalidate_counts()
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_domain_recipe(sender, instance, **kwargs):
+    domain_recipes.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_sharded_recipes(sender, instance, **kwargs):
+    for alias in shard_aliases():
+        if alias != DEFAULT_DB_ALIAS:
+            Recipe.objects.using(alias).filter(author_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_indexes(sender, instance, **kwargs):
+    if row_signals_active():
+        recipes_deleted([instance.pk])
+
+
+def recipes_deleted(pks: list) -> None:
+    RecipeTombstone.objects.bulk_create([RecipeTombstone(recipe_id=pk, deleted_at=timezone.now()) for pk in pks],
+                                        update_conflicts=True, unique_fields=['recipe_id'],
+                                        update_fields=['deleted_at'])
+    invalidate_counts()
+    for pk in pks:
+        domain_recipes.invalidate(pk)
+    if background_settings().get('ENABLED'):
+        schedule_index_refresh(pks)
+        return
+    for index in registry:
+        for pk in pks:
+            index.remove(pk)
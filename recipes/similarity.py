@@ -0,0 +1,59 @@
+import random
+import re
+from array import array
+from hashlib import blake2b
+from operator import eq
+
+SIGNATURE_SIZE = 128
+BANDS = 32
+SHINGLE_SIZE = 3
+BIN_BITS = 7
+VALUE_BITS = 32
+EMPTY = 1 << 32
+WORD_PATTERN = re.compile(r'[^\W_]+')
+DONORS = [random.Random(position).sample(range(SIGNATURE_SIZE), SIGNATURE_SIZE) for position in range(SIGNATURE_SIZE)]
+DONOR_RANKS = [[donors.index(position) for position in range(SIGNATURE_SIZE)] for donors in DONORS]
+
+
+def recipe_features(description, ingredients) -> set:
+    features = set()
+    for ingredient in ingredients if isinstance(ingredients, list) else []:
+        if isinstance(ingredient, dict) and isinstance(ingredient.get('name'), str):
+            features.add(f"i:{ingredient['name'].casefold().strip()}")
+    words = WORD_PATTERN.findall(description.casefold()) if isinstance(description, str) else []
+    for start in range(max(len(words) - SHINGLE_SIZE + 1, 1 if words else 0)):
+        features.add(f"d:{' '.join(words[start:start + SHINGLE_SIZE])}")
+    return features
+
+
+def minhash(features) -> bytes:
+    bins = [EMPTY] * SIGNATURE_SIZE
+    for feature in features:
+        value = int.from_bytes(blake2b(feature.encode(), digest_size=8).digest(), 'little')
+        position, value = value & (SIGNATURE_SIZE - 1), (value >> BIN_BITS) & ((1 << VALUE_BITS) - 1)
+        if value < bins[position]:
+            bins[position] = value
+    filled = [position for position, value in enumerate(bins) if value != EMPTY]
+    if not filled:
+        return None
+    return array('I', [value if value != EMPTY else bins[donor(bins, filled, position)]
+                       for position, value in enumerate(bins)]).tobytes()
+
+
+def donor(bins: list, filled: list, position: int) -> int:
+    if len(filled) ** 2 < SIGNATURE_SIZE:
+        return min(filled, key=DONOR_RANKS[position].__getitem__)
+    return next(candidate for candidate in DONORS[position] if bins[candidate] != EMPTY)
+
+
+def recipe_signature(recipe) -> bytes:
+    return minhash(recipe_features(recipe.description, recipe.ingredients))
+
+
+def band_keys(signature: bytes) -> list:
+    width = len(signature) // BANDS
+    return [hash(signature[band * width:(band + 1) * width]) for band in range(BANDS)]
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    return sum(map(eq, array('I', first), array('I', second))) / SIGNATURE_SIZE
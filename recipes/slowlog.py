@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from rest_framework.views import APIView
+
+logger = logging.getLogger('recipes.slow_queries')
+
+SAFE_PARAMETER_TYPES = (bool, int, float, type(None))
+REDACTED = '<redacted>'
+
+
+def slow_query_settings() -> dict:
+    return getattr(settings, 'RECIPES_SLOW_QUERIES', {})
+
+
+def redact(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: redact_value(value) for name, value in params.items()}
+    return [redact(row) if isinstance(row, (list, tuple, dict)) else redact_value(row) for row in params]
+
+
+def redact_value(value):
+    return value if isinstance(value, SAFE_PARAMETER_TYPES) else REDACTED
+
+
+def project_frames(root: str, depth: int) -> tuple:
+    view, frames = None, []
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        instance = frame.f_locals.get('self')
+        if view is None and issubclass(type(instance), APIView):
+            view = f'{type(instance).__name__}.{code.co_name}'
+        if code.co_filename.startswith(root) and 'site-packages' not in code.co_filename and \
+                code.co_filename != __file__ and len(frames) < depth:
+            frames.append(f'{os.path.relpath(code.co_filename, root)}:{frame.f_lineno} in {code.co_name}')
+        frame = frame.f_back
+    return view, frames
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, buffer_size: int = 500, stack_depth: int = 8, root: str = None):
+        self.threshold = threshold_ms / 1e3
+        self.stack_depth = stack_depth
+        self.root = str(root or settings.BASE_DIR)
+        self._entries = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.record(duration, sql, params, many, context['connection'].alias)
+
+    def record(self, duration: float, sql: str, params, many: bool, alias: str) -> None:
+        view, stack = project_frames(self.root, self.stack_depth)
+        entry = {
+            'at': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(duration * 1e3, 3),
+            'database': alias,
+            'sql': sql,
+            'params': redact(params),
+            'many': many,
+            'view': view,
+            'stack': stack,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(json.dumps(entry, default=str))
+
+    def entries(self, limit: int = None) -> list:
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries if limit is None else entries[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def install(self, sender, connection, **kwargs) -> None:
+        if connection.alias == 'default' and self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+slow_query_log = None
+_install_lock = threading.Lock()
+
+
+def configure_logger(path, max_bytes: int, backup_count: int) -> None:
+    path = os.path.abspath(path)
+    if any(isinstance(handler, RotatingFileHandler) and handler.baseFilename == path for handler in logger.handlers):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+
+
+def install_slow_query_log() -> SlowQueryLog:
+    global slow_query_log
+    with _install_lock:
+        if slow_query_log is not None:
+            return slow_query_log
+        options = slow_query_settings()
+        if options.get('LOG_PATH'):
+            configure_logger(options['LOG_PATH'], options.get('MAX_BYTES', 10 * 1024 * 1024),
+                             options.get('BACKUP_COUNT', 5))
+        slow_query_log = SlowQueryLog(options.get('THRESHOLD_MS', 100), options.get('BUFFER_SIZE', 500),
+                                      options.get('STACK_DEPTH', 8))
+        connection_created.connect(slow_query_log.install, dispatch_uid='recipes.slow_query_log')
+        return slow_query_log
@@ -0,0 +1,44 @@
+import functools
+import inspect
+import sys
+import threading
+
+
+instrumenting = threading.Lock()
+
+
+def defer(function):
+    instrumented = None
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        nonlocal instrumented
+        if instrumented is None:
+            with instrumenting:
+                if instrumented is None:
+                    from typeguard import typechecked as instrument
+                    instrumented = instrument(function)
+        return instrumented(*args, **kwargs)
+
+    wrapper.deferred_typecheck = True
+    return wrapper
+
+
+def is_method_of(attribute, cls) -> bool:
+    return inspect.isfunction(attribute) and not getattr(attribute, 'deferred_typecheck', False) and \
+        attribute.__module__ == cls.__module__ and attribute.__qualname__.startswith(f'{cls.__qualname__}.') and \
+        attribute.__code__.co_filename == sys.modules[cls.__module__].__file__
+
+
+def typechecked(target=None):
+    if target is None:
+        return typechecked
+    if not isinstance(target, type):
+        return defer(target)
+
+    for name, attribute in list(vars(target).items()):
+        if isinstance(attribute, (staticmethod, classmethod)) and is_method_of(attribute.__func__, target):
+            setattr(target, name, type(attribute)(defer(attribute.__func__)))
+        elif is_method_of(attribute, target):
+            setattr(target, name, defer(attribute))
+    return target
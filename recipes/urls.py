@@ -1,8 +1,11 @@
+from django.urls import path
 from rest_framework.routers import SimpleRouter
 
-from recipes.views import PublicRecipeViewSet, PrivateRecipeViewSet
+from recipes.views import BatchView, PublicRecipeViewSet, PrivateRecipeViewSet
 
 router = SimpleRouter()
 router.register('recipes', PublicRecipeViewSet, basename='recipes')
 router.register('personal-area', PrivateRecipeViewSet, basename='personal-area')
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path('batch/', BatchView.as_view(), name='batch'),
+]
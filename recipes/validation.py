@@ -0,0 +1,100 @@
+import re
+
+from django.core.exceptions import ValidationError
+
+UNITS = ('kg', 'g', 'l', 'cl', 'ml', 'cup', 'n/a')
+INGREDIENT_KEYS = frozenset(['name', 'quantity', 'unit'])
+
+
+class TextRule:
+    def __init__(self, label: str, max_length: int, pattern: str):
+        self.label = label
+        self.max_length = max_length
+        self.pattern = re.compile(pattern)
+
+    def errors(self, value) -> list:
+        if not isinstance(value, str) or not 0 < len(value) <= self.max_length:
+            return [f"{self.label} must be between 1-{self.max_length} character"]
+        if not self.pattern.fullmatch(value):
+            return [f"{self.label} is not syntactically correct"]
+        return []
+
+
+TITLE = TextRule('Title', 30, r'[a-zA-ZÀ-ú ]+')
+DESCRIPTION = TextRule('Description', 500, r'[a-zA-Z0-9À-ú \'!;.,\n]+')
+NAME = TextRule('Name of the ingredient', 30, r'[a-zA-ZÀ-ú ]+')
+
+
+def quantity_errors(value) -> list:
+    if type(value) is not int or not 0 < value <= 1000:
+        return ["Quantity of the ingredient must be between 1-1000"]
+    return []
+
+
+def unit_errors(value) -> list:
+    if value not in UNITS:
+        return [f"Unit of the ingredient must be one of this: {list(UNITS)}"]
+    return []
+
+
+def ingredients_errors(value) -> list:
+    if type(value) is not list:
+        return ["Please, fill the ingredients properly"]
+    if not value:
+        return ["Please insert at least one ingredient"]
+
+    errors, seen = [], set()
+    for position, ingredient in enumerate(value, start=1):
+        if not isinstance(ingredient, dict) or set(ingredient) != INGREDIENT_KEYS:
+            errors.append(f"Ingredient {position}: please, enter exactly a name, a quantity and a unit")
+            continue
+        for message in NAME.errors(ingredient['name']) + quantity_errors(ingredient['quantity']) + \
+                unit_errors(ingredient['unit']):
+            errors.append(f"Ingredient {position}: {message}")
+        if isinstance(ingredient['name'], str):
+            if ingredient['name'] in seen:
+                errors.append(f"There are some redundant ingredients! <{ingredient['name'].upper()}>")
+            seen.add(ingredient['name'])
+    return errors
+
+
+RECIPE_RULES = {
+    'title': TITLE.errors,
+    'description': DESCRIPTION.errors,
+    'ingredients': ingredients_errors,
+}
+
+
+def recipe_errors(data: dict, partial: bool = False) -> dict:
+    errors = {}
+    for field, rule in RECIPE_RULES.items():
+        if field not in data:
+            if not partial:
+                errors[field] = ["This field is required."]
+            continue
+        messages = rule(data[field])
+        if messages:
+            errors[field] = messages
+    return errors
+
+
+def raise_for(messages: list) -> None:
+    if messages:
+        raise ValidationError(messages)
+
+
+def raise_first(messages: list) -> None:
+    if messages:
+        raise ValidationError(messages[0])
+
+
+def validate_title(value):
+    raise_for(TITLE.errors(value))
+
+
+def validate_description(value):
+    raise_for(DESCRIPTION.errors(value))
+
+
+def validate_ingredients(value):
+    raise_for(ingredients_errors(value))
@@ -1,31 +1,143 @@
 import re
 
-from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db.models.functions import Lower
+from django.http import Http404
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from . import moderation, slowlog
+from .batch import Batch, parse_batch
+from .counts import cached_count
+from .domain_cache import domain_recipes
 from .models import Recipe
-from .domain import Name, Title, JsonHandler
-from .permissions import IsModeratorOrAdmin
+from .domain import Description, Name, Title
+from .indexes import autocomplete_index, duplicate_index, pantry_index, registry, search_index, tombstone_horizon
+from .jobs import background_settings
+from .permissions import IsModeratorOrAdmin, is_moderator as user_is_moderator
+from .queries import changes_since, filter_by_author, filter_recipes, has_ingredient, is_valid_username, \
+    parse_cursor
+from .shopping import parse_items, shopping_list
 from .serializers import UserRecipeSerializer, AdminModeratorRecipeSerializer
+from .sharding import AuthorMoving, each_shard, fan_out, find, for_author, shard_for, sharding_enabled, \
+    with_authors
+from .writer import run_write, writer_report
 
 ORDER_BY_TITLE = 'title'
 ORDER_BY_DATA = 'created_at'
-
-
-def sort_by(sort_value: str, objects, serializer):
-    queryset = objects.order_by(Lower(sort_value))
-    serializer = serializer(queryset, many=True)
-    return Response(data=serializer.data, status=status.HTTP_200_OK)
-
-
-class PublicRecipeViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Recipe.objects.all()
+AUTOCOMPLETE_VALIDATORS = {autocomplete_index.TITLE: Title, autocomplete_index.INGREDIENT: Name}
+AUTOCOMPLETE_MAX_LIMIT = 50
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_MAX_MISSING = 10
+PANTRY_MAX_LIMIT = 50
+SEARCH_MAX_LIMIT = 50
+CHANGES_MAX_LIMIT = 1000
+BATCH_MAX_REQUESTS = 20
+SLOW_QUERIES_MAX_LIMIT = 500
+DUPLICATES_MAX_LIMIT = 100
+AUTHOR_MATCH_EXACT = 'exact'
+AUTHOR_MATCH_PREFIX = 'prefix'
+COUNT_ONLY = 'only'
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+DUPLICATES_HEADER = 'X-Possible-Duplicates'
+
+
+class CountedCollectionMixin:
+    def count_only(self) -> bool:
+        return self.request.method == 'HEAD' or self.request.query_params.get('count') == COUNT_ONLY
+
+    def count_response(self, count: int):
+        return Response(data={'count': count}, status=status.HTTP_200_OK, headers={TOTAL_COUNT_HEADER: str(count)})
+
+    def collection_response(self, data, empty_detail: str = None, total: int = None):
+        if not data and empty_detail is not None:
+            return Response(data={'detail': empty_detail}, status=status.HTTP_404_NOT_FOUND,
+                            headers={TOTAL_COUNT_HEADER: '0'})
+        total = len(data) if total is None else total
+        return Response(data=data, status=status.HTTP_200_OK, headers={TOTAL_COUNT_HEADER: str(total)})
+
+    def total(self, queryset) -> int:
+        return sum(cached_count(shard) for shard in each_shard(queryset))
+
+    def counted(self, queryset, empty_detail: str = None):
+        if self.count_only():
+            return self.count_response(self.total(queryset))
+        return self.collection_response(self.get_serializer(fan_out(queryset), many=True).data, empty_detail)
+
+    def list(self, request, *args, **kwargs):
+        return self.counted(self.filter_queryset(self.get_queryset()))
+
+    def sort_by(self, sort_value: str):
+        return self.counted(self.get_queryset().order_by(Lower(sort_value)))
+
+
+class ShardedObjectMixin:
+    def handle_exception(self, exc):
+        if isinstance(exc, AuthorMoving):
+            return Response(data={'detail': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': '1'})
+        return super().handle_exception(exc)
+
+    def get_object(self):
+        if not sharding_enabled():
+            return super().get_object()
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            instance = find(queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}))
+        except (TypeError, ValueError, ValidationError):
+            instance = None
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+
+class SparseFieldsViewSetMixin:
+    def get_requested_fields(self):
+        if self.request is None:
+            return None
+        raw = self.request.query_params.get('fields')
+        if raw is None or self.request.method not in permissions.SAFE_METHODS:
+            return None
+
+        requested = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        available = self.get_serializer_class()().fields
+        unknown = [name for name in requested if name not in available]
+        if not requested or unknown:
+            raise ParseError(detail=f"Please, choose the fields among: {', '.join(available)}")
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def project(self, queryset):
+        fields = self.get_requested_fields()
+        if fields is None:
+            queryset = with_authors(queryset)
+            if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+                return queryset
+            return queryset.defer('signature')
+
+        columns = self.get_serializer_class()(fields=fields).get_columns()
+        if 'author__username' in columns:
+            queryset = with_authors(queryset)
+        return queryset.only('pk', *columns)
+
+
+class PublicRecipeViewSet(CountedCollectionMixin, ShardedObjectMixin, SparseFieldsViewSetMixin,
+                          viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        return self.project(Recipe.objects.all())
+
     def get_serializer_class(self):
         if self.request.user.is_superuser:
             return AdminModeratorRecipeSerializer
@@ -33,19 +145,16 @@ class PublicRecipeViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['GET'], url_path='by-author/(?P<name>[^/.]+)', url_name='filter-author')
     def all_recipe_by_author(self, request, name=None):
-        if len(name) > 150 or not re.match(r'^[a-zA-Z0-9@.+\-_]+$', name):
+        if not is_valid_username(name):
             return Response(data={'detail': 'Please, enter a valid user'}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = get_user_model().objects.filter(username__icontains=name)
-
-        if user:
-            queryset = Recipe.objects.filter(author=user[0].pk)
-            serializer = self.get_serializer(queryset, many=True)
-            if serializer.data:
-                return Response(data=serializer.data, status=status.HTTP_200_OK)
+        match = request.query_params.get('match', AUTHOR_MATCH_EXACT)
+        if match not in (AUTHOR_MATCH_EXACT, AUTHOR_MATCH_PREFIX):
+            return Response(data={'detail': f"Please, match the author with {AUTHOR_MATCH_EXACT} or "
+                                            f"{AUTHOR_MATCH_PREFIX}"}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(data={'detail': 'Sorry, cannot find recipes written by this author'},
-                        status=status.HTTP_404_NOT_FOUND)
+        queryset = filter_by_author(self.get_queryset(), name, prefix=match == AUTHOR_MATCH_PREFIX).order_by('pk')
+        return self.counted(queryset, 'Sorry, cannot find recipes written by this author')
 
     @action(detail=False, methods=['GET'], url_path='by-ingredient/(?P<name>[^/.]+)', url_name='filter-ingredient')
     def all_recipe_by_ingredient(self, request, name=None):
@@ -53,21 +162,20 @@ class PublicRecipeViewSet(viewsets.ReadOnlyModelViewSet):
             n = Name(name.lower())
         except ValidationError as e:
             return Response(data=e.message, status=status.HTTP_400_BAD_REQUEST)
+        if self.count_only():
+            return self.count_response(self.total(Recipe.objects.filter(has_ingredient(n))))
 
-        queryset = Recipe.objects.all()
-        output = []
-        for recipe in queryset:
+        queryset = with_authors(Recipe.objects.defer('signature'))
+        matches = []
+        for recipe in fan_out(queryset):
             try:
-                if JsonHandler.create_recipe_from_json(self.get_serializer(recipe).data).has_name_in_ingredients(n):
-                    output.append(self.get_serializer(recipe).data)
+                if domain_recipes.get(recipe).has_name_in_ingredients(n):
+                    matches.append(recipe)
             except ValidationError as e:
                 return Response(data=e.message, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        if output:
-            return Response(data=output, status=status.HTTP_200_OK)
-
-        return Response(data={'detail': "Sorry, there is no recipe with this ingredient"},
-                        status=status.HTTP_404_NOT_FOUND)
+        return self.collection_response(self.get_serializer(matches, many=True).data,
+                                        "Sorry, there is no recipe with this ingredient")
 
     @action(detail=False, methods=['GET'], url_path='by-title/(?P<title>[^/.]+)', url_name='filter-title')
     def all_recipe_by_title(self, request, title=None):
@@ -76,27 +184,125 @@ class PublicRecipeViewSet(viewsets.ReadOnlyModelViewSet):
         except ValidationError as e:
             return Response(data=e.message, status=status.HTTP_400_BAD_REQUEST)
 
-        queryset = Recipe.objects.filter(title__icontains=title)
-        serializer = self.get_serializer(queryset, many=True)
-        if serializer.data:
-            return Response(data=serializer.data, status=status.HTTP_200_OK)
+        queryset = self.get_queryset().filter(title__icontains=title)
+        return self.counted(queryset, 'Sorry, there is no recipe with this title')
+
+    @action(detail=False, methods=['GET'], url_path='autocomplete', url_name='autocomplete')
+    def autocomplete(self, request):
+        kind = request.query_params.get('kind', autocomplete_index.INGREDIENT)
+        limit = request.query_params.get('limit', '10')
+        if kind not in AUTOCOMPLETE_VALIDATORS:
+            return Response(data={'detail': f"Please, choose kind among: {list(AUTOCOMPLETE_VALIDATORS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not re.match(r'^\d+$', limit) or not 0 < int(limit) <= AUTOCOMPLETE_MAX_LIMIT:
+            return Response(data={'detail': f"Please, enter a limit between 1-{AUTOCOMPLETE_MAX_LIMIT}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            prefix = AUTOCOMPLETE_VALIDATORS[kind](request.query_params.get('q', '')).value
+        except ValidationError as e:
+            return Response(data=e.message, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(data=autocomplete_index.complete(kind, prefix, int(limit)), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['GET'], url_path='pantry', url_name='pantry')
+    def all_recipe_by_pantry(self, request):
+        names = request.query_params.getlist('ingredient')
+        missing = request.query_params.get('missing', '0')
+        limit = request.query_params.get('limit', '20')
+        if not 0 < len(names) <= PANTRY_MAX_INGREDIENTS:
+            return Response(data={'detail': f"Please, enter between 1-{PANTRY_MAX_INGREDIENTS} ingredients"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not re.match(r'^\d+$', missing) or int(missing) > PANTRY_MAX_MISSING:
+            return Response(data={'detail': f"Please, enter a number of missing ingredients between "
+                                            f"0-{PANTRY_MAX_MISSING}"}, status=status.HTTP_400_BAD_REQUEST)
+        if not re.match(r'^\d+$', limit) or not 0 < int(limit) <= PANTRY_MAX_LIMIT:
+            return Response(data={'detail': f"Please, enter a limit between 1-{PANTRY_MAX_LIMIT}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            names = [Name(name).value for name in names]
+        except ValidationError as e:
+            return Response(data=e.message, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = pantry_index.cookable(names, int(missing))
+        if self.count_only():
+            return self.count_response(len(matches))
+        order = sorted(matches, key=lambda pk: (len(matches[pk]), pk))[:int(limit)]
+        queryset = sorted(fan_out(self.get_queryset().filter(pk__in=order)), key=lambda r: (len(matches[r.pk]), r.pk))
+        output = [dict(self.get_serializer(recipe).data, missing=matches[recipe.pk]) for recipe in queryset]
+        return self.collection_response(output, "Sorry, there is no recipe with these ingredients", len(matches))
+
+    @action(detail=False, methods=['GET'], url_path='search', url_name='search')
+    def search_recipes(self, request):
+        limit = request.query_params.get('limit', '20')
+        if not re.match(r'^\d+$', limit) or not 0 < int(limit) <= SEARCH_MAX_LIMIT:
+            return Response(data={'detail': f"Please, enter a limit between 1-{SEARCH_MAX_LIMIT}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            query = Description(request.query_params.get('q', '')).value
+        except ValidationError as e:
+            return Response(data=e.message, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = search_index.scores(query)
+        if self.count_only():
+            return self.count_response(len(matches))
+        scores = dict(matches.most_common(int(limit)))
+        queryset = sorted(fan_out(self.get_queryset().filter(pk__in=scores)), key=lambda r: (-scores[r.pk], r.pk))
+        output = [dict(self.get_serializer(recipe).data, score=round(scores[recipe.pk], 4)) for recipe in queryset]
+        return self.collection_response(output, "Sorry, there is no recipe matching this search", len(matches))
+
+    @action(detail=False, methods=['GET'], url_path='shopping-list', url_name='shopping-list')
+    def recipes_shopping_list(self, request):
+        try:
+            servings = parse_items(request.query_params.getlist('recipe'))
+        except ValidationError as e:
+            return Response(data={'detail': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response(data=shopping_list(servings), status=status.HTTP_200_OK)
+        except Recipe.DoesNotExist as e:
+            return Response(data={'detail': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    @action(detail=False, methods=['GET'], url_path='changes', url_name='changes')
+    def recipe_changes(self, request):
+        limit = request.query_params.get('limit', '500')
+        if not re.match(r'^\d+$', limit) or not 0 < int(limit) <= CHANGES_MAX_LIMIT:
+            return Response(data={'detail': f"Please, enter a limit between 1-{CHANGES_MAX_LIMIT}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            since = parse_cursor(request.query_params.get('since'))
+        except ValidationError as e:
+            return Response(data={'detail': e.message}, status=status.HTTP_400_BAD_REQUEST)
+        if 'since' in request.query_params and since < tombstone_horizon():
+            return Response(data={'detail': 'Sorry, deletions this old are no longer kept, please sync again '
+                                            'without since'}, status=status.HTTP_410_GONE)
 
-        return Response(data={'detail': 'Sorry, there is no recipe with this title'}, status=status.HTTP_404_NOT_FOUND)
+        changed, deleted, cursor, has_more = changes_since(self.get_queryset(), since, int(limit))
+        return Response(data={'changed': self.get_serializer(changed, many=True).data, 'deleted': deleted,
+                              'cursor': cursor.isoformat(), 'has_more': has_more}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['GET'], url_path='query', url_name='query')
+    def query_recipes(self, request):
+        try:
+            queryset = filter_recipes(self.get_queryset(), request.query_params)
+        except ValidationError as e:
+            return Response(data={'detail': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.counted(queryset, 'Sorry, there is no recipe matching this query')
 
     @action(detail=False, methods=['GET'], url_path='sort-by-title', url_name='sort-title')
     def sort_recipe_by_title(self, request):
-        return sort_by(ORDER_BY_TITLE, Recipe.objects.all(), self.get_serializer_class())
+        return self.sort_by(ORDER_BY_TITLE)
 
     @action(detail=False, methods=['GET'], url_path='sort-by-date', url_name='sort-date')
     def sort_recipe_by_date(self, request):
-        return sort_by(ORDER_BY_DATA, Recipe.objects.all(), self.get_serializer_class())
+        return self.sort_by(ORDER_BY_DATA)
 
 
-class PrivateRecipeViewSet(viewsets.ModelViewSet):
+class PrivateRecipeViewSet(CountedCollectionMixin, ShardedObjectMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsModeratorOrAdmin]
 
     def get_serializer_class(self):
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='recipe_moderators').exists():
+        if self.request is not None and (self.request.user.is_superuser or user_is_moderator(self.request.user)):
             return AdminModeratorRecipeSerializer
         return UserRecipeSerializer
 
@@ -109,29 +315,125 @@ class PrivateRecipeViewSet(viewsets.ModelViewSet):
             elif int(request.data['author']) != self.request.user.pk:
                 return Response(status=status.HTTP_403_FORBIDDEN)
 
-        return super(PrivateRecipeViewSet, self).create(request, *args, **kwargs)
+        response = super(PrivateRecipeViewSet, self).create(request, *args, **kwargs)
+        duplicates = self.possible_duplicates(self.created)
+        if duplicates:
+            response[DUPLICATES_HEADER] = ', '.join(str(pk) for pk, _ in duplicates)
+        return response
+
+    def possible_duplicates(self, recipe) -> list:
+        if background_settings().get('ENABLED'):
+            duplicate_index.build_in_background()
+        else:
+            duplicate_index.ensure_built()
+        options = getattr(settings, 'RECIPES_DUPLICATES', {})
+        signature = bytes(recipe.signature) if recipe.signature is not None else None
+        return duplicate_index.similar(signature, options.get('THRESHOLD', 0.6), exclude=recipe.pk,
+                                       limit=options.get('HEADER_LIMIT', 5))
 
     def perform_create(self, serializer):
-        return serializer.save(author=self.request.user)
+        self.created = run_write(shard_for(self.request.user.pk), serializer.save, author=self.request.user)
+        return self.created
+
+    def perform_update(self, serializer):
+        return run_write(serializer.instance._state.db, serializer.save)
+
+    def perform_destroy(self, instance):
+        return run_write(instance._state.db, instance.delete)
 
     def get_queryset(self):
-        return Recipe.objects.all() if self.request.user.is_superuser or self.request.user.groups.filter(
-            name='recipe_moderators').exists() else Recipe.objects.filter(author=self.request.user)
+        user = self.request.user
+        return self.project(Recipe.objects.all() if user.is_superuser or user_is_moderator(user)
+                            else for_author(Recipe.objects.filter(author=user), user.pk))
 
     @action(detail=False, methods=['GET'], url_path='sort-by-title', url_name='sort-title')
     def sort_recipe_by_title(self, request):
-        return sort_by(ORDER_BY_TITLE, self.get_queryset(), self.get_serializer_class())
+        return self.sort_by(ORDER_BY_TITLE)
 
     @action(detail=False, methods=['GET'], url_path='sort-by-date', url_name='sort-date')
     def sort_recipe_by_date(self, request):
-        return sort_by(ORDER_BY_DATA, self.get_queryset(), self.get_serializer_class())
+        return self.sort_by(ORDER_BY_DATA)
+
+    @action(detail=False, methods=['DELETE'], url_path='bulk', url_name='bulk-delete')
+    def bulk_delete(self, request):
+        if not self.request.user.is_superuser and not user_is_moderator(self.request.user):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        try:
+            ids, queryset = moderation.select_recipes(request.data)
+        except ValidationError as e:
+            return Response(data={'detail': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = moderation.bulk_delete(self.request.user, ids, queryset)
+        return Response(data={'deleted': sum(result['outcome'] == moderation.DELETED for result in results),
+                              'results': results}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['GET'], url_path='account-type', url_name='account-type')
     def is_moderator(self, request):
         account_type = 0
         if self.request.user.is_superuser:
             account_type = 1
-        elif self.request.user.groups.filter(name='recipe_moderators').exists():
+        elif user_is_moderator(self.request.user):
             account_type = 2
 
         return Response(data={'type-account': account_type}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['GET'], url_path='index-stats', url_name='index-stats')
+    def index_stats(self, request):
+        if not self.request.user.is_superuser:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        return Response(data={**{index.name: index.memory_report() for index in registry},
+                              'domain-cache': domain_recipes.report(), 'writer': writer_report()},
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['GET'], url_path='duplicates', url_name='duplicates')
+    def duplicates(self, request):
+        if not self.request.user.is_superuser:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        limit = request.query_params.get('limit', '20')
+        if not re.match(r'^\d+$', limit) or not 0 < int(limit) <= DUPLICATES_MAX_LIMIT:
+            return Response(data={'detail': f"Please, enter a limit between 1-{DUPLICATES_MAX_LIMIT}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        threshold = request.query_params.get('threshold', str(getattr(settings, 'RECIPES_DUPLICATES', {}).get(
+            'THRESHOLD', 0.6)))
+        if not re.match(r'^(0(\.\d+)?|1(\.0+)?)$', threshold):
+            return Response(data={'detail': "Please, enter a threshold between 0-1"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        clusters = duplicate_index.clusters(float(threshold))[:int(limit)]
+        recipes = {recipe.pk: recipe for recipe in fan_out(
+            self.get_queryset().filter(pk__in=[pk for pks, _ in clusters for pk in pks]))}
+        output = [{'similarity': round(score, 4),
+                   'recipes': self.get_serializer([recipes[pk] for pk in pks if pk in recipes], many=True).data}
+                  for pks, score in clusters]
+        return Response(data={'threshold': float(threshold), 'clusters': output}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['GET'], url_path='slow-queries', url_name='slow-queries')
+    def slow_queries(self, request):
+        if not self.request.user.is_superuser:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        if slowlog.slow_query_log is None:
+            return Response(data={'detail': "The slow query log is disabled"}, status=status.HTTP_404_NOT_FOUND)
+
+        limit = request.query_params.get('limit', '100')
+        if not re.match(r'^\d+$', limit) or not 0 < int(limit) <= SLOW_QUERIES_MAX_LIMIT:
+            return Response(data={'detail': f"Please, enter a limit between 1-{SLOW_QUERIES_MAX_LIMIT}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(data={'threshold_ms': slowlog.slow_query_log.threshold * 1e3,
+                              'queries': slowlog.slow_query_log.entries(int(limit))}, status=status.HTTP_200_OK)
+
+
+class BatchView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        try:
+            items = parse_batch(request.data, BATCH_MAX_REQUESTS)
+        except ValidationError as e:
+            return Response(data={'detail': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        batch = Batch(request, (PublicRecipeViewSet, PrivateRecipeViewSet))
+        return Response(data={'responses': batch.run(items, request.data.get('concurrent') is True)},
+                        status=status.HTTP_200_OK)
@@ -0,0 +1,55 @@
+import logging
+import time
+
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+
+from .counts import bump_generation
+from .domain_cache import domain_recipes
+from .indexes import catalog_cursor, registry, settling
+from .models import Recipe
+from .sharding import each_shard
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> dict:
+    timings = {}
+    start = time.perf_counter()
+    get_resolver().url_patterns
+    timings['urls'] = time.perf_counter() - start
+    try:
+        for index in registry:
+            start = time.perf_counter()
+            index.ensure_built()
+            timings[index.name] = time.perf_counter() - start
+        start = time.perf_counter()
+        for shard in each_shard(Recipe.objects.order_by('-modified_at')[:domain_recipes.max_size]):
+            domain_recipes.warm(shard)
+        timings['domain-cache'] = time.perf_counter() - start
+    except DatabaseError:
+        logger.warning('Skipping the index warm-up: the database is not ready', exc_info=True)
+    return timings
+
+
+def warm_connections() -> None:
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+class IndexSync:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.cursor = catalog_cursor()
+        self.checked_at = time.monotonic()
+
+    def poll(self) -> None:
+        if time.monotonic() - self.checked_at < self.interval:
+            return
+        self.checked_at = time.monotonic()
+        cursor = catalog_cursor()
+        if cursor > self.cursor or settling(self.cursor):
+            for index in registry:
+                index.catch_up(self.cursor)
+            bump_generation()
+            self.cursor = max(cursor, self.cursor)
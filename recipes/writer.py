@@ -0,0 +1,155 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteCoordinator:
+    def __init__(self, alias: str, max_batch: int = 64, max_delay: float = 0.002):
+        self.alias = alias
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {'submitted': 0, 'committed': 0, 'failed': 0, 'batches': 0, 'last_batch': 0, 'max_batch': 0}
+
+    def start(self) -> 'WriteCoordinator':
+        self._thread = threading.Thread(target=self._work, name=f'recipes-writer-{self.alias}', daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, function, *args, **kwargs):
+        if threading.current_thread() is self._thread:
+            return function(*args, **kwargs)
+        future = Future()
+        with self._lock:
+            self.stats['submitted'] += 1
+        self._queue.put((future, function, args, kwargs))
+        return future.result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while batch[-1] is not _STOP and len(batch) < self.max_batch:
+            try:
+                if len(batch) == 1:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self) -> None:
+        while True:
+            batch = self._collect()
+            stop = batch[-1] is _STOP
+            writes = batch[:-1] if stop else batch
+            if writes:
+                self._commit(writes)
+            if stop:
+                connections[self.alias].close()
+                return
+
+    def _commit(self, writes: list) -> None:
+        results = []
+        try:
+            with transaction.atomic(using=self.alias):
+                for future, function, args, kwargs in writes:
+                    try:
+                        with transaction.atomic(using=self.alias):
+                            results.append((future, function(*args, **kwargs), None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except Exception as error:
+            logger.exception('Group commit of %d writes on %s failed', len(writes), self.alias)
+            connections[self.alias].close()
+            results = [(future, None, error) for future, _, _, _ in writes]
+
+        failed = sum(error is not None for _, _, error in results)
+        with self._lock:
+            self.stats['committed'] += len(results) - failed
+            self.stats['failed'] += failed
+            self.stats['batches'] += 1
+            self.stats['last_batch'] = len(writes)
+            self.stats['max_batch'] = max(self.stats['max_batch'], len(writes))
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def report(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        written = stats['committed'] + stats['failed']
+        return {**stats, 'depth': self.depth(),
+                'average_batch': written / stats['batches'] if stats['batches'] else None}
+
+    def shutdown(self) -> None:
+        self._queue.put(_STOP)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_coordinators = {}
+_coordinators_lock = threading.Lock()
+
+
+def forget_write_coordinators() -> None:
+    global _coordinators_lock
+    _coordinators.clear()
+    _coordinators_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=forget_write_coordinators)
+
+
+def group_commit_settings() -> dict:
+    return getattr(settings, 'RECIPES_GROUP_COMMIT', {})
+
+
+def get_write_coordinator(alias: str) -> WriteCoordinator:
+    with _coordinators_lock:
+        if alias not in _coordinators:
+            options = group_commit_settings()
+            if not _coordinators:
+                atexit.register(shutdown_write_coordinators)
+            _coordinators[alias] = WriteCoordinator(alias, options.get('MAX_BATCH', 64),
+                                                    options.get('MAX_DELAY_MS', 2) / 1e3).start()
+        return _coordinators[alias]
+
+
+def run_write(alias: str, function, *args, **kwargs):
+    if not group_commit_settings().get('ENABLED'):
+        return function(*args, **kwargs)
+    return get_write_coordinator(alias).submit(function, *args, **kwargs)
+
+
+def writer_report() -> dict:
+    with _coordinators_lock:
+        coordinators = dict(_coordinators)
+    return {alias: coordinator.report() for alias, coordinator in coordinators.items()}
+
+
+def shutdown_write_coordinators() -> None:
+    with _coordinators_lock:
+        coordinators = list(_coordinators.values())
+        _coordinators.clear()
+    for coordinator in coordinators:
+        coordinator.shutdown()
@@ -0,0 +1,19 @@
+import pytest
+from django.core.cache import cache
+
+from recipes.domain_cache import domain_recipes
+from recipes.indexes import registry
+
+
+@pytest.fixture(autouse=True)
+def reset_indexes(settings):
+    settings.RECIPES_SEARCH_SNAPSHOT = None
+    settings.RECIPES_BACKGROUND_JOBS = {'ENABLED': False}
+    settings.RECIPES_GROUP_COMMIT = {'ENABLED': False}
+    cache.clear()
+    domain_recipes.clear()
+    for index in registry:
+        index.reset()
+    yield
+    for index in registry:
+        index.reset()
@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from recipes.admin import EstimatedCountPaginator, estimated_rows
+from recipes.models import Recipe, RecipeTombstone
+
+INGREDIENTS = [{"name": "Eggs", "unit": "g", "quantity": 40}]
+
+
+@pytest.fixture()
+def admin_client(db, client):
+    user = mixer.blend(get_user_model(), username='root', is_superuser=True, is_staff=True)
+    client.force_login(user)
+    return client
+
+
+def changelist(client, **params):
+    return client.get(reverse('admin:recipes_recipe_changelist'), params)
+
+
+def listed(response):
+    return [recipe.pk for recipe in response.context['cl'].result_list]
+
+
+def test_changelist_queries_do_not_grow_with_the_page(admin_client):
+    mixer.cycle(5).blend('recipes.Recipe', ingredients=INGREDIENTS)
+    with CaptureQueriesContext(connection) as few:
+        assert changelist(admin_client).status_code == 200
+    mixer.cycle(20).blend('recipes.Recipe', ingredients=INGREDIENTS)
+    with CaptureQueriesContext(connection) as many:
+        assert changelist(admin_client).status_code == 200
+    assert len(many.captured_queries) == len(few.captured_queries)
+
+
+def test_changelist_search_uses_title_author_prefix_or_id(admin_client):
+    chef = mixer.blend(get_user_model(), username='Chef')
+    soup = mixer.blend('recipes.Recipe', title='Tomato soup', author=chef, ingredients=INGREDIENTS)
+    salad = mixer.blend('recipes.Recipe', title='Green salad', ingredients=INGREDIENTS)
+    mixer.blend('recipes.Recipe', title='Pasta with tomato', ingredients=INGREDIENTS)
+
+    assert listed(changelist(admin_client, q='tomato')) == [soup.pk]
+    assert listed(changelist(admin_client, q='CHE')) == [soup.pk]
+    assert listed(changelist(admin_client, q=str(salad.pk))) == [salad.pk]
+
+
+def test_changelist_filters_by_author(admin_client):
+    chef = mixer.blend(get_user_model(), username='Chef')
+    mine = mixer.blend('recipes.Recipe', author=chef, ingredients=INGREDIENTS)
+    mixer.blend('recipes.Recipe', author=mixer.blend(get_user_model(), username='Chefina'), ingredients=INGREDIENTS)
+
+    response = changelist(admin_client, author='chef')
+    assert listed(response) == [mine.pk]
+    assert b'name="author" value="chef"' in response.content
+    assert listed(changelist(admin_client, author='!!!')) == []
+
+
+def test_delete_action_removes_recipes_in_bulk(admin_client):
+    recipes = mixer.cycle(3).blend('recipes.Recipe', ingredients=INGREDIENTS)
+    response = admin_client.post(reverse('admin:recipes_recipe_changelist'), {
+        'action': 'delete_recipes', '_selected_action': [recipe.pk for recipe in recipes[:2]]})
+    assert response.status_code == 302
+    assert list(Recipe.objects.values_list('pk', flat=True)) == [recipes[2].pk]
+    assert set(RecipeTombstone.objects.values_list('recipe_id', flat=True)) == {recipe.pk for recipe in recipes[:2]}
+
+
+def test_paginator_estimates_unfiltered_counts(db):
+    mixer.cycle(3).blend('recipes.Recipe', ingredients=INGREDIENTS)
+    assert estimated_rows(Recipe, 'default') >= 3
+    with patch('recipes.admin.estimated_rows', return_value=2_000_000):
+        assert EstimatedCountPaginator(Recipe.objects.order_by('pk'), 100).count == 2_000_000
+        assert EstimatedCountPaginator(Recipe.objects.filter(pk__gt=0).order_by('pk'), 100).count == 3
+    with patch('recipes.admin.estimated_rows', return_value=3):
+        assert EstimatedCountPaginator(Recipe.objects.order_by('pk'), 100).count == 3
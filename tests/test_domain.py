@@ -1,4 +1,9 @@
+import threading
+import time
+from unittest.mock import patch
+
 import pytest
+from typeguard import TypeCheckError
 
 from recipes.domain import *
 
@@ -10,7 +15,7 @@ class TestDomainPrimitives:
             with pytest.raises(ValidationError):
                 Title(value)
 
-        right_values = ['Title', 'Example of Title', 'My personal Title']
+        right_values = ['Title', 'Example of Title', 'My personal Title', 'Crème caramel']
         for value in right_values:
             assert Title(value).value == value
 
@@ -165,3 +170,49 @@ class TestDomainPrimitives:
         })
         assert recipe.ingredients() == 1
         assert recipe.has_name_in_ingredients(Name("uova"))
+
+    def test_value_objects_have_no_instance_dict(self):
+        ingredient = Ingredient(Name("Banana"), Quantity(20), Unit("kg"))
+        assert not hasattr(ingredient, '__dict__')
+        assert not hasattr(ingredient.name, '__dict__')
+
+    def test_value_objects_are_interned(self):
+        assert Unit.of('kg') is Unit.of('kg')
+        assert Quantity.of(20) is Quantity.of(20)
+        assert Name.of('Banana') is Name.of('Banana')
+
+    def test_interned_value_objects_are_still_validated(self):
+        with pytest.raises(ValidationError):
+            Unit.of('lt')
+        with pytest.raises(ValidationError):
+            Quantity.of(1001)
+        with pytest.raises(ValidationError):
+            Name.of('_Banana_123')
+
+    def test_unit_converts_to_its_base_unit(self):
+        assert Unit('kg').base() == Unit('g')
+        assert Unit('kg').to_base(2) == 2000
+        assert Unit('cup').base() == Unit('ml')
+        assert Unit('n/a').to_base(3) == 3
+
+    def test_typechecks_are_deferred_but_still_enforced(self):
+        assert Recipe.Builder.with_ingredient.deferred_typecheck
+        builder = Recipe.Builder(Title('Title'), Description('Description'), date.today())
+        with pytest.raises(TypeCheckError):
+            builder.with_ingredient('Eggs')
+
+    def test_typechecks_are_instrumented_once_under_concurrent_first_calls(self):
+        from recipes.typechecks import defer
+
+        def instrument(function):
+            time.sleep(0.05)
+            return function
+
+        checked = defer(lambda value: value * 2)
+        with patch('typeguard.typechecked', side_effect=instrument) as instrumented:
+            threads = [threading.Thread(target=checked, args=(position,)) for position in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert instrumented.call_count == 1 and checked(3) == 6
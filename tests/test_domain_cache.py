@@ -0,0 +1,49 @@
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from mixer.backend.django import mixer
+
+from recipes.domain import Name
+from recipes.domain_cache import DomainRecipeCache, domain_recipes
+from recipes.models import Recipe
+
+EGGS = [{"name": "Eggs", "unit": "g", "quantity": 100}]
+
+
+def row(pk, modified_at, ingredients=EGGS):
+    return SimpleNamespace(pk=pk, title='Omelette', description='Beat the eggs', created_at=date(2023, 1, 1),
+                           modified_at=modified_at, ingredients=ingredients)
+
+
+def test_get_builds_once_per_row_version():
+    cache = DomainRecipeCache(max_size=10)
+    first = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    built = cache.get(row(1, first))
+    assert cache.get(row(1, first)) is built
+    updated = cache.get(row(1, datetime(2023, 1, 2, tzinfo=timezone.utc),
+                            [{"name": "Milk", "unit": "ml", "quantity": 100}]))
+    assert updated is not built and updated.has_name_in_ingredients(Name('Milk'))
+    assert cache.report()['hits'] == 1 and cache.report()['misses'] == 2
+
+
+def test_least_recently_used_recipes_are_evicted():
+    cache = DomainRecipeCache(max_size=2)
+    version = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    first = cache.get(row(1, version))
+    cache.get(row(2, version))
+    cache.get(row(1, version))
+    cache.get(row(3, version))
+    assert cache.get(row(1, version)) is first
+    assert cache.report()['size'] == 2 and cache.report()['evictions'] == 1
+
+
+@pytest.mark.django_db
+def test_warm_and_signals_keep_the_shared_cache_fresh():
+    recipes = mixer.cycle(3).blend(Recipe, title='Omelette', description='Eggs', ingredients=EGGS)
+    assert domain_recipes.warm(Recipe.objects.all()) == 3
+    recipes[0].ingredients = [{"name": "Milk", "unit": "ml", "quantity": 100}]
+    recipes[0].save()
+    recipes[1].delete()
+    assert domain_recipes.report()['size'] == 1
+    assert domain_recipes.get(Recipe.objects.get(pk=recipes[0].pk)).has_name_in_ingredients(Name('Milk'))
@@ -0,0 +1,133 @@
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
+from rest_framework.test import APIClient
+
+from recipes.indexes import DuplicateIndex, duplicate_index
+from recipes.models import Recipe
+from recipes.similarity import minhash, recipe_features, recipe_signature, similarity
+
+PASTA = [{"name": name, "unit": "g", "quantity": 100} for name in ['Pasta', 'Tomato', 'Basil', 'Garlic']]
+OMELETTE = [{"name": name, "unit": "g", "quantity": 100} for name in ['Eggs', 'Milk', 'Butter']]
+PASTA_DESCRIPTION = 'Boil the pasta in salted water then toss it with the tomato sauce and fresh basil leaves'
+OMELETTE_DESCRIPTION = 'Whisk the eggs with a splash of milk and cook them slowly in foaming butter'
+
+
+def row(pk, description, ingredients):
+    return SimpleNamespace(pk=pk, title='Recipe', description=description, ingredients=ingredients, signature=None)
+
+
+def test_signatures_estimate_the_similarity_of_recipes():
+    pasta = minhash(recipe_features(PASTA_DESCRIPTION, PASTA))
+    copy = minhash(recipe_features(PASTA_DESCRIPTION.upper().replace('FRESH', 'chopped'),
+                                   [dict(ingredient, name=ingredient['name'].lower()) for ingredient in PASTA]))
+    omelette = minhash(recipe_features(OMELETTE_DESCRIPTION, OMELETTE))
+    assert len(pasta) == 512 and similarity(pasta, pasta) == 1
+    assert similarity(pasta, copy) > 0.6 > similarity(pasta, omelette)
+    assert minhash(recipe_features('', [])) is None
+
+
+def test_index_clusters_near_duplicates():
+    index = DuplicateIndex()
+    index.rebuild([row(1, PASTA_DESCRIPTION, PASTA), row(2, OMELETTE_DESCRIPTION, OMELETTE),
+                   row(3, PASTA_DESCRIPTION.replace('fresh', 'chopped'), PASTA), row(4, PASTA_DESCRIPTION, PASTA)])
+    assert [pks for pks, _ in index.clusters(0.6)] == [[1, 3, 4]]
+    assert [pk for pk, _ in index.similar(recipe_signature(row(5, PASTA_DESCRIPTION, PASTA)), 0.6, exclude=4)] == [1, 3]
+    index.update(row(3, OMELETTE_DESCRIPTION, OMELETTE))
+    index.remove(4)
+    assert [pks for pks, _ in index.clusters(0.6)] == [[2, 3]]
+
+
+def test_clusters_merge_identical_signatures_without_comparing_them():
+    index = DuplicateIndex()
+    index.rebuild([row(pk, PASTA_DESCRIPTION, PASTA) for pk in range(1, 201)] +
+                  [row(201, PASTA_DESCRIPTION.replace('fresh', 'chopped'), PASTA)])
+    with patch('recipes.indexes.similarity', wraps=similarity) as compare:
+        assert index.clusters(0.6) == [(list(range(1, 202)), 1.0)]
+    assert compare.call_count == 1
+
+
+@pytest.mark.django_db
+def test_the_first_create_builds_the_index_in_the_background(settings):
+    settings.RECIPES_BACKGROUND_JOBS = {'ENABLED': True}
+    author = mixer.blend(get_user_model())
+    client = APIClient()
+    client.force_login(author)
+    with patch.object(duplicate_index, 'ensure_built') as build, patch('recipes.signals.schedule_index_refresh'):
+        response = client.post(reverse('personal-area-list'), {
+            'title': 'Pasta', 'description': PASTA_DESCRIPTION, 'ingredients': PASTA}, format='json')
+        duplicate_index._builder.join(5)
+    assert response.status_code == HTTP_201_CREATED
+    build.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_possible_duplicates_are_flagged_at_create_time():
+    author = mixer.blend(get_user_model())
+    original = mixer.blend(Recipe, author=author, title='Pasta', description=PASTA_DESCRIPTION, ingredients=PASTA)
+    mixer.blend(Recipe, author=author, title='Omelette', description=OMELETTE_DESCRIPTION, ingredients=OMELETTE)
+    client = APIClient()
+    client.force_login(author)
+    response = client.post(reverse('personal-area-list'), {
+        'title': 'Pasta again', 'description': PASTA_DESCRIPTION.replace('fresh', 'chopped'), 'ingredients': PASTA},
+        format='json')
+    assert response.status_code == HTTP_201_CREATED
+    assert response['X-Possible-Duplicates'] == str(original.pk)
+    response = client.post(reverse('personal-area-list'), {
+        'title': 'Pancakes', 'description': 'Mix flour and milk then fry', 'ingredients': OMELETTE}, format='json')
+    assert response.status_code == HTTP_201_CREATED and 'X-Possible-Duplicates' not in response
+
+
+@pytest.mark.django_db
+def test_reads_leave_out_the_signature_but_edits_refresh_it():
+    author = mixer.blend(get_user_model())
+    recipe = mixer.blend(Recipe, author=author, title='Pasta', description=PASTA_DESCRIPTION, ingredients=PASTA)
+    client = APIClient()
+    client.force_login(author)
+    with CaptureQueriesContext(connection) as queries:
+        for path in [reverse('recipes-list'), reverse('recipes-filter-ingredient', kwargs={'name': 'basil'}),
+                     reverse('personal-area-detail', kwargs={'pk': recipe.pk})]:
+            assert client.get(path).status_code == HTTP_200_OK
+    assert not [query for query in queries.captured_queries if '"signature"' in query['sql']]
+    response = client.put(reverse('personal-area-detail', kwargs={'pk': recipe.pk}), {
+        'title': 'Omelette', 'description': OMELETTE_DESCRIPTION, 'ingredients': OMELETTE}, format='json')
+    assert response.status_code == HTTP_200_OK
+    recipe.refresh_from_db()
+    assert bytes(recipe.signature) == recipe_signature(recipe)
+
+
+@pytest.mark.django_db
+def test_admin_lists_duplicate_clusters():
+    recipes = [mixer.blend(Recipe, title='Pasta', description=description, ingredients=PASTA)
+               for description in [PASTA_DESCRIPTION, PASTA_DESCRIPTION.replace('fresh', 'chopped')]]
+    mixer.blend(Recipe, title='Omelette', description=OMELETTE_DESCRIPTION, ingredients=OMELETTE)
+    client = APIClient()
+    client.force_login(get_user_model().objects.create_superuser('root', 'root@example.com', 'root'))
+    response = client.get(reverse('personal-area-duplicates'))
+    assert response.status_code == HTTP_200_OK
+    clusters = response.json()['clusters']
+    assert [[recipe['id'] for recipe in cluster['recipes']] for cluster in clusters] == [
+        [recipe.pk for recipe in recipes]]
+    assert clusters[0]['similarity'] >= 0.6
+    for params in [{'limit': '0'}, {'threshold': '1.5'}, {'threshold': 'high'}]:
+        assert client.get(reverse('personal-area-duplicates'), params).status_code == HTTP_400_BAD_REQUEST
+    client.force_login(recipes[0].author)
+    assert client.get(reverse('personal-area-duplicates')).status_code == HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_command_computes_missing_signatures():
+    recipes = mixer.cycle(3).blend(Recipe, title='Pasta', description=PASTA_DESCRIPTION, ingredients=PASTA)
+    Recipe.objects.update(signature=None)
+    call_command('compute_signatures', batch_size=2, stdout=StringIO())
+    for recipe in Recipe.objects.all():
+        assert bytes(recipe.signature) == recipe_signature(recipes[0])
@@ -0,0 +1,145 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from mixer.backend.django import mixer
+
+from recipes.indexes import PantryIndex, PrefixIndex, RecipeIndex, SearchIndex
+
+
+class TestRecipeIndex:
+    def test_subclasses_must_implement_the_storage_methods(self):
+        class PartialIndex(RecipeIndex):
+            def clear(self):
+                pass
+
+        with pytest.raises(TypeError):
+            PartialIndex()
+
+
+class TestPrefixIndex:
+    def test_complete_ranks_by_number_of_recipes(self):
+        index = PrefixIndex()
+        for value in ['Banana', 'Basil', 'basil', 'Bread', 'Apple']:
+            index.add(value)
+        assert index.complete('ba', 10) == [{'value': 'Basil', 'recipes': 2}, {'value': 'Banana', 'recipes': 1}]
+
+    def test_complete_respects_the_limit(self):
+        index = PrefixIndex()
+        for value in ['Banana', 'Basil', 'Bread']:
+            index.add(value)
+        assert len(index.complete('b', 2)) == 2
+
+    def test_discard_removes_unused_keys(self):
+        index = PrefixIndex()
+        key = index.add('Banana')
+        index.add('banana')
+        index.discard(key)
+        assert index.complete('ban', 10) == [{'value': 'Banana', 'recipes': 1}]
+        index.discard(key)
+        assert index.complete('ban', 10) == []
+        assert index.keys == []
+
+
+class TestPantryIndex:
+    @pytest.fixture()
+    def index(self):
+        index = PantryIndex()
+        index.rebuild([
+            SimpleNamespace(pk=1, ingredients=[{"name": "Eggs"}, {"name": "Salt"}]),
+            SimpleNamespace(pk=2, ingredients=[{"name": "eggs"}, {"name": "Flour"}, {"name": "Milk"}]),
+            SimpleNamespace(pk=3, ingredients=[{"name": "Water"}]),
+        ])
+        return index
+
+    def test_cookable_requires_every_ingredient(self, index):
+        assert index.cookable(['EGGS', 'salt', 'Pepper']) == {1: []}
+
+    def test_cookable_allows_missing_ingredients(self, index):
+        assert index.cookable(['Eggs'], missing=1) == {1: ['Salt'], 3: ['Water']}
+        assert index.cookable(['Eggs'], missing=2)[2] == ['Flour', 'Milk']
+
+    def test_cookable_follows_updates(self, index):
+        index.update(SimpleNamespace(pk=3, ingredients=[{"name": "Salt"}]))
+        index.remove(1)
+        assert index.cookable(['Salt']) == {3: []}
+
+    def test_discard_reclaims_unused_bits(self, index):
+        index.update(SimpleNamespace(pk=3, ingredients=[{"name": "Butter"}]))
+        index.update(SimpleNamespace(pk=3, ingredients=[{"name": "Sugar"}]))
+        assert len(index._names) == 5
+        assert index.cookable(['Sugar']) == {3: []}
+        assert index.cookable(['Water']) == {}
+
+
+class TestSearchIndex:
+    @pytest.fixture()
+    def index(self):
+        index = SearchIndex()
+        index.rebuild([
+            SimpleNamespace(pk=1, title='Pasta al pomodoro', description='Pasta with tomato sauce',
+                            ingredients=[{"name": "Pasta"}, {"name": "Tomato"}]),
+            SimpleNamespace(pk=2, title='Pizza', description='Dough, tomato and basil',
+                            ingredients=[{"name": "Flour"}, {"name": "Basil"}]),
+            SimpleNamespace(pk=3, title='Risotto', description='Rice cooked slowly',
+                            ingredients=[{"name": "Rice"}]),
+        ])
+        return index
+
+    def test_search_ranks_boosted_fields_first(self, index):
+        assert [pk for pk, _ in index.search('tomato')] == [1, 2]
+        assert [pk for pk, _ in index.search('pasta basil')] == [1, 2]
+
+    def test_search_follows_updates(self, index):
+        index.remove(1)
+        index.update(SimpleNamespace(pk=3, title='Tomato risotto', description='Rice', ingredients=[]))
+        assert [pk for pk, _ in index.search('tomato')] == [3, 2]
+        assert index.search('pasta') == []
+
+    def test_snapshot_restores_the_index_without_tokenizing(self, index, tmp_path):
+        path = tmp_path / 'search.json'
+        cursor = datetime(2022, 12, 1, tzinfo=timezone.utc)
+        index.save_snapshot(path, cursor)
+        restored = SearchIndex()
+        with patch.object(SearchIndex, 'analyze') as analyze:
+            assert restored.load_snapshot(path) == cursor
+            analyze.assert_not_called()
+        assert restored.search('tomato') == index.search('tomato')
+
+    def test_snapshot_with_another_version_is_ignored(self, index, tmp_path):
+        path = tmp_path / 'search.json'
+        index.save_snapshot(path, datetime(2022, 12, 1, tzinfo=timezone.utc))
+        with patch.object(SearchIndex, 'SNAPSHOT_VERSION', 0):
+            assert SearchIndex().load_snapshot(path) is None
+        assert SearchIndex().load_snapshot(tmp_path / 'missing.json') is None
+
+
+def test_search_index_warm_starts_from_snapshot_and_catches_up(db, settings, tmp_path):
+    settings.RECIPES_SEARCH_SNAPSHOT = tmp_path / 'search.json'
+    kept = mixer.blend('recipes.Recipe', title='Tomato soup', description='Soup',
+                       ingredients=[{"name": "Tomato", "unit": "kg", "quantity": 1}])
+    removed = mixer.blend('recipes.Recipe', title='Tomato salad', description='Salad',
+                          ingredients=[{"name": "Tomato", "unit": "kg", "quantity": 1}])
+    index = SearchIndex()
+    index.ensure_built()
+    assert settings.RECIPES_SEARCH_SNAPSHOT.exists()
+
+    removed.delete()
+    added = mixer.blend('recipes.Recipe', title='Tomato pasta', description='Pasta',
+                        ingredients=[{"name": "Tomato", "unit": "kg", "quantity": 1}])
+    warm = SearchIndex()
+    with patch.object(SearchIndex, 'rebuild') as rebuild:
+        warm.ensure_built()
+        rebuild.assert_not_called()
+    assert {pk for pk, _ in warm.search('tomato')} == {kept.pk, added.pk}
+
+
+def test_search_index_rebuilds_from_a_snapshot_older_than_the_kept_deletions(db, settings, tmp_path):
+    settings.RECIPES_SEARCH_SNAPSHOT = tmp_path / 'search.json'
+    settings.RECIPES_TOMBSTONES = {'RETENTION_DAYS': 7}
+    SearchIndex().save_snapshot(settings.RECIPES_SEARCH_SNAPSHOT, datetime(2022, 12, 1, tzinfo=timezone.utc))
+    with patch.object(SearchIndex, 'rebuild') as rebuild, patch.object(SearchIndex, 'catch_up') as catch_up:
+        SearchIndex().ensure_built()
+    rebuild.assert_called_once()
+    catch_up.assert_not_called()
@@ -0,0 +1,123 @@
+import os
+import threading
+from unittest.mock import patch
+
+from mixer.backend.django import mixer
+
+from recipes import jobs
+from recipes.jobs import DurableJobStore, JobQueue, get_job_queue, shutdown_job_queue
+
+
+def test_job_queue_runs_submitted_jobs():
+    done = []
+    job_queue = JobQueue(done.append, workers=2).start()
+    for key in range(10):
+        job_queue.submit(key)
+    job_queue.shutdown()
+    assert sorted(done) == list(range(10))
+    assert job_queue.stats['completed'] == 10
+
+
+def test_job_queue_coalesces_pending_jobs_for_the_same_key():
+    release, done = threading.Event(), []
+    job_queue = JobQueue(lambda key: release.wait() and done.append(key), workers=1).start()
+    job_queue.submit('busy')
+    for _ in range(5):
+        job_queue.submit('recipe')
+    release.set()
+    job_queue.shutdown()
+    assert done == ['busy', 'recipe']
+    assert job_queue.stats['coalesced'] == 4
+
+
+def test_job_queue_runs_inline_when_full():
+    started, release, done = threading.Event(), threading.Event(), []
+
+    def handler(key):
+        if key == 'first':
+            started.set()
+            release.wait()
+        done.append(key)
+
+    job_queue = JobQueue(handler, workers=1, max_size=1).start()
+    job_queue.submit('first')
+    started.wait()
+    job_queue.submit('second')
+    job_queue.submit('third')
+    assert done == ['third']
+    release.set()
+    job_queue.shutdown()
+    assert job_queue.stats['inline'] == 1
+    assert done == ['third', 'first', 'second']
+
+
+def test_job_queue_survives_restarts_with_a_durable_store(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    store = DurableJobStore(path)
+    store.add(1)
+    store.add(2)
+    store.close()
+
+    done = []
+    job_queue = JobQueue(done.append, workers=1, store=DurableJobStore(path), key_type=int).start()
+    job_queue.shutdown()
+    assert done == [1, 2]
+    assert DurableJobStore(path).pending() == []
+
+
+def test_job_queue_keeps_failed_jobs_in_the_durable_store(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+
+    def fail(key):
+        raise RuntimeError(key)
+
+    job_queue = JobQueue(fail, workers=1, store=DurableJobStore(path)).start()
+    job_queue.submit('recipe')
+    job_queue.shutdown()
+    assert job_queue.stats['failed'] == 1
+    assert DurableJobStore(path).pending() == ['recipe']
+
+
+def test_job_queue_keeps_jobs_resubmitted_while_running_in_the_durable_store(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    second_run, release, runs = threading.Event(), threading.Event(), []
+
+    def handler(key):
+        runs.append(key)
+        if len(runs) == 1:
+            job_queue.submit(key)
+        else:
+            second_run.set()
+            release.wait()
+
+    job_queue = JobQueue(handler, workers=1, store=DurableJobStore(path)).start()
+    job_queue.submit('recipe')
+    second_run.wait()
+    assert DurableJobStore(path).pending() == ['recipe']
+    release.set()
+    job_queue.shutdown()
+    assert runs == ['recipe', 'recipe']
+    assert DurableJobStore(path).pending() == []
+
+
+def test_recipe_writes_are_queued_after_commit(db, settings, django_capture_on_commit_callbacks):
+    settings.RECIPES_BACKGROUND_JOBS = {'ENABLED': True}
+    with patch('recipes.signals.get_job_queue') as get_job_queue:
+        with django_capture_on_commit_callbacks(execute=True):
+            recipe = mixer.blend('recipes.Recipe', ingredients=[{"name": "Eggs", "unit": "g", "quantity": 40}])
+            get_job_queue.assert_not_called()
+        get_job_queue.return_value.submit.assert_called_once_with(recipe.pk)
+
+
+def test_forked_children_start_their_own_job_queue(settings):
+    settings.RECIPES_BACKGROUND_JOBS = {'ENABLED': True, 'WORKERS': 1}
+    parent_queue = get_job_queue(lambda key: None)
+    try:
+        child = os.fork()
+        if child == 0:
+            os._exit(0 if jobs._job_queue is None and get_job_queue(lambda key: None) is not parent_queue else 1)
+        _, status = os.waitpid(child, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert get_job_queue(lambda key: None) is parent_queue
+    finally:
+        shutdown_job_queue()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import sqlite3
+from contextlib import closing
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.servers.basehttp import WSGIServer
+from django.test.testcases import LiveServerThread
+from mixer.backend.django import mixer
+
+from recipes.loadtest import DEFAULT_MIX, parse_mix, percentile, run_load_test
+from recipes.management.commands.loadtest import ensure_users
+from recipes.models import Recipe
+
+
+class SerialWSGIServer(WSGIServer):
+    def __init__(self, *args, connections_override=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def serial_live_server():
+    with patch.object(LiveServerThread, 'server_class', SerialWSGIServer):
+        yield
+
+
+def test_mix_and_percentiles_are_parsed():
+    assert parse_mix('recipes-search=3, personal-area-create=1') == {'recipes-search': 3, 'personal-area-create': 1}
+    for mix in ['recipes-search', 'unknown=1', 'recipes-search=0']:
+        with pytest.raises(ValueError):
+            parse_mix(mix)
+    ordered = list(range(1, 101))
+    assert [percentile(ordered, rank) for rank in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert percentile([], 50) is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_load_test_reports_every_endpoint_of_the_mix(live_server):
+    credentials = ensure_users('loadtest', 3, 'load-test-Passw0rd')
+    report = asyncio.run(run_load_test(live_server.url, credentials, DEFAULT_MIX, duration=30, requests=15, seed=1))
+    assert report['users'] == 3 and report['total']['requests'] == 3 * 17
+    assert report['total']['errors'] == 0, report['endpoints']
+    assert {'auth-login', 'personal-area-create'} <= set(report['endpoints'])
+    latency = report['endpoints']['auth-login']['latency_ms']
+    assert latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max']
+    assert Recipe.objects.filter(author__username__startswith='loadtest-').count() >= 3
+    assert json.loads(json.dumps(report)) == report
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_targets_a_running_server(live_server, tmp_path):
+    ensure_users('loadtest', 2, 'load-test-Passw0rd')
+    output = tmp_path / 'report.json'
+    call_command('loadtest', url=live_server.url, users=2, requests=3, mix='recipes-list=1,personal-area-list=1',
+                 output=str(output), stdout=StringIO())
+    report = json.loads(output.read_text())
+    assert report['target'] == live_server.url and report['total']['requests'] == 2 * 5
+    assert set(report['endpoints']) <= {'auth-login', 'personal-area-create', 'recipes-list', 'personal-area-list'}
+    with pytest.raises(CommandError):
+        call_command('loadtest', url=live_server.url, mix='recipes-list=a')
+
+
+@pytest.mark.django_db
+def test_command_with_url_leaves_local_users_alone():
+    user = get_user_model().objects.create_user('loadtest-0', password='kept-Passw0rd', is_active=False)
+    report = {'total': {'requests': 0}}
+    with patch('recipes.management.commands.loadtest.run_load_test', MagicMock()) as load_test, \
+            patch('recipes.management.commands.loadtest.asyncio.run', return_value=report):
+        call_command('loadtest', url='http://recipes.example.com', users=2, requests=1, stdout=StringIO())
+    user.refresh_from_db()
+    assert not user.is_active and user.check_password('kept-Passw0rd')
+    assert not get_user_model().objects.filter(username='loadtest-1').exists()
+    assert load_test.call_args.args[1] == [('loadtest-0', 'load-test-Passw0rd'), ('loadtest-1', 'load-test-Passw0rd')]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_starts_and_stops_a_local_server_on_a_copy_by_default():
+    recipe = mixer.blend(Recipe, ingredients=[{"name": "Eggs", "unit": "g", "quantity": 40}])
+    server, copies = MagicMock(), {}
+    report = {'total': {'requests': 0}}
+
+    def start(command, **kwargs):
+        directory = kwargs['env']['PYTHONPATH'].split(os.pathsep)[0]
+        copies['directory'] = directory
+        with closing(sqlite3.connect(os.path.join(directory, 'default.sqlite3'))) as copy:
+            copies['users'] = sorted(name for name, in copy.execute(
+                "SELECT username FROM auth_user WHERE username LIKE 'loadtest-%' AND is_active"))
+            copies['recipes'] = [pk for pk, in copy.execute('SELECT id FROM recipes_recipe')]
+        copies['settings'] = open(os.path.join(directory, 'loadtest_settings.py'), encoding='utf-8').read()
+        return server
+
+    with patch('recipes.management.commands.loadtest.subprocess.Popen', side_effect=start) as popen, \
+            patch('recipes.management.commands.loadtest.wait_for') as wait_for, \
+            patch('recipes.management.commands.loadtest.run_load_test', MagicMock()) as load_test, \
+            patch('recipes.management.commands.loadtest.asyncio.run', return_value=report):
+        call_command('loadtest', users=2, requests=1, workers=3, stdout=StringIO())
+    command = popen.call_args.args[0]
+    assert command[2:4] == ['serve', '--bind'] and command[-2:] == ['--workers', '3']
+    assert popen.call_args.kwargs['env']['DJANGO_SETTINGS_MODULE'] == 'loadtest_settings'
+    port = int(command[4].rsplit(':', 1)[1])
+    wait_for.assert_called_once_with(port, server)
+    assert load_test.call_args.args[0] == f'http://127.0.0.1:{port}'
+    server.send_signal.assert_called_once()
+    server.wait.assert_called_once()
+    assert copies['users'] == ['loadtest-0', 'loadtest-1'] and copies['recipes'] == [recipe.pk]
+    assert 'search-index.json' in copies['settings']
+    assert not os.path.exists(copies['directory'])
+    assert not get_user_model().objects.filter(username__startswith='loadtest-').exists()
@@ -102,6 +102,12 @@ def test_recipe_ingredients_dont_contain_duplicates(db):
         recipe.full_clean()
 
 
+def test_recipe_ingredients_can_differ_only_in_case(db):
+    recipe = mixer.blend('recipes.Recipe', title='Test', description='TEST', ingredients=[
+        {"name": "Banana", "unit": "g", "quantity": 40}, {"name": "banana", "unit": "g", "quantity": 40}])
+    recipe.full_clean()
+
+
 def test_recipe_ingredients_quantity_of_1001_raise_exception(db):
     recipe = mixer.blend('recipes.Recipe', title='Test', description='TEST', ingredients=[{
         "name": "test",
@@ -162,3 +168,11 @@ def test_recipe_str_return_title(db, ingredient):
     recipe = mixer.blend('recipes.Recipe', title='A title', description='My description', ingredients=ingredient)
     recipe.full_clean()
     assert recipe.__str__() == "A title"
+
+
+def test_recipe_full_clean_reports_every_ingredient_error(db):
+    recipe = mixer.blend('recipes.Recipe', title='Test', description='TEST',
+                         ingredients=[{"name": "Eggs", "unit": "lt", "quantity": 0}])
+    with pytest.raises(ValidationError) as error:
+        recipe.full_clean()
+    assert len(error.value.message_dict['ingredients']) == 2
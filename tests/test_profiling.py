@@ -0,0 +1,50 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+
+
+@pytest.fixture()
+def profiles(settings, tmp_path):
+    settings.RECIPES_PROFILING = {'DIRECTORY': tmp_path, 'SAMPLING': False, 'ROWS': 10}
+    return tmp_path
+
+
+@pytest.fixture()
+def superuser(db):
+    return get_user_model().objects.create_superuser('root', 'root@example.com', 'root')
+
+
+def test_superuser_request_with_header_is_profiled(profiles, superuser):
+    mixer.cycle(3).blend(Recipe)
+    client = APIClient()
+    client.force_login(superuser)
+    response = client.get(reverse('recipes-list'), HTTP_X_PROFILE='1')
+    assert response.status_code == 200
+    assert response['Server-Timing'].startswith('total;dur=')
+    name = response['X-Profile-Report']
+    report = (profiles / f'{name}.txt').read_text()
+    assert report.startswith('GET /api/v1/recipes/ -> 200')
+    assert 'FROM "recipes_recipe"' in report
+    assert 'cumulative' in report
+    assert (profiles / f'{name}.prof').exists()
+
+
+def test_token_superuser_can_profile_with_query_flag(profiles, superuser):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=superuser).key}')
+    response = client.get(reverse('recipes-list'), {'profile': '1'})
+    assert 'X-Profile-Report' in response
+
+
+def test_other_users_and_unflagged_requests_are_not_profiled(profiles, superuser):
+    client = APIClient()
+    client.force_login(mixer.blend(get_user_model(), is_staff=True))
+    assert 'X-Profile-Report' not in client.get(reverse('recipes-list'), HTTP_X_PROFILE='1')
+    client.force_login(superuser)
+    assert 'X-Profile-Report' not in client.get(reverse('recipes-list'))
+    assert not any(profiles.iterdir())
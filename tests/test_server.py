@@ -0,0 +1,127 @@
+import signal
+import socket
+import threading
+import time
+import urllib.request
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.apps import apps
+from mixer.backend.django import mixer
+
+from recipes.counts import generation
+from recipes.indexes import autocomplete_index
+from recipes.models import Recipe
+from recipes.server import PreforkServer, WorkerServer
+from recipes.warmup import IndexSync, warm_up
+
+
+BANANA = [{"name": "Banana", "unit": "g", "quantity": 1}]
+
+
+def hello(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [environ['PATH_INFO'].encode()]
+
+
+def test_worker_server_handles_requests_on_a_shared_listener():
+    listener = socket.create_server(('127.0.0.1', 0))
+    server = WorkerServer(listener, hello)
+    worker = threading.Thread(target=server.handle_request)
+    worker.start()
+    port = listener.getsockname()[1]
+    assert urllib.request.urlopen(f'http://127.0.0.1:{port}/ping', timeout=5).read() == b'/ping'
+    worker.join()
+    listener.close()
+
+
+def test_idle_workers_keep_polling_the_index_sync():
+    server = PreforkServer(hello, '127.0.0.1', 0, workers=1, max_requests=1, index_refresh=0.01)
+    port = server.bind().getsockname()[1]
+    with patch('recipes.server.warm_connections'), patch('recipes.server.IndexSync') as index_sync:
+        worker = threading.Thread(target=server.work)
+        worker.start()
+        time.sleep(0.2)
+        idle_polls = index_sync.return_value.poll.call_count
+        assert urllib.request.urlopen(f'http://127.0.0.1:{port}/ping', timeout=5).read() == b'/ping'
+        worker.join(5)
+    server.listener.close()
+    assert idle_polls >= 2
+    assert not worker.is_alive()
+
+
+def test_workers_are_recycled_after_max_requests_with_jitter():
+    server = PreforkServer(hello, '127.0.0.1', 0, workers=1, max_requests=10, max_requests_jitter=5)
+    assert all(10 <= len(server.requests_budget()) <= 15 for _ in range(20))
+    unlimited = PreforkServer(hello, '127.0.0.1', 0, workers=1, max_requests=0).requests_budget()
+    assert next(unlimited) == 0
+
+
+def test_master_backs_off_and_gives_up_when_workers_crash_on_startup():
+    server = PreforkServer(hello, '127.0.0.1', 0, workers=1)
+    server.bind()
+    handlers = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+    try:
+        with patch.object(PreforkServer, 'work', side_effect=RuntimeError('broken settings')), \
+                patch('recipes.server.logger'), patch('recipes.server.time.sleep') as sleep:
+            server.run()
+    finally:
+        signal.signal(signal.SIGTERM, handlers[0])
+        signal.signal(signal.SIGINT, handlers[1])
+    assert server.failed and not server.children
+    assert [delay for (delay,), _ in sleep.call_args_list] == [0.1, 0.2, 0.4, 0.8]
+
+
+def test_warm_up_builds_every_index(db):
+    mixer.blend('recipes.Recipe', title='Banana bread', ingredients=[{"name": "Banana", "unit": "g", "quantity": 1}])
+    timings = warm_up()
+    assert {'urls', 'autocomplete', 'pantry', 'search'} <= set(timings)
+    assert autocomplete_index.memory_report()['built']
+
+
+def test_ready_warms_up_only_when_enabled(settings):
+    with patch('recipes.warmup.warm_up') as warm:
+        apps.get_app_config('recipes').ready()
+        warm.assert_not_called()
+        settings.RECIPES_WARM_UP = True
+        apps.get_app_config('recipes').ready()
+        warm.assert_called_once()
+
+
+def test_index_sync_catches_up_with_writes_from_other_workers(db):
+    kept = mixer.blend('recipes.Recipe', title='Banana bread', ingredients=BANANA)
+    removed = mixer.blend('recipes.Recipe', title='Banana split', ingredients=BANANA)
+    autocomplete_index.ensure_built()
+    sync = IndexSync(interval=0)
+    with patch('recipes.signals.registry', []):
+        removed.delete()
+        mixer.blend('recipes.Recipe', title='Banana pancakes',
+                    ingredients=[{"name": "Banana", "unit": "g", "quantity": 1}])
+    assert len(autocomplete_index.complete('title', 'banana')) == 2
+
+    sync.poll()
+    titles = [match['value'] for match in autocomplete_index.complete('title', 'banana')]
+    assert sorted(titles) == [kept.title, 'Banana pancakes']
+
+
+def test_index_sync_replays_writes_committed_behind_the_cursor(db):
+    autocomplete_index.ensure_built()
+    sync = IndexSync(interval=0)
+    with patch('recipes.signals.registry', []):
+        newer = mixer.blend('recipes.Recipe', title='Banana bread', ingredients=BANANA)
+        sync.poll()
+        late = mixer.blend('recipes.Recipe', title='Banana split', ingredients=BANANA)
+        Recipe.objects.filter(pk=late.pk).update(modified_at=newer.modified_at - timedelta(seconds=1))
+    sync.poll()
+    titles = [match['value'] for match in autocomplete_index.complete('title', 'banana')]
+    assert sorted(titles) == ['Banana bread', 'Banana split']
+
+
+def test_index_sync_expires_counts_cached_before_writes_from_other_workers(db):
+    sync = IndexSync(interval=0)
+    before = generation()
+    with patch('recipes.signals.invalidate_counts'):
+        mixer.blend('recipes.Recipe', title='Banana bread', ingredients=BANANA)
+    assert generation() == before
+    sync.poll()
+    assert generation() > before
@@ -0,0 +1,192 @@
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_404_NOT_FOUND, \
+    HTTP_503_SERVICE_UNAVAILABLE
+from rest_framework.test import APIClient
+
+from recipes.admin import RecipeAdmin
+from recipes.indexes import duplicate_index
+from recipes.models import Recipe, RecipeTombstone, ShardMove
+from recipes.sharding import Case, forget_shard_layouts, layout_balanced, move_author, recipe_ids, shard_for
+
+SHARDS = ['shard_a', 'shard_b']
+EGGS = [{"name": "Eggs", "unit": "g", "quantity": 100}]
+
+
+@pytest.fixture()
+def shards(settings, tmp_path, db):
+    for alias in SHARDS:
+        connections.settings[alias] = dict(connections.settings[DEFAULT_DB_ALIAS],
+                                           NAME=str(tmp_path / f'{alias}.sqlite3'))
+    settings.RECIPES_SHARDS = SHARDS
+    recipe_ids.reset()
+    forget_shard_layouts()
+    for alias in SHARDS:
+        call_command('migrate', database=alias, verbosity=0)
+        connections[alias].close()
+    yield SHARDS
+    recipe_ids.reset()
+    forget_shard_layouts()
+    for alias in SHARDS:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+@pytest.fixture()
+def authors(db):
+    return [mixer.blend(get_user_model()) for _ in range(4)]
+
+
+def stored_on(alias):
+    return sorted(Recipe.objects.using(alias).values_list('pk', flat=True))
+
+
+def test_recipes_are_stored_on_the_shard_of_their_author(shards, authors):
+    recipes = [mixer.blend(Recipe, author=author, title='Omelette', ingredients=EGGS) for author in authors]
+    for recipe in recipes:
+        assert recipe._state.db == shard_for(recipe.author_id)
+    assert sorted(stored_on('shard_a') + stored_on('shard_b')) == [recipe.pk for recipe in recipes]
+    assert stored_on('shard_a') and stored_on('shard_b')
+    assert not Recipe.objects.using(DEFAULT_DB_ALIAS).exists()
+
+
+def test_public_lists_fan_out_and_merge_in_order(shards, authors):
+    for author, title in zip(authors, ['Pizza', 'apple pie', 'Bread', 'carbonara']):
+        mixer.blend(Recipe, author=author, title=title, ingredients=EGGS)
+    client = APIClient()
+    response = client.get(reverse('recipes-sort-title'))
+    assert response.status_code == HTTP_200_OK
+    assert [recipe['title'] for recipe in response.json()] == ['apple pie', 'Bread', 'carbonara', 'Pizza']
+    assert [recipe['author'] for recipe in response.json()][0] == authors[1].username
+    assert client.get(reverse('recipes-list'), {'count': 'only'}).json() == {'count': 4}
+    response = client.get(reverse('recipes-query'), {'author': authors[2].username})
+    assert [recipe['title'] for recipe in response.json()] == ['Bread']
+
+
+def test_personal_area_of_an_author_hits_a_single_shard(shards, authors):
+    call_command('rebalance_shards', verbosity=0)
+    duplicate_index.ensure_built()
+    client = APIClient()
+    client.force_login(authors[0])
+    own = shard_for(authors[0].pk)
+    other = next(alias for alias in shards if alias != own)
+    with CaptureQueriesContext(connections[own]) as hit, CaptureQueriesContext(connections[other]) as missed:
+        response = client.post(reverse('personal-area-list'), {'title': 'Omelette', 'description': 'Beat the eggs',
+                                                               'ingredients': EGGS}, format='json')
+        assert response.status_code == HTTP_201_CREATED
+        pk = response.json()['id']
+        assert client.get(reverse('personal-area-list')).json()[0]['id'] == pk
+        assert client.get(reverse('personal-area-detail', args=[pk])).status_code == HTTP_200_OK
+    assert hit.captured_queries and not missed.captured_queries
+
+
+def test_moderation_finds_recipes_on_every_shard(shards, authors):
+    recipes = [mixer.blend(Recipe, author=author, title='Omelette', ingredients=EGGS) for author in authors]
+    client = APIClient()
+    client.force_login(get_user_model().objects.create_superuser('root', 'root@example.com', 'root'))
+    assert client.delete(reverse('personal-area-detail', args=[recipes[1].pk])).status_code == HTTP_204_NO_CONTENT
+    assert APIClient().get(reverse('recipes-detail', args=[recipes[1].pk])).status_code == HTTP_404_NOT_FOUND
+    response = client.delete(reverse('personal-area-bulk-delete'), {'ids': [recipes[0].pk, recipes[2].pk]},
+                             format='json')
+    assert response.json()['deleted'] == 2
+    assert [recipe['id'] for recipe in APIClient().get(reverse('recipes-list')).json()] == [recipes[3].pk]
+
+
+def test_admin_lists_and_opens_recipes_on_every_shard(shards, authors, client):
+    recipes = [mixer.blend(Recipe, author=author, title=f'Omelette {position}', ingredients=EGGS)
+               for position, author in enumerate(authors)]
+    newest_first = [recipe.pk for recipe in reversed(recipes)]
+    client.force_login(get_user_model().objects.create_superuser('root', 'root@example.com', 'root'))
+    path = reverse('admin:recipes_recipe_changelist')
+    response = client.get(path)
+    assert [recipe.pk for recipe in response.context['cl'].result_list] == newest_first
+    assert response.context['cl'].result_count == len(recipes)
+    with patch.object(RecipeAdmin, 'list_per_page', 3):
+        assert [recipe.pk for recipe in client.get(path, {'p': 2}).context['cl'].result_list] == newest_first[3:]
+    assert [recipe.pk for recipe in client.get(path, {'q': authors[2].username}).context['cl'].result_list] == \
+           [recipes[2].pk]
+    response = client.get(reverse('admin:recipes_recipe_change', args=[recipes[1].pk]))
+    assert response.status_code == 200 and response.context['original'].pk == recipes[1].pk
+
+
+def test_rebalance_moves_recipes_to_the_shard_of_their_author(settings, shards, authors):
+    settings.RECIPES_SHARDS = []
+    recipes = [mixer.blend(Recipe, author=author, title='Omelette', ingredients=EGGS) for author in authors]
+    settings.RECIPES_SHARDS = shards
+    call_command('rebalance_shards', '--dry-run', verbosity=0)
+    assert Recipe.objects.using(DEFAULT_DB_ALIAS).count() == 4
+
+    call_command('rebalance_shards', '--batch-size', '1', verbosity=0)
+    assert not Recipe.objects.using(DEFAULT_DB_ALIAS).exists()
+    for recipe in recipes:
+        moved = Recipe.objects.using(shard_for(recipe.author_id)).get(pk=recipe.pk)
+        assert (moved.title, moved.ingredients, moved.modified_at) == (recipe.title, recipe.ingredients,
+                                                                        recipe.modified_at)
+    assert len(APIClient().get(reverse('recipes-list')).json()) == 4
+
+
+def test_authors_see_their_recipes_until_the_new_layout_is_rebalanced(settings, shards, authors):
+    settings.RECIPES_SHARDS = []
+    recipe = mixer.blend(Recipe, author=authors[0], title='Omelette', ingredients=EGGS)
+    settings.RECIPES_SHARDS = shards
+    client = APIClient()
+    client.force_login(authors[0])
+    assert not layout_balanced()
+    assert [mine['id'] for mine in client.get(reverse('personal-area-list')).json()] == [recipe.pk]
+
+    call_command('rebalance_shards', verbosity=0)
+    assert layout_balanced()
+    assert [mine['id'] for mine in client.get(reverse('personal-area-list')).json()] == [recipe.pk]
+
+
+def test_writes_are_refused_while_their_author_is_moving(shards, authors):
+    recipe = mixer.blend(Recipe, author=authors[0], title='Omelette', ingredients=EGGS)
+    client = APIClient()
+    client.force_login(authors[0])
+    ShardMove.objects.create(author_id=authors[0].pk, source='default', target=recipe._state.db)
+    response = client.patch(reverse('personal-area-detail', args=[recipe.pk]), {'title': 'Frittata'}, format='json')
+    assert response.status_code == HTTP_503_SERVICE_UNAVAILABLE
+    assert response['Retry-After'] == '1'
+    assert Recipe.objects.using(recipe._state.db).get(pk=recipe.pk).title == 'Omelette'
+
+    ShardMove.objects.all().delete()
+    response = client.patch(reverse('personal-area-detail', args=[recipe.pk]), {'title': 'Frittata'}, format='json')
+    assert response.status_code == HTTP_200_OK
+
+
+def test_moves_recopy_rows_written_during_the_copy(settings, shards, authors):
+    settings.RECIPES_SHARDS = []
+    recipe = mixer.blend(Recipe, author=authors[0], title='Omelette', ingredients=EGGS)
+    settings.RECIPES_SHARDS = shards
+    target = shard_for(authors[0].pk)
+    writes = []
+
+    def write_during_copy(*args, **kwargs):
+        if not writes:
+            writes.append(Recipe.objects.using(DEFAULT_DB_ALIAS).filter(pk=recipe.pk).update(title='Frittata',
+                                                                                     modified_at=timezone.now()))
+        return Case(*args, **kwargs)
+
+    with patch('recipes.sharding.Case', side_effect=write_during_copy):
+        assert move_author(authors[0].pk, DEFAULT_DB_ALIAS, target, batch_size=10) == 1
+    assert writes == [1]
+    assert Recipe.objects.using(target).get(pk=recipe.pk).title == 'Frittata'
+    assert not Recipe.objects.using(DEFAULT_DB_ALIAS).exists()
+    assert not ShardMove.objects.exists()
+
+
+def test_deleting_an_author_deletes_their_recipes_on_every_shard(shards, authors):
+    recipes = [mixer.blend(Recipe, author=authors[0], title='Omelette', ingredients=EGGS) for _ in range(2)]
+    post_delete.send(sender=get_user_model(), instance=authors[0], using=DEFAULT_DB_ALIAS, origin=authors[0])
+    assert not any(Recipe.objects.using(alias).filter(author_id=authors[0].pk).exists() for alias in shards)
+    assert set(RecipeTombstone.objects.values_list('recipe_id', flat=True)) == {recipe.pk for recipe in recipes}
@@ -0,0 +1,23 @@
+from unittest.mock import patch
+
+from recipes.shopping import flatten, normalize, sum_by_group
+
+
+def test_flatten_groups_by_case_folded_name_and_base_unit():
+    rows = [(1, [{"name": "Milk", "unit": "l", "quantity": 1}, {"name": "Flour", "unit": "kg", "quantity": 1}]),
+            (2, [{"name": "milk", "unit": "cup", "quantity": 2}, {"name": "Flour", "unit": "n/a", "quantity": 3}])]
+    keys, names, group_ids, amounts, factors = flatten(rows, {1: 1, 2: 0.5})
+    assert keys == [('milk', 'ml'), ('flour', 'g'), ('flour', 'n/a')]
+    assert group_ids == [0, 1, 0, 2]
+    assert sum_by_group(len(keys), group_ids, amounts, factors) == [1250.0, 1000.0, 1.5]
+
+
+def test_sum_by_group_without_numpy():
+    with patch('recipes.shopping.numpy', None):
+        assert sum_by_group(2, [0, 1, 0], [1, 2, 3], [10, 1, 1]) == [13.0, 2.0]
+
+
+def test_normalize_uses_the_larger_unit_when_possible():
+    assert normalize(1500, 'g') == (1.5, 'kg')
+    assert normalize(999, 'ml') == (999, 'ml')
+    assert normalize(2000, 'n/a') == (2000, 'n/a')
@@ -0,0 +1,25 @@
+import logging
+from logging.handlers import RotatingFileHandler
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from recipes import slowlog
+
+
+def test_installing_the_slow_query_log_twice_reuses_the_log_and_its_handler(settings, tmp_path):
+    settings.RECIPES_SLOW_QUERIES = {'THRESHOLD_MS': 50, 'LOG_PATH': tmp_path / 'slow.log'}
+    logger = logging.getLogger('recipes.slow_queries')
+    with patch('recipes.slowlog.slow_query_log', None), patch.object(logger, 'handlers', []):
+        first = slowlog.install_slow_query_log()
+        try:
+            assert slowlog.install_slow_query_log() is first
+            assert len([handler for handler in logger.handlers if isinstance(handler, RotatingFileHandler)]) == 1
+            connection_created.send(sender=type(connection), connection=connection)
+            assert first in connection.execute_wrappers
+        finally:
+            connection_created.disconnect(dispatch_uid='recipes.slow_query_log')
+            connection.execute_wrappers.remove(first)
+            for handler in logger.handlers:
+                handler.close()
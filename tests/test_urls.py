@@ -1,16 +1,31 @@
+import gzip
 import json
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch, Mock
 
 import pytest
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from mixer.backend.django import mixer
+from rest_framework.response import Response
+from rest_framework.schemas.coreapi import SchemaGenerator
 from rest_framework.status import HTTP_403_FORBIDDEN, HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, \
-    HTTP_500_INTERNAL_SERVER_ERROR, HTTP_405_METHOD_NOT_ALLOWED, HTTP_404_NOT_FOUND, HTTP_204_NO_CONTENT
+    HTTP_500_INTERNAL_SERVER_ERROR, HTTP_405_METHOD_NOT_ALLOWED, HTTP_404_NOT_FOUND, HTTP_204_NO_CONTENT, \
+    HTTP_410_GONE
 from rest_framework.test import APIClient
 
+from Secure_Recipe_Django.docs import lazy_view
+from recipes.slowlog import SlowQueryLog
+from recipes.models import Recipe, RecipeTombstone
+
 
 @pytest.fixture()
 def admin(db):
@@ -93,6 +108,31 @@ class TestUserRecipeViewSet:
         response = client.get(path)
         assert response.status_code == HTTP_200_OK
 
+    def test_filter_by_author_matches_the_whole_username_ignoring_case(self, db):
+        chef = mixer.blend(get_user_model(), username='Chef')
+        mixer.blend(get_user_model(), username='chefina')
+        recipe = mixer.blend('recipes.Recipe', author=chef, ingredients=[{"name": "Eggs", "unit": "g", "quantity": 40}])
+        client = get_client()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('recipes-filter-author', kwargs={'name': 'cHEF'}))
+        assert response.status_code == HTTP_200_OK
+        assert [item['id'] for item in response.data] == [recipe.pk]
+        assert len(queries.captured_queries) == 1
+        response = client.get(reverse('recipes-filter-author', kwargs={'name': 'che'}))
+        assert response.status_code == HTTP_404_NOT_FOUND
+
+    def test_filter_by_author_prefix_mode(self, db):
+        first = mixer.blend('recipes.Recipe', author=mixer.blend(get_user_model(), username='Chef'),
+                            ingredients=[{"name": "Eggs", "unit": "g", "quantity": 40}])
+        second = mixer.blend('recipes.Recipe', author=mixer.blend(get_user_model(), username='chefina'),
+                             ingredients=[{"name": "Eggs", "unit": "g", "quantity": 40}])
+        mixer.blend('recipes.Recipe', author=mixer.blend(get_user_model(), username='chez'),
+                    ingredients=[{"name": "Eggs", "unit": "g", "quantity": 40}])
+        path = reverse('recipes-filter-author', kwargs={'name': 'CHEF'})
+        response = get_client().get(path, {'match': 'prefix'})
+        assert [item['id'] for item in response.data] == [first.pk, second.pk]
+        assert get_client().get(path, {'match': 'contains'}).status_code == HTTP_400_BAD_REQUEST
+
     def test_anon_user_can_filter_by_title(self, recipes):
         path = reverse('recipes-filter-title', kwargs={'title': 'My first recipe'})
         client = get_client()
@@ -211,6 +251,17 @@ class TestUserRecipeViewSet:
         response = client.post(path, recipe, format='json')
         assert response.status_code == HTTP_400_BAD_REQUEST
 
+    def test_logged_user_gets_every_validation_error_at_once(self, recipes):
+        path = reverse('personal-area-list')
+        client = get_client(mixer.blend(get_user_model()))
+        recipe = {'title': "Test 1", 'description': 'My test recipe',
+                  'ingredients': [{"name": "Eggs", "unit": "lt", "quantity": 0},
+                                  {"name": "Eggs", "unit": "g", "quantity": 40}]}
+        response = client.post(path, recipe, format='json')
+        assert response.status_code == HTTP_400_BAD_REQUEST
+        assert set(response.data) == {'title', 'ingredients'}
+        assert len(response.data['ingredients']) == 3
+
     def test_logged_user_cant_post_recipe_without_at_least_one_ingredient(self, recipes):
         path = reverse('personal-area-list')
         user = mixer.blend(get_user_model())
@@ -339,7 +390,7 @@ class TestUserRecipeViewSet:
         assert non_response.status_code == HTTP_404_NOT_FOUND
         assert response.status_code == HTTP_404_NOT_FOUND
 
-    @patch('recipes.views.JsonHandler.create_recipe_from_json', side_effect=ValidationError("ERROR"))
+    @patch('recipes.domain.JsonHandler.create_recipe_from_json', side_effect=ValidationError("ERROR"))
     def test_every_user_if_there_was_internal_error_then_it_is_notified(self, mock: Mock, recipes):
         path = reverse('recipes-filter-ingredient', kwargs={'name': 'eggs'})
         user = mixer.blend(get_user_model())
@@ -427,3 +478,578 @@ class TestUserRecipeViewSet:
         assert response.status_code == HTTP_200_OK
         obj = parse(response)
         assert obj['type-account'] == 2
+
+    def test_every_user_can_choose_the_fields_of_the_recipes(self, recipes):
+        path = reverse('recipes-list')
+        client = get_client()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path, {'fields': 'id,title,author'})
+        assert response.status_code == HTTP_200_OK
+        obj = parse(response)
+        assert all(set(recipe) == {'id', 'title', 'author'} for recipe in obj)
+        assert len(queries) == 1
+        assert 'description' not in queries[0]['sql'] and 'ingredients' not in queries[0]['sql']
+
+    def test_every_user_can_choose_the_fields_when_sorting_recipes(self, recipes):
+        path = reverse('recipes-sort-title')
+        client = get_client()
+        response = client.get(path, {'fields': 'title'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response)[0] == {'title': 'My first recipe'}
+
+    def test_every_user_can_choose_the_fields_when_filtering_by_ingredient(self, recipes):
+        path = reverse('recipes-filter-ingredient', kwargs={'name': 'eggs'})
+        client = get_client()
+        response = client.get(path, {'fields': 'id'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'id': recipes[0].pk}]
+
+    def test_every_user_cant_choose_unknown_fields(self, recipes):
+        path = reverse('recipes-list')
+        client = get_client()
+        response = client.get(path, {'fields': 'id,password'})
+        assert response.status_code == HTTP_400_BAD_REQUEST
+
+    def test_logged_user_cant_choose_the_updated_at_field(self, recipes):
+        path = reverse('personal-area-list')
+        client = get_client(recipes[0].author)
+        response = client.get(path, {'fields': 'id,updated_at'})
+        assert response.status_code == HTTP_400_BAD_REQUEST
+
+    def test_admin_can_choose_the_updated_at_field(self, recipes, admin):
+        path = reverse('recipes-detail', kwargs={'pk': recipes[0].pk})
+        client = get_client(admin)
+        response = client.get(path, {'fields': 'id,updated_at'})
+        assert response.status_code == HTTP_200_OK
+        assert set(parse(response)) == {'id', 'updated_at'}
+
+    def test_every_user_can_combine_filters_in_a_single_query(self, recipes):
+        path = reverse('recipes-query')
+        client = get_client()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path, {'author': recipes[0].author.username, 'title': 'recipe',
+                                         'ingredient': 'tomato', 'sort': '-title'})
+        assert response.status_code == HTTP_200_OK
+        assert [recipe['id'] for recipe in parse(response)] == [recipes[2].pk]
+        assert len(queries) == 1
+
+    def test_every_user_can_query_by_author_regardless_of_case(self, recipes):
+        path = reverse('recipes-query')
+        client = get_client()
+        response = client.get(path, {'author': recipes[0].author.username.swapcase(), 'fields': 'id'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'id': recipes[0].pk}, {'id': recipes[2].pk}]
+
+    def test_every_user_can_query_by_a_non_ascii_ingredient_regardless_of_case(self, recipes):
+        creme = mixer.blend('recipes.Recipe', title='Dessert', description='Whip it',
+                            ingredients=[{"name": "CRÈME", "unit": "g", "quantity": 40}])
+        path = reverse('recipes-query')
+        client = get_client()
+        response = client.get(path, {'ingredient': 'crème', 'fields': 'id'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'id': creme.pk}]
+
+        sauce = mixer.blend('recipes.Recipe', title='Sauce', description='Stir it',
+                            ingredients=[{"name": "Weißwein", "unit": "ml", "quantity": 100}])
+        response = client.get(path, {'ingredient': 'WEISSWEIN', 'fields': 'id'})
+        assert parse(response) == [{'id': sauce.pk}]
+
+    def test_every_user_can_sort_the_query_results(self, recipes):
+        path = reverse('recipes-query')
+        client = get_client()
+        response = client.get(path, {'title': 'recipe', 'sort': '-title', 'fields': 'title'})
+        assert response.status_code == HTTP_200_OK
+        assert [recipe['title'] for recipe in parse(response)] == ['My third recipe', 'My second recipe',
+                                                                   'My first recipe']
+
+    def test_every_user_can_query_by_creation_date_range(self, recipes):
+        path = reverse('recipes-query')
+        client = get_client()
+        today = recipes[0].created_at.isoformat()
+        response = client.get(path, {'created_from': today, 'created_to': today})
+        assert response.status_code == HTTP_200_OK
+        assert len(parse(response)) == len(recipes)
+        response = client.get(path, {'created_to': '2000-01-01'})
+        assert response.status_code == HTTP_404_NOT_FOUND
+
+    def test_every_user_must_enter_valid_query_parameters(self, recipes):
+        path = reverse('recipes-query')
+        client = get_client()
+        for params in [{'title': 'I0NV4L1D'}, {'ingredient': 'I0NV4L1D'}, {'author': '!!!!PROVA!!!!'},
+                       {'created_from': 'yesterday'}, {'sort': 'author'}]:
+            response = client.get(path, params)
+            assert response.status_code == HTTP_400_BAD_REQUEST
+
+    def test_every_user_can_autocomplete_ingredients(self, recipes):
+        mixer.blend('recipes.Recipe', title='Omelette', description='Omelette',
+                    ingredients=[{"name": "eggs", "unit": "n/a", "quantity": 2},
+                                 {"name": "Emmental", "unit": "g", "quantity": 50}])
+        path = reverse('recipes-autocomplete')
+        client = get_client()
+        response = client.get(path, {'q': 'E'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'value': 'Eggs', 'recipes': 2}, {'value': 'Emmental', 'recipes': 1}]
+
+    def test_every_user_can_autocomplete_titles(self, recipes):
+        path = reverse('recipes-autocomplete')
+        client = get_client()
+        response = client.get(path, {'q': 'my t', 'kind': 'title'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'value': 'My third recipe', 'recipes': 1}]
+
+    def test_autocomplete_follows_recipe_changes(self, recipes):
+        path = reverse('recipes-autocomplete')
+        client = get_client()
+        assert parse(client.get(path, {'q': 'tom'})) == [{'value': 'Tomato', 'recipes': 1}]
+        recipes[2].ingredients = [{"name": "Potato", "unit": "kg", "quantity": 1}]
+        recipes[2].save()
+        assert parse(client.get(path, {'q': 'tom'})) == []
+        recipes[2].delete()
+        assert parse(client.get(path, {'q': 'pot'})) == []
+
+    def test_every_user_must_enter_a_valid_autocomplete_request(self):
+        path = reverse('recipes-autocomplete')
+        client = get_client()
+        for params in [{'q': ''}, {'q': 'e99'}, {'q': 'egg', 'kind': 'author'}, {'q': 'egg', 'limit': '0'}]:
+            response = client.get(path, params)
+            assert response.status_code == HTTP_400_BAD_REQUEST
+
+    def test_admin_can_read_the_index_memory_report(self, recipes, admin):
+        path = reverse('personal-area-index-stats')
+        response = get_client(admin).get(path)
+        assert response.status_code == HTTP_200_OK
+        assert parse(response)['autocomplete']['within_budget']
+
+    def test_logged_user_cant_read_the_index_memory_report(self, recipes):
+        path = reverse('personal-area-index-stats')
+        response = get_client(recipes[0].author).get(path)
+        assert response.status_code == HTTP_403_FORBIDDEN
+
+    def test_admin_can_read_slow_queries_attributed_to_their_view(self, recipes, admin):
+        log = SlowQueryLog(threshold_ms=0, root=settings.BASE_DIR)
+        client = get_client(admin)
+        with patch('recipes.slowlog.slow_query_log', log), connection.execute_wrapper(log):
+            client.get(reverse('recipes-filter-author', args=[recipes[0].author.username]))
+        with patch('recipes.slowlog.slow_query_log', log):
+            response = client.get(reverse('personal-area-slow-queries'), {'limit': '50'})
+        assert response.status_code == HTTP_200_OK
+        entries = [entry for entry in parse(response)['queries'] if 'recipes_recipe' in entry['sql']]
+        assert entries[0]['view'].startswith('PublicRecipeViewSet.')
+        assert '<redacted>' in entries[0]['params']
+        assert any(frame.startswith('recipes/views.py') for frame in entries[0]['stack'])
+
+    def test_logged_user_cant_read_the_slow_query_log(self, recipes):
+        path = reverse('personal-area-slow-queries')
+        response = get_client(recipes[0].author).get(path)
+        assert response.status_code == HTTP_403_FORBIDDEN
+
+    def test_every_user_can_build_a_shopping_list(self, recipes):
+        mixer.blend('recipes.Recipe', title='Omelette', description='Omelette',
+                    ingredients=[{"name": "eggs", "unit": "kg", "quantity": 1},
+                                 {"name": "Water", "unit": "cl", "quantity": 50}])
+        omelette = recipes[2].pk + 1
+        path = reverse('recipes-shopping-list')
+        client = get_client()
+        response = client.get(path, {'recipe': [f'{recipes[0].pk}:2', f'{recipes[1].pk},{omelette}']})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == {'recipes': sorted([recipes[0].pk, recipes[1].pk, omelette]), 'ingredients': [
+            {'name': 'Eggs', 'quantity': 1.08, 'unit': 'kg'},
+            {'name': 'Water', 'quantity': 1.5, 'unit': 'l'},
+        ]}
+
+    def test_every_user_must_enter_valid_recipes_for_the_shopping_list(self, recipes):
+        path = reverse('recipes-shopping-list')
+        client = get_client()
+        for params in [{}, {'recipe': 'eggs'}, {'recipe': f'{recipes[0].pk}:0'}, {'recipe': f'{recipes[0].pk}:-1'}]:
+            response = client.get(path, params)
+            assert response.status_code == HTTP_400_BAD_REQUEST
+        response = client.get(path, {'recipe': f'{recipes[0].pk}:0.5'})
+        assert response.status_code == HTTP_400_BAD_REQUEST
+        assert 'between 1-100' in str(response.data['detail'])
+
+    def test_every_user_search_shopping_list_for_non_existent_recipe_receive_not_found(self, recipes):
+        path = reverse('recipes-shopping-list')
+        client = get_client()
+        response = client.get(path, {'recipe': f'{recipes[0].pk},9999'})
+        assert response.status_code == HTTP_404_NOT_FOUND
+
+    def test_every_user_can_find_the_recipes_covered_by_their_pantry(self, recipes):
+        mixer.blend('recipes.Recipe', title='Omelette', description='Omelette',
+                    ingredients=[{"name": "eggs", "unit": "n/a", "quantity": 2},
+                                 {"name": "Salt", "unit": "g", "quantity": 1}])
+        path = reverse('recipes-pantry')
+        client = get_client()
+        response = client.get(path, {'ingredient': ['EGGS', 'Water'], 'fields': 'id'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'id': recipes[0].pk, 'missing': []}, {'id': recipes[1].pk, 'missing': []}]
+
+    def test_every_user_can_find_the_recipes_missing_some_ingredients(self, recipes):
+        mixer.blend('recipes.Recipe', title='Omelette', description='Omelette',
+                    ingredients=[{"name": "eggs", "unit": "n/a", "quantity": 2},
+                                 {"name": "Salt", "unit": "g", "quantity": 1}])
+        path = reverse('recipes-pantry')
+        client = get_client()
+        response = client.get(path, {'ingredient': 'eggs', 'missing': '1', 'fields': 'title'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'title': 'My first recipe', 'missing': []},
+                                   {'title': 'My second recipe', 'missing': ['Water']},
+                                   {'title': 'My third recipe', 'missing': ['Tomato']},
+                                   {'title': 'Omelette', 'missing': ['Salt']}]
+
+    def test_every_user_can_limit_the_recipes_covered_by_their_pantry(self, recipes):
+        path = reverse('recipes-pantry')
+        client = get_client()
+        response = client.get(path, {'ingredient': 'eggs', 'missing': '1', 'limit': '2', 'fields': 'title'})
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == [{'title': 'My first recipe', 'missing': []},
+                                   {'title': 'My second recipe', 'missing': ['Water']}]
+
+    def test_every_user_must_enter_a_valid_pantry(self, recipes):
+        path = reverse('recipes-pantry')
+        client = get_client()
+        for params in [{}, {'ingredient': 'I0NV4L1D'}, {'ingredient': 'eggs', 'missing': '-1'},
+                       {'ingredient': 'eggs', 'missing': '11'}, {'ingredient': 'eggs', 'limit': '0'},
+                       {'ingredient': 'eggs', 'limit': '51'}]:
+            response = client.get(path, params)
+            assert response.status_code == HTTP_400_BAD_REQUEST
+
+    def test_every_user_with_an_unknown_pantry_receive_not_found_recipes(self, recipes):
+        path = reverse('recipes-pantry')
+        client = get_client()
+        response = client.get(path, {'ingredient': 'Melon'})
+        assert response.status_code == HTTP_404_NOT_FOUND
+
+    def test_every_user_can_search_recipes_by_relevance(self, recipes):
+        mixer.blend('recipes.Recipe', title='Tomato soup', description='A soup of tomato, with more tomato',
+                    ingredients=[{"name": "Tomato", "unit": "kg", "quantity": 2}])
+        path = reverse('recipes-search')
+        client = get_client()
+        response = client.get(path, {'q': 'tomato', 'fields': 'title'})
+        assert response.status_code == HTTP_200_OK
+        assert [recipe['title'] for recipe in parse(response)] == ['Tomato soup', 'My third recipe']
+        assert parse(response)[0]['score'] > parse(response)[1]['score']
+
+    def test_every_user_must_enter_a_valid_search(self):
+        path = reverse('recipes-search')
+        client = get_client()
+        for params in [{'q': ''}, {'q': '<script>'}, {'q': 'tomato', 'limit': '100'}]:
+            response = client.get(path, params)
+            assert response.status_code == HTTP_400_BAD_REQUEST
+
+    def test_every_user_search_for_unknown_words_receive_not_found_recipes(self, recipes):
+        path = reverse('recipes-search')
+        client = get_client()
+        response = client.get(path, {'q': 'melon'})
+        assert response.status_code == HTTP_404_NOT_FOUND
+
+    def test_every_user_can_sync_the_changes_since_a_cursor(self, recipes):
+        path = reverse('recipes-changes')
+        client = get_client()
+        response = client.get(path, {'fields': 'id'})
+        assert response.status_code == HTTP_200_OK
+        snapshot = parse(response)
+        assert [recipe['id'] for recipe in snapshot['changed']] == [recipe.pk for recipe in recipes]
+        assert snapshot['deleted'] == [] and not snapshot['has_more']
+
+        recipes[0].title = 'Updated recipe'
+        recipes[0].save()
+        deleted = recipes[1].pk
+        recipes[1].delete()
+        with patch('recipes.queries.CATCH_UP_OVERLAP', timedelta(0)):
+            response = client.get(path, {'since': snapshot['cursor'], 'fields': 'id,title'})
+            delta = parse(response)
+            assert {'id': recipes[0].pk, 'title': 'Updated recipe'} in delta['changed']
+            assert deleted not in [recipe['id'] for recipe in delta['changed']] and delta['deleted'] == [deleted]
+
+            response = client.get(path, {'since': delta['cursor']})
+            assert parse(response)['changed'] == [] and parse(response)['deleted'] == []
+
+    def test_every_user_receives_changes_committed_behind_the_cursor(self, recipes):
+        path = reverse('recipes-changes')
+        client = get_client()
+        recipes[0].save()
+        page = parse(client.get(path, {'fields': 'id'}))
+        assert page['cursor'] < Recipe.objects.get(pk=recipes[0].pk).modified_at.isoformat()
+
+        late = mixer.blend(Recipe, ingredients=[{"name": "Eggs", "unit": "g", "quantity": 40}])
+        Recipe.objects.filter(pk=late.pk).update(modified_at=timezone.now() - timedelta(seconds=5))
+        page = parse(client.get(path, {'since': page['cursor'], 'fields': 'id'}))
+        changed = [recipe['id'] for recipe in page['changed']]
+        assert late.pk in changed and recipes[0].pk in changed and len(changed) == len(set(changed))
+
+    def test_every_user_must_sync_again_once_deletions_are_pruned(self, recipes, settings):
+        settings.RECIPES_TOMBSTONES = {'RETENTION_DAYS': 7}
+        kept = recipes[1].pk
+        recipes[0].delete()
+        RecipeTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=8))
+        recipes[1].delete()
+        call_command('prune_tombstones', stdout=StringIO())
+        assert list(RecipeTombstone.objects.values_list('recipe_id', flat=True)) == [kept]
+
+        path = reverse('recipes-changes')
+        response = get_client().get(path, {'since': (timezone.now() - timedelta(days=8)).isoformat()})
+        assert response.status_code == HTTP_410_GONE
+        response = get_client().get(path, {'since': (timezone.now() - timedelta(days=6)).isoformat()})
+        assert response.status_code == HTTP_200_OK and parse(response)['deleted'] == [kept]
+
+    def test_every_user_can_sync_the_changes_in_pages(self, recipes):
+        path = reverse('recipes-changes')
+        client = get_client()
+        seen, cursor, has_more = [], None, True
+        while has_more:
+            params = {'limit': '2', 'fields': 'id'}
+            if cursor is not None:
+                params['since'] = cursor
+            page = parse(client.get(path, params))
+            seen += [recipe['id'] for recipe in page['changed']]
+            cursor, has_more = page['cursor'], page['has_more']
+        assert seen == [recipe.pk for recipe in recipes]
+
+    def test_every_user_must_enter_a_valid_cursor(self):
+        path = reverse('recipes-changes')
+        client = get_client()
+        for params in [{'since': 'yesterday'}, {'since': '2022-13-45T00:00:00'}, {'limit': '0'}]:
+            response = client.get(path, params)
+            assert response.status_code == HTTP_400_BAD_REQUEST
+
+    def test_moderator_can_bulk_delete_non_super_user_recipes(self, recipes, moderator):
+        path = reverse('personal-area-bulk-delete')
+        client = get_client(moderator)
+        ids = [recipes[0].pk, recipes[1].pk, recipes[2].pk, 9999]
+        with CaptureQueriesContext(connection) as queries:
+            response = client.delete(path, {'ids': ids}, format='json')
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == {'deleted': 2, 'results': [
+            {'id': recipes[0].pk, 'outcome': 'deleted'}, {'id': recipes[1].pk, 'outcome': 'forbidden'},
+            {'id': recipes[2].pk, 'outcome': 'deleted'}, {'id': 9999, 'outcome': 'not_found'}]}
+        assert len([query for query in queries if query['sql'].startswith('DELETE')]) == 1
+        assert len([query for query in queries if 'INSERT INTO "recipes_recipetombstone"' in query['sql']]) == 1
+        assert list(Recipe.objects.values_list('pk', flat=True)) == [recipes[1].pk]
+        assert set(RecipeTombstone.objects.values_list('recipe_id', flat=True)) == {recipes[0].pk, recipes[2].pk}
+
+    def test_bulk_delete_invalidates_counts_and_indexes_once(self, recipes, admin):
+        with patch('recipes.signals.invalidate_counts') as invalidate_counts, \
+                patch('recipes.signals.registry', [Mock()]) as registry:
+            response = get_client(admin).delete(reverse('personal-area-bulk-delete'),
+                                                {'ids': [recipe.pk for recipe in recipes]}, format='json')
+        assert response.status_code == HTTP_200_OK and parse(response)['deleted'] == len(recipes)
+        invalidate_counts.assert_called_once()
+        assert sorted(pk for (pk,), _ in registry[0].remove.call_args_list) == sorted(recipe.pk for recipe in recipes)
+
+    def test_admin_can_bulk_delete_recipes_matching_a_filter(self, recipes, admin):
+        path = reverse('personal-area-bulk-delete')
+        client = get_client(admin)
+        response = client.delete(path, {'filter': {'title': 'recipe', 'ingredient': ['water']}, 'confirm': 1},
+                                 format='json')
+        assert response.status_code == HTTP_200_OK
+        assert parse(response) == {'deleted': 1, 'results': [{'id': recipes[1].pk, 'outcome': 'deleted'}]}
+        assert Recipe.objects.count() == 2
+
+    def test_admin_must_confirm_a_bounded_bulk_delete_by_filter(self, recipes, admin):
+        path = reverse('personal-area-bulk-delete')
+        client = get_client(admin)
+        for body in [{'filter': {'title': 'recipe'}}, {'filter': {'title': 'recipe'}, 'confirm': 2}]:
+            response = client.delete(path, body, format='json')
+            assert response.status_code == HTTP_400_BAD_REQUEST
+            assert parse(response) == {'detail': 'Please, confirm the deletion of the 3 matching recipes'}
+        with patch('recipes.moderation.MAX_BULK_IDS', 2):
+            response = client.delete(path, {'filter': {'sort': 'title'}, 'confirm': 3}, format='json')
+        assert response.status_code == HTTP_400_BAD_REQUEST
+        assert Recipe.objects.count() == 3
+
+    def test_logged_user_cant_bulk_delete_recipes(self, recipes):
+        path = reverse('personal-area-bulk-delete')
+        client = get_client(recipes[0].author)
+        response = client.delete(path, {'ids': [recipes[0].pk]}, format='json')
+        assert response.status_code == HTTP_403_FORBIDDEN
+        assert Recipe.objects.count() == 3
+
+    def test_moderator_must_send_a_valid_bulk_delete(self, recipes, moderator):
+        path = reverse('personal-area-bulk-delete')
+        client = get_client(moderator)
+        for body in [{}, {'ids': []}, {'ids': ['1']}, {'ids': [1], 'filter': {'title': 'recipe'}},
+                     {'filter': {}}, {'filter': {'title': 'I0NV4L1D'}}]:
+            response = client.delete(path, body, format='json')
+            assert response.status_code == HTTP_400_BAD_REQUEST
+        assert Recipe.objects.count() == 3
+
+
+class TestApiDocumentation:
+    def test_admin_can_get_the_schema(self, admin):
+        response = get_client(admin).get('/schema/')
+        assert response.status_code == HTTP_200_OK
+
+    def test_admin_can_get_the_docs(self, admin):
+        response = get_client(admin).get(reverse('api-docs:docs-index'))
+        assert response.status_code == HTTP_200_OK
+        assert get_client(admin).get(reverse('api-docs:schema-js')).status_code == HTTP_200_OK
+
+    def test_anon_user_cant_get_the_schema(self, db):
+        response = get_client().get('/schema/')
+        assert response.status_code == HTTP_403_FORBIDDEN
+
+    def test_schema_is_generated_once_per_permission_variant(self, admin):
+        client = get_client(admin)
+        with patch.object(SchemaGenerator, 'get_schema', autospec=True,
+                          side_effect=SchemaGenerator.get_schema) as get_schema:
+            first = client.get('/schema/')
+            second = client.get('/schema/')
+            get_client(mixer.blend(get_user_model(), is_staff=True)).get('/schema/')
+        assert get_schema.call_count == 2
+        assert first.content == second.content
+        assert first['ETag'] == second['ETag']
+
+    def test_schema_is_served_with_etag_and_gzip(self, admin):
+        client = get_client(admin)
+        response = client.get('/schema/')
+        assert client.get('/schema/', HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+        compressed = client.get('/schema/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert compressed['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.content) == response.content
+
+    def test_docs_views_are_built_on_first_request_only(self, rf):
+        view = Mock(return_value='response')
+        factory = Mock(return_value=view)
+        dispatch = lazy_view(factory)
+        factory.assert_not_called()
+        assert dispatch(rf.get('/')) == 'response'
+        assert dispatch(rf.get('/')) == 'response'
+        factory.assert_called_once()
+        assert view.call_count == 2
+
+
+class TestBatchView:
+    def test_batch_returns_every_sub_response_in_order(self, recipes, moderator):
+        client = get_client(moderator)
+        author = recipes[0].author.username
+        paths = [reverse('personal-area-account-type'), reverse('recipes-sort-date'),
+                 reverse('recipes-filter-author', kwargs={'name': author}),
+                 reverse('recipes-detail', kwargs={'pk': recipes[0].pk})]
+        response = client.post(reverse('batch'), {'requests': [{'method': 'GET', 'path': path} for path in paths]},
+                               format='json')
+        assert response.status_code == HTTP_200_OK
+        results = response.json()['responses']
+        assert [result['status'] for result in results] == [HTTP_200_OK] * 4
+        assert results == [{'status': HTTP_200_OK, 'body': client.get(path).json()} for path in paths]
+
+    def test_batch_resolves_the_role_once(self, recipes, moderator):
+        client = get_client(moderator)
+        items = [{'method': 'GET', 'path': reverse('personal-area-detail', kwargs={'pk': recipe.pk})}
+                 for recipe in recipes]
+        items.append({'method': 'GET', 'path': reverse('personal-area-account-type')})
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(reverse('batch'), {'requests': items}, format='json')
+        assert response.json()['responses'][-1]['body'] == {'type-account': 2}
+        assert sum('recipe_moderators' in query['sql'] for query in queries.captured_queries) == 1
+
+    def test_batch_runs_identical_reads_once_until_a_write(self, recipes, admin):
+        client = get_client(admin)
+        path = reverse('personal-area-detail', kwargs={'pk': recipes[0].pk})
+        items = [{'method': 'GET', 'path': path}, {'method': 'GET', 'path': path}]
+        with patch('recipes.views.PrivateRecipeViewSet.retrieve', autospec=True,
+                   return_value=Response(data={}, status=HTTP_200_OK)) as retrieve:
+            client.post(reverse('batch'), {'requests': items}, format='json')
+        assert retrieve.call_count == 1
+
+        items = [{'method': 'GET', 'path': path}, {'method': 'DELETE', 'path': path}, {'method': 'GET', 'path': path}]
+        response = client.post(reverse('batch'), {'requests': items}, format='json')
+        assert [result['status'] for result in response.json()['responses']] == \
+               [HTTP_200_OK, HTTP_204_NO_CONTENT, HTTP_404_NOT_FOUND]
+
+    def test_batch_applies_the_permissions_of_every_sub_request(self, recipes):
+        client = get_client()
+        items = [{'method': 'GET', 'path': reverse('recipes-list')},
+                 {'method': 'GET', 'path': reverse('personal-area-list')},
+                 {'method': 'POST', 'path': reverse('personal-area-list'), 'body': {'title': 'Test'}},
+                 {'method': 'GET', 'path': '/schema/'},
+                 {'method': 'GET', 'path': '/api/v1/unknown/'}]
+        response = client.post(reverse('batch'), {'requests': items}, format='json')
+        assert [result['status'] for result in response.json()['responses']] == \
+               [HTTP_200_OK, HTTP_403_FORBIDDEN, HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND]
+
+    def test_batch_rejects_malformed_payloads(self, db):
+        client = get_client()
+        for payload in [{}, {'requests': []}, {'requests': [{'method': 'TRACE', 'path': '/'}]},
+                        {'requests': [{'method': 'GET', 'path': 'relative'}]},
+                        {'requests': [{'method': 'GET', 'path': '/'}] * 21}]:
+            assert client.post(reverse('batch'), payload, format='json').status_code == HTTP_400_BAD_REQUEST
+
+    @pytest.mark.django_db(transaction=True)
+    def test_batch_can_run_independent_reads_concurrently(self):
+        user = mixer.blend(get_user_model())
+        recipe = mixer.blend('recipes.Recipe', author=user, title='Banana bread', description='Bake it',
+                             ingredients=[{"name": "Banana", "unit": "g", "quantity": 100}])
+        items = [{'method': 'GET', 'path': reverse('recipes-detail', kwargs={'pk': recipe.pk})},
+                 {'method': 'GET', 'path': reverse('personal-area-list')}]
+        response = get_client(user).post(reverse('batch'), {'requests': items, 'concurrent': True}, format='json')
+        results = response.json()['responses']
+        assert results[0]['body']['title'] == 'Banana bread'
+        assert [recipe['id'] for recipe in results[1]['body']] == [recipe.pk]
+
+
+class TestCollectionCounts:
+    def test_collections_report_the_total_count(self, recipes):
+        client = get_client()
+        for name, kwargs in [('recipes-list', {}), ('recipes-sort-title', {}), ('recipes-sort-date', {}),
+                             ('recipes-filter-title', {'title': 'recipe'}),
+                             ('recipes-filter-author', {'name': recipes[0].author.username}),
+                             ('recipes-filter-ingredient', {'name': 'eggs'})]:
+            path = reverse(name, kwargs=kwargs)
+            response = client.get(path)
+            assert response['X-Total-Count'] == str(len(response.data))
+            counted = client.get(path, {'count': 'only'})
+            assert counted.data == {'count': len(response.data)}
+            assert counted['X-Total-Count'] == response['X-Total-Count']
+            assert client.head(path)['X-Total-Count'] == response['X-Total-Count']
+
+    def test_ingredient_counts_fold_non_ascii_names_like_the_list(self, recipes):
+        mixer.blend('recipes.Recipe', title='Dessert', description='Whip it',
+                    ingredients=[{"name": "CRÈME", "unit": "g", "quantity": 40}])
+        client = get_client()
+        path = reverse('recipes-filter-ingredient', kwargs={'name': 'crème'})
+        assert len(client.get(path).data) == 1
+        assert client.get(path, {'count': 'only'}).data == {'count': 1}
+
+    def test_index_backed_collections_report_the_total_count(self, recipes):
+        client = get_client()
+        for name, params in [('recipes-pantry', {'ingredient': 'eggs'}), ('recipes-search', {'q': 'recipe'}),
+                             ('recipes-query', {'ingredient': 'eggs'})]:
+            response = client.get(reverse(name), params)
+            counted = client.get(reverse(name), dict(params, count='only'))
+            assert counted.data == {'count': len(response.data)} and counted.data['count'] > 0
+
+    def test_ranked_collections_count_every_match_beyond_the_limit(self, recipes):
+        client = get_client()
+        for name, params in [('recipes-pantry', {'ingredient': 'eggs', 'missing': '1'}),
+                             ('recipes-search', {'q': 'recipe'})]:
+            response = client.get(reverse(name), dict(params, limit='1'))
+            assert len(response.data) == 1
+            assert response['X-Total-Count'] == '3'
+            assert client.get(reverse(name), dict(params, limit='1', count='only')).data == {'count': 3}
+
+    def test_empty_collections_count_zero(self, recipes):
+        client = get_client()
+        path = reverse('recipes-filter-title', kwargs={'title': 'Nothing'})
+        assert client.get(path)['X-Total-Count'] == '0'
+        assert client.get(path, {'count': 'only'}).data == {'count': 0}
+
+    def test_counts_are_cached_until_a_recipe_is_written(self, recipes):
+        client = get_client()
+        path = reverse('recipes-list')
+        total = client.get(path, {'count': 'only'}).data['count']
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(path, {'count': 'only'}).data['count'] == total
+        assert not any('COUNT' in query['sql'] for query in queries.captured_queries)
+
+        mixer.blend('recipes.Recipe', author=recipes[0].author,
+                    ingredients=[{"name": "Eggs", "unit": "g", "quantity": 4}])
+        assert client.get(path, {'count': 'only'}).data['count'] == total + 1
+        recipes[0].delete()
+        assert client.get(path, {'count': 'only'}).data['count'] == total
+
+    def test_personal_area_counts_are_kept_per_user(self, recipes):
+        author = recipes[0].author
+        assert get_client(author).get(reverse('personal-area-list'), {'count': 'only'}).data == \
+               {'count': Recipe.objects.filter(author=author).count()}
+        assert get_client(mixer.blend(get_user_model())).get(reverse('personal-area-list'),
+                                                             {'count': 'only'}).data == {'count': 0}
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from recipes.writer import WriteCoordinator, shutdown_write_coordinators
+
+EGGS = [{"name": "Eggs", "unit": "g", "quantity": 100}]
+
+
+@pytest.fixture()
+def coordinator():
+    coordinator = WriteCoordinator('default', max_batch=8, max_delay=0.05).start()
+    yield coordinator
+    coordinator.shutdown()
+
+
+def submit_concurrently(coordinator, functions):
+    results, errors = {}, {}
+
+    def submit(position, function):
+        try:
+            results[position] = coordinator.submit(function)
+        except Exception as error:
+            errors[position] = error
+
+    threads = [threading.Thread(target=submit, args=item) for item in enumerate(functions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_writes_are_committed_in_batches(coordinator):
+    author = mixer.blend(get_user_model())
+    results, errors = submit_concurrently(coordinator, [
+        lambda position=position: Recipe.objects.create(author=author, title=f'Omelette {position}', ingredients=EGGS)
+        for position in range(8)])
+    assert not errors and Recipe.objects.count() == 8
+    assert sorted(recipe.pk for recipe in results.values()) == sorted(Recipe.objects.values_list('pk', flat=True))
+    report = coordinator.report()
+    assert report['submitted'] == report['committed'] == 8 and report['failed'] == 0
+    assert report['batches'] < 8 and report['max_batch'] > 1 and report['depth'] == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_a_failing_write_does_not_roll_back_its_batch(coordinator):
+    author = mixer.blend(get_user_model())
+
+    def fail():
+        Recipe.objects.create(author=author, title='Burnt', ingredients=EGGS)
+        raise ValueError('burnt')
+
+    results, errors = submit_concurrently(coordinator, [
+        lambda: Recipe.objects.create(author=author, title='Omelette', ingredients=EGGS), fail,
+        lambda: Recipe.objects.create(author=author, title='Pancake', ingredients=EGGS)])
+    assert list(errors) == [1] and isinstance(errors[1], ValueError)
+    assert sorted(Recipe.objects.values_list('title', flat=True)) == ['Omelette', 'Pancake']
+    assert coordinator.report()['committed'] == 2 and coordinator.report()['failed'] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_personal_area_writes_go_through_the_coordinator(settings):
+    settings.RECIPES_GROUP_COMMIT = {'ENABLED': True, 'MAX_BATCH': 8, 'MAX_DELAY_MS': 1}
+    client = APIClient()
+    client.force_login(get_user_model().objects.create_superuser('root', 'root@example.com', 'root'))
+    try:
+        response = client.post(reverse('personal-area-list'), {'title': 'Omelette', 'description': 'Beat the eggs',
+                                                               'ingredients': EGGS}, format='json')
+        assert response.status_code == HTTP_201_CREATED
+        response = client.get(reverse('personal-area-index-stats'))
+        assert response.status_code == HTTP_200_OK
+        assert response.json()['writer']['default']['committed'] == 1
+    finally:
+        shutdown_write_coordinators()
+    assert Recipe.objects.get().title == 'Omelette'